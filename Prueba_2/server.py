@@ -42,6 +42,7 @@ class APIHandler(BaseHTTPRequestHandler):
         self.wfile.write(json.dumps(data).encode())
 
 if __name__ == "__main__":
-    server = HTTPServer(("0.0.0.0", 8000), APIHandler)
-    print("Servidor ejecutándose en puerto 8000...")
+    port = int(os.environ.get("PORT", 8000))
+    server = HTTPServer(("0.0.0.0", port), APIHandler)
+    print(f"Servidor ejecutándose en puerto {port}...")
     server.serve_forever()
\ No newline at end of file
@@ -0,0 +1,557 @@
+"""
+Balanceador local delante de varias réplicas de la Ruleta Virtual (proxy inverso HTTP/1.1 sobre asyncio)
+
+El estado del juego vive en la memoria de cada proceso, así que cada mesa o sesión tiene que
+llegar siempre a la misma réplica: la clave de la request se ubica en un anillo de hashing
+consistente y, cuando una réplica entra o sale, solo cambian de dueño las claves de su tramo.
+
+    python balancer.py --spawn 3                 # lanza 3 réplicas de server.py y las balancea
+    python balancer.py --replica http://127.0.0.1:5001 http://127.0.0.1:5002
+
+Clave de enrutamiento, en orden: cabecera X-Table-Id, parámetro ?table=, cabecera X-Client-Id
+y por último la IP del cliente. Estado y cambios de réplicas en /_balancer/status y
+/_balancer/replicas.
+"""
+
+import argparse
+import asyncio
+import bisect
+import hashlib
+import json
+import os
+import signal
+import socket
+import subprocess
+import sys
+import time
+from collections import deque
+from urllib.parse import urlsplit, parse_qs
+
+try:
+    import uvloop
+except ImportError:
+    uvloop = None
+
+VIRTUAL_NODES = 160
+ADMIN_PREFIX = "/_balancer"
+HOP_BY_HOP = {b"connection", b"keep-alive", b"proxy-connection", b"te", b"trailer", b"upgrade"}
+# 503 y 429 los emite el control de admisión de server.py: la réplica está sana y se defiende
+NOT_OUTLIER_STATUSES = (429, 503)
+MAX_EJECTION_SECONDS = 300
+
+def ring_hash(key):
+    return int.from_bytes(hashlib.blake2b(key, digest_size=8).digest(), "big")
+
+class HashRing:
+    """Anillo de hashing consistente con nodos virtuales por réplica"""
+
+    def __init__(self, vnodes=VIRTUAL_NODES):
+        self.vnodes = vnodes
+        self.members = frozenset()
+        self.points = []
+        self.owners = []
+
+    def rebuild(self, members):
+        self.members = frozenset(members)
+        ring = sorted((ring_hash(f"{name}#{i}".encode()), name) for name in self.members for i in range(self.vnodes))
+        self.points = [point for point, _ in ring]
+        self.owners = [name for _, name in ring]
+
+    def lookup(self, key):
+        if not self.points:
+            return None
+        index = bisect.bisect(self.points, ring_hash(key))
+        return self.owners[index % len(self.owners)]
+
+    def shares(self):
+        """Fracción del espacio de hashes (y por tanto de las claves) que atiende cada réplica"""
+        shares = dict.fromkeys(self.members, 0.0)
+        space = 1 << 64
+        for index, point in enumerate(self.points):
+            previous = self.points[index - 1] if index else self.points[-1] - space
+            shares[self.owners[index]] += (point - previous) / space
+        return shares
+
+class Replica:
+    """Una réplica upstream con su pool de conexiones keep-alive y su estado de salud"""
+
+    def __init__(self, url, max_idle=32):
+        parts = urlsplit(url)
+        self.url = url.rstrip("/")
+        self.host = parts.hostname or "127.0.0.1"
+        self.port = parts.port or 80
+        self.name = f"{self.host}:{self.port}"
+        self.max_idle = max_idle
+        self.idle = deque()
+        self.healthy = False
+        self.health_failures = 0
+        self.consecutive_failures = 0
+        self.ejected_until = 0.0
+        self.ejections = 0
+        self.requests = 0
+        self.failures = 0
+        self.connections_opened = 0
+        self.connections_reused = 0
+
+    async def acquire(self):
+        """Conexión del pool si queda alguna viva; si no, una nueva. Devuelve (reader, writer, reutilizada)"""
+        while self.idle:
+            reader, writer = self.idle.pop()
+            if writer.is_closing() or reader.at_eof():
+                writer.close()
+                continue
+            self.connections_reused += 1
+            return reader, writer, True
+        reader, writer = await asyncio.open_connection(self.host, self.port)
+        writer.get_extra_info("socket").setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self.connections_opened += 1
+        return reader, writer, False
+
+    def release(self, reader, writer):
+        if len(self.idle) < self.max_idle:
+            self.idle.append((reader, writer))
+        else:
+            writer.close()
+
+    def close_idle(self):
+        while self.idle:
+            self.idle.pop()[1].close()
+
+    def status(self, now, share):
+        return {
+            "url": self.url,
+            "in_ring": share is not None,
+            "healthy": self.healthy,
+            "ejected_for_seconds": max(0.0, self.ejected_until - now),
+            "ejections": self.ejections,
+            "key_share_percent": share * 100 if share is not None else 0.0,
+            "requests": self.requests,
+            "failures": self.failures,
+            "idle_connections": len(self.idle),
+            "connections_opened": self.connections_opened,
+            "connections_reused": self.connections_reused
+        }
+
+def parse_head(head):
+    """Primera línea y cabeceras (nombres en minúscula) de un bloque HTTP terminado en CRLFCRLF"""
+    lines = head[:-4].split(b"\r\n")
+    headers = []
+    for line in lines[1:]:
+        name, _, value = line.partition(b":")
+        headers.append((name.strip().lower(), value.strip()))
+    return lines[0], headers
+
+def header_value(headers, name):
+    for key, value in headers:
+        if key == name:
+            return value
+    return None
+
+def json_response(status, reason, payload, keep_alive=True, extra=b""):
+    body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+    return (
+        f"HTTP/1.1 {status} {reason}\r\n"
+        "Content-Type: application/json\r\n"
+        f"Content-Length: {len(body)}\r\n"
+        f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n"
+    ).encode("ascii") + extra + b"\r\n" + body
+
+async def read_body(reader, headers, status, method):
+    """Cuerpo de una respuesta upstream; devuelve (cuerpo, fin_por_eof, chunked)"""
+    if method == b"HEAD" or status < 200 or status in (204, 304):
+        return b"", False, False
+    length = header_value(headers, b"content-length")
+    if length is not None:
+        return await reader.readexactly(int(length)), False, False
+    if b"chunked" in (header_value(headers, b"transfer-encoding") or b"").lower():
+        # Se reenvía con el mismo framing: tamaños, trozos y el bloque final con sus trailers
+        parts = []
+        while True:
+            size_line = await reader.readuntil(b"\r\n")
+            parts.append(size_line)
+            size = int(size_line.split(b";", 1)[0], 16)
+            if size == 0:
+                while True:
+                    trailer = await reader.readuntil(b"\r\n")
+                    parts.append(trailer)
+                    if trailer == b"\r\n":
+                        return b"".join(parts), False, True
+            parts.append(await reader.readexactly(size + 2))
+    return await reader.read(), True, False
+
+class Balancer:
+    def __init__(self, replica_urls=(), health_interval=2.0, health_timeout=1.0, unhealthy_after=2,
+                 eject_after=5, eject_seconds=10.0, max_idle=32, upstream_timeout=30.0):
+        self.replicas = {}
+        self.ring = HashRing()
+        self.health_interval = health_interval
+        self.health_timeout = health_timeout
+        self.unhealthy_after = unhealthy_after
+        self.eject_after = eject_after
+        self.eject_seconds = eject_seconds
+        self.max_idle = max_idle
+        self.upstream_timeout = upstream_timeout
+        self.rebalances = 0
+        for url in replica_urls:
+            self.add_replica(url)
+
+    # === MEMBRESÍA ===
+
+    def add_replica(self, url):
+        """Registrar una réplica; entra al anillo tras su primer /health correcto"""
+        replica = Replica(url, self.max_idle)
+        existing = self.replicas.get(replica.name)
+        if existing is not None:
+            return existing
+        self.replicas[replica.name] = replica
+        print(f"➕ Réplica registrada: {replica.url}")
+        return replica
+
+    def remove_replica(self, name):
+        replica = self.replicas.pop(name, None)
+        if replica is None:
+            return None
+        replica.close_idle()
+        print(f"➖ Réplica retirada: {replica.url}")
+        self.refresh_ring()
+        return replica
+
+    def refresh_ring(self):
+        """Reconstruir el anillo si cambió el conjunto de réplicas disponibles"""
+        now = time.monotonic()
+        members = {name for name, replica in self.replicas.items()
+                   if replica.healthy and replica.ejected_until <= now}
+        if members == self.ring.members:
+            return
+        before = self.ring.shares()
+        joined = members - self.ring.members
+        left = self.ring.members - members
+        self.ring.rebuild(members)
+        self.rebalances += 1
+        # Las claves que cambian de réplica son las de los tramos ganados por las que entraron
+        # más las de los tramos que dejaron las que salieron
+        moved = sum(self.ring.shares()[name] for name in joined) + sum(before[name] for name in left)
+        changes = [f"+{name}" for name in sorted(joined)] + [f"-{name}" for name in sorted(left)]
+        moved_text = f" | ~{min(moved, 1.0) * 100:.0f}% de las claves cambia de réplica" if before and members else ""
+        print(f"🔄 Rebalanceo: {' '.join(changes)} | {len(members)} réplica(s){moved_text}")
+
+    # === SALUD Y EYECCIÓN ===
+
+    async def check_health(self, replica):
+        try:
+            reader, writer = await asyncio.wait_for(asyncio.open_connection(replica.host, replica.port),
+                                                    self.health_timeout)
+        except (OSError, asyncio.TimeoutError):
+            return False
+        try:
+            writer.write(f"GET /health HTTP/1.1\r\nHost: {replica.name}\r\nConnection: close\r\n\r\n".encode("ascii"))
+            head = await asyncio.wait_for(reader.readuntil(b"\r\n\r\n"), self.health_timeout)
+            return head.split(b" ", 2)[1] == b"200"
+        except (OSError, asyncio.TimeoutError, asyncio.IncompleteReadError, asyncio.LimitOverrunError, IndexError):
+            return False
+        finally:
+            writer.close()
+
+    async def health_round(self):
+        replicas = list(self.replicas.values())
+        results = await asyncio.gather(*(self.check_health(replica) for replica in replicas))
+        for replica, ok in zip(replicas, results):
+            if ok:
+                if not replica.healthy:
+                    print(f"💚 {replica.name} responde en /health")
+                replica.healthy = True
+                replica.health_failures = 0
+            else:
+                replica.health_failures += 1
+                if replica.healthy and replica.health_failures >= self.unhealthy_after:
+                    replica.healthy = False
+                    replica.close_idle()
+                    print(f"💔 {replica.name} no responde en /health ({replica.health_failures} veces)")
+        self.refresh_ring()
+
+    async def health_loop(self):
+        while True:
+            await self.health_round()
+            await asyncio.sleep(self.health_interval)
+
+    def record_result(self, replica, failed):
+        """Eyección pasiva: fallos seguidos en tráfico real sacan a la réplica del anillo un tiempo"""
+        replica.requests += 1
+        if not failed:
+            replica.consecutive_failures = 0
+            return
+        replica.failures += 1
+        replica.consecutive_failures += 1
+        if replica.consecutive_failures < self.eject_after or replica.ejected_until > time.monotonic():
+            return
+        if self.ring.members == {replica.name}:
+            return  # Sin otra réplica a la que mover sus claves, expulsarla solo empeoraría las cosas
+        replica.ejections += 1
+        duration = min(self.eject_seconds * 2 ** (replica.ejections - 1), MAX_EJECTION_SECONDS)
+        replica.ejected_until = time.monotonic() + duration
+        replica.consecutive_failures = 0
+        replica.close_idle()
+        print(f"⛔ {replica.name} expulsada {duration:.0f}s tras {self.eject_after} fallos seguidos")
+        self.refresh_ring()
+
+    # === PROXY ===
+
+    @staticmethod
+    def routing_key(target, headers, peer):
+        table = header_value(headers, b"x-table-id")
+        if table:
+            return b"table:" + table
+        if b"table=" in target:
+            tables = parse_qs(urlsplit(target.decode("latin-1")).query).get("table")
+            if tables:
+                return b"table:" + tables[0].encode("latin-1")
+        client = header_value(headers, b"x-client-id")
+        if client:
+            return b"client:" + client
+        return b"ip:" + peer.encode("ascii")
+
+    def upstream_request(self, request_line, headers, body, peer):
+        """Request para la réplica: sin cabeceras hop-by-hop, con X-Forwarded-For y X-Request-Start"""
+        method, target, _ = request_line.split(b" ", 2)
+        lines = [method + b" " + target + b" HTTP/1.1"]
+        has_request_start = False
+        forwarded_for = peer.encode("ascii")
+        for name, value in headers:
+            if name in HOP_BY_HOP or name == b"content-length":
+                continue
+            if name == b"x-forwarded-for":
+                forwarded_for = value + b", " + forwarded_for
+                continue
+            has_request_start = has_request_start or name == b"x-request-start"
+            lines.append(name + b": " + value)
+        lines.append(b"X-Forwarded-For: " + forwarded_for)
+        if not has_request_start:
+            # El control de admisión de la réplica descarta lo que esperó demasiado desde aquí
+            lines.append(b"X-Request-Start: t=%d" % (time.time_ns() // 1000))
+        lines.append(b"Content-Length: %d" % len(body))
+        return b"\r\n".join(lines) + b"\r\n\r\n" + body
+
+    async def exchange(self, replica, request, method):
+        """Enviar la request y leer la respuesta; reintenta una vez si una conexión del pool ya estaba cerrada"""
+        for attempt in (0, 1):
+            reader, writer, reused = await replica.acquire()
+            try:
+                writer.write(request)
+                await writer.drain()
+                head = await reader.readuntil(b"\r\n\r\n")
+                status_line, headers = parse_head(head)
+                status = int(status_line.split(b" ", 2)[1])
+                body, until_eof, chunked = await read_body(reader, headers, status, method)
+            except asyncio.IncompleteReadError as e:
+                writer.close()
+                if reused and attempt == 0 and not e.partial:
+                    continue  # La réplica cerró la conexión ociosa antes de leer la request
+                raise
+            except BaseException:
+                writer.close()
+                raise
+            keep_upstream = not until_eof and b"close" not in (header_value(headers, b"connection") or b"").lower() \
+                and status_line.startswith(b"HTTP/1.1")
+            if keep_upstream:
+                replica.release(reader, writer)
+            else:
+                writer.close()
+            return status_line, status, headers, body, chunked
+
+    def client_response(self, replica, status_line, headers, body, chunked, keep_alive):
+        """Respuesta para el cliente con sus propias cabeceras de conexión y el framing resuelto"""
+        _, rest = status_line.split(b" ", 1)
+        lines = [b"HTTP/1.1 " + rest]
+        for name, value in headers:
+            if name in HOP_BY_HOP or (name == b"transfer-encoding" and not chunked) or name == b"content-length":
+                continue
+            lines.append(name + b": " + value)
+        if chunked:
+            lines.append(b"Transfer-Encoding: chunked")
+        else:
+            lines.append(b"Content-Length: %d" % len(body))
+        lines.append(b"X-Ruleta-Replica: " + replica.name.encode("ascii"))
+        lines.append(b"Connection: keep-alive" if keep_alive else b"Connection: close")
+        return b"\r\n".join(lines) + b"\r\n\r\n" + body
+
+    async def forward(self, request_line, headers, body, peer, keep_alive):
+        target = request_line.split(b" ", 2)[1]
+        name = self.ring.lookup(self.routing_key(target, headers, peer))
+        if name is None:
+            return json_response(503, "Service Unavailable",
+                                 {"success": False, "error": "Sin réplicas disponibles"},
+                                 keep_alive, b"Retry-After: %d\r\n" % max(1, round(self.health_interval)))
+        replica = self.replicas[name]
+        method = request_line.split(b" ", 1)[0]
+        try:
+            status_line, status, response_headers, response_body, chunked = await asyncio.wait_for(
+                self.exchange(replica, self.upstream_request(request_line, headers, body, peer), method),
+                self.upstream_timeout)
+        except asyncio.TimeoutError:
+            self.record_result(replica, True)
+            return json_response(504, "Gateway Timeout",
+                                 {"success": False, "error": f"{name} no respondió a tiempo"}, keep_alive)
+        except (OSError, asyncio.IncompleteReadError, asyncio.LimitOverrunError, ValueError, IndexError) as e:
+            self.record_result(replica, True)
+            return json_response(502, "Bad Gateway",
+                                 {"success": False, "error": f"{name}: {e or type(e).__name__}"}, keep_alive)
+        self.record_result(replica, status >= 500 and status not in NOT_OUTLIER_STATUSES)
+        return self.client_response(replica, status_line, response_headers, response_body, chunked, keep_alive)
+
+    async def handle_client(self, reader, writer):
+        """Atender requests en una conexión keep-alive del cliente"""
+        peername = writer.get_extra_info("peername")
+        peer = peername[0] if peername else "desconocido"
+        try:
+            while True:
+                head = await reader.readuntil(b"\r\n\r\n")
+                request_line, headers = parse_head(head)
+                if b"chunked" in (header_value(headers, b"transfer-encoding") or b"").lower():
+                    writer.write(json_response(411, "Length Required",
+                                               {"success": False, "error": "Se requiere Content-Length"}, False))
+                    break
+                length = int(header_value(headers, b"content-length") or 0)
+                body = await reader.readexactly(length) if length else b""
+                connection = (header_value(headers, b"connection") or b"").lower()
+                keep_alive = b"close" not in connection and (request_line.endswith(b"HTTP/1.1") or b"keep-alive" in connection)
+
+                target = request_line.split(b" ", 2)[1]
+                if target.startswith(ADMIN_PREFIX.encode("ascii")):
+                    response = self.admin(request_line, keep_alive)
+                else:
+                    response = await self.forward(request_line, headers, body, peer, keep_alive)
+                writer.write(response)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, ConnectionError, ValueError, IndexError):
+            pass
+        finally:
+            writer.close()
+
+    # === ADMINISTRACIÓN ===
+
+    def status(self):
+        now = time.monotonic()
+        shares = self.ring.shares()
+        return {
+            "replicas": {name: replica.status(now, shares.get(name)) for name, replica in self.replicas.items()},
+            "in_ring": sorted(self.ring.members),
+            "rebalances": self.rebalances
+        }
+
+    def admin(self, request_line, keep_alive):
+        """GET /_balancer/status; POST y DELETE /_balancer/replicas?url=... para altas y bajas"""
+        method, target, _ = request_line.split(b" ", 2)
+        parts = urlsplit(target.decode("latin-1"))
+        if parts.path == f"{ADMIN_PREFIX}/status" and method == b"GET":
+            return json_response(200, "OK", self.status(), keep_alive)
+        if parts.path == f"{ADMIN_PREFIX}/replicas" and method in (b"POST", b"DELETE"):
+            url = parse_qs(parts.query).get("url", [None])[0]
+            if not url:
+                return json_response(400, "Bad Request", {"success": False, "error": "Falta ?url="}, keep_alive)
+            if method == b"POST":
+                replica = self.add_replica(url)
+                return json_response(202, "Accepted", {"success": True, "replica": replica.name,
+                                                       "message": "Entra al anillo tras su primer /health correcto"},
+                                     keep_alive)
+            replica = self.remove_replica(Replica(url).name)
+            if replica is None:
+                return json_response(404, "Not Found", {"success": False, "error": "Réplica desconocida"}, keep_alive)
+            return json_response(200, "OK", {"success": True, "replica": replica.name}, keep_alive)
+        return json_response(404, "Not Found", {"success": False, "error": "Ruta de administración desconocida"},
+                             keep_alive)
+
+    async def serve(self, host, port):
+        await self.health_round()
+        server = await asyncio.start_server(self.handle_client, host, port, backlog=1024)
+        print(f"⚖️  Balanceador escuchando en http://{host}:{port} | {len(self.ring.members)}/{len(self.replicas)} "
+              f"réplica(s) en el anillo")
+        async with server:
+            health = asyncio.create_task(self.health_loop())
+            try:
+                await server.serve_forever()
+            finally:
+                health.cancel()
+
+def free_port():
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+SPAWN_COMMANDS = {
+    "dev": [sys.executable, "server.py"],
+    # El servidor de desarrollo cierra la conexión tras cada respuesta; gunicorn mantiene el
+    # keep-alive y el pool de conexiones del balanceador se reutiliza
+    "gunicorn": [sys.executable, "-m", "gunicorn", "-c", "gunicorn.conf.py", "server:app"]
+}
+
+def spawn_replicas(count, base_port=0, server="dev"):
+    """Lanzar `count` réplicas (sin debug) en puertos consecutivos o libres"""
+    here = os.path.dirname(os.path.abspath(__file__))
+    processes = []
+    for index in range(count):
+        port = base_port + index if base_port else free_port()
+        env = dict(os.environ, PORT=str(port), RULETA_DEBUG="0", PYTHONUNBUFFERED="1")
+        process = subprocess.Popen(SPAWN_COMMANDS[server], cwd=here, env=env,
+                                   stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        processes.append((f"http://127.0.0.1:{port}", process))
+        print(f"🚀 Réplica {index + 1} lanzada en el puerto {port} (PID {process.pid})")
+    return processes
+
+def main():
+    parser = argparse.ArgumentParser(description='Balanceador por mesa/sesión para réplicas de la Ruleta Virtual')
+    parser.add_argument('--host', default='127.0.0.1', help='Interfaz de escucha')
+    parser.add_argument('--port', type=int, default=int(os.environ.get('PORT', 8000)), help='Puerto de escucha')
+    parser.add_argument('--replica', nargs='+', default=[], metavar='URL', help='Réplicas ya en marcha')
+    parser.add_argument('--spawn', type=int, default=0, help='Lanzar N réplicas de server.py y balancearlas')
+    parser.add_argument('--spawn-base-port', type=int, default=0,
+                       help='Primer puerto de las réplicas lanzadas (0 = libres, asignados por el sistema)')
+    parser.add_argument('--spawn-server', choices=list(SPAWN_COMMANDS), default='dev',
+                       help='Servidor de las réplicas lanzadas (gunicorn permite reutilizar conexiones)')
+    parser.add_argument('--health-interval', type=float, default=2.0, help='Segundos entre rondas de /health')
+    parser.add_argument('--health-timeout', type=float, default=1.0, help='Timeout de cada /health en segundos')
+    parser.add_argument('--unhealthy-after', type=int, default=2,
+                       help='Fallos seguidos de /health para sacar una réplica del anillo')
+    parser.add_argument('--eject-after', type=int, default=5,
+                       help='Fallos seguidos en tráfico real (errores de conexión, timeouts, 5xx) para expulsar')
+    parser.add_argument('--eject-seconds', type=float, default=10.0,
+                       help='Duración de la primera expulsión; se duplica en cada reincidencia')
+    parser.add_argument('--max-idle', type=int, default=32, help='Conexiones keep-alive ociosas por réplica')
+    parser.add_argument('--upstream-timeout', type=float, default=30.0, help='Timeout por request upstream')
+
+    args = parser.parse_args()
+
+    spawned = spawn_replicas(args.spawn, args.spawn_base_port, args.spawn_server) if args.spawn else []
+    urls = args.replica + [url for url, _ in spawned]
+    if not urls:
+        parser.error("indica réplicas con --replica o lánzalas con --spawn")
+
+    balancer = Balancer(urls, args.health_interval, args.health_timeout, args.unhealthy_after,
+                        args.eject_after, args.eject_seconds, args.max_idle, args.upstream_timeout)
+    if spawned:
+        # Las réplicas recién lanzadas tardan en importar Flask: esperar a que respondan
+        deadline = time.monotonic() + 30
+        while time.monotonic() < deadline and not all(
+                asyncio.run(balancer.check_health(balancer.replicas[Replica(url).name])) for url, _ in spawned):
+            time.sleep(0.1)
+
+    # El SIGTERM del harness o de un supervisor debe pasar por el finally que detiene las réplicas
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+    try:
+        if uvloop is not None:
+            uvloop.install()
+        asyncio.run(balancer.serve(args.host, args.port))
+    except (KeyboardInterrupt, SystemExit):
+        print("\n🛑 Balanceador detenido")
+    finally:
+        for _, process in spawned:
+            process.terminate()
+        for _, process in spawned:
+            try:
+                process.wait(timeout=5)
+            except subprocess.TimeoutExpired:
+                process.kill()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,39 @@
+"""
+Configuración de gunicorn para producción: gunicorn -c gunicorn.conf.py server:app
+
+La app se importa una sola vez en el proceso maestro (preload_app) y los workers la heredan
+por fork, así arrancan sin volver a importar Flask y comparten esas páginas de memoria.
+"""
+
+import os
+import signal
+
+bind = f"0.0.0.0:{os.environ.get('PORT', 5000)}"
+preload_app = True
+
+# El estado del juego (historial y garantías de morado/amarillo) vive en memoria de cada
+# worker: con más de un worker cada uno llevaría su propia ruleta. Por eso un solo proceso
+# con hilos; WEB_CONCURRENCY > 1 solo tiene sentido si no importa esa coherencia.
+workers = int(os.environ.get('WEB_CONCURRENCY', 1))
+worker_class = 'gthread'
+threads = int(os.environ.get('RULETA_THREADS', 8))
+
+timeout = 30
+graceful_timeout = 10
+keepalive = 5
+
+accesslog = os.environ.get('RULETA_ACCESS_LOG') or None
+errorlog = '-'
+
+def post_fork(server, worker):
+    # Los hilos del maestro no pasan al worker: relanzar el volcado de la traza de tráfico
+    import server as ruleta
+    if isinstance(ruleta.app.wsgi_app, ruleta.TrafficRecorder):
+        ruleta.app.wsgi_app.start_flusher()
+
+def post_worker_init(worker):
+    # gunicorn reinicia las señales del worker; SIGUSR2 al maestro es su upgrade en caliente,
+    # así que el perfil por señal se pide al PID del worker
+    import server as ruleta
+    if ruleta.PROFILING_ENABLED and hasattr(signal, 'SIGUSR2'):
+        signal.signal(signal.SIGUSR2, ruleta.profile_on_signal)
@@ -1,15 +1,596 @@
-from flask import Flask, jsonify, request, send_from_directory, send_file
+from flask import Blueprint, Flask, current_app, jsonify, request, send_from_directory, send_file, g, Response
 from flask_cors import CORS
+import gc
+import gzip
+import math
 import random
-import json
 from datetime import datetime
 import os
+import sys
+import time
+import signal
+import threading
+import tracemalloc
+import atexit
+from bisect import bisect_left
+from collections import OrderedDict
+from werkzeug.wsgi import ClosingIterator
 
-app = Flask(__name__, static_folder='static', static_url_path='')
-CORS(app)
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+# Rutas y hooks; la aplicación se construye en create_app()
+bp = Blueprint('ruleta', __name__)
+
+class TrafficRecorder:
+    """Middleware WSGI que graba el tráfico entrante en un archivo de traza.
+
+    Cada request se escribe como una línea ``timestamp<TAB>METODO<TAB>ruta`` (epoch en
+    segundos con microsegundos), formato que ``traffic_generator.py --replay``
+    puede reproducir leyendo el archivo en streaming.
+    """
+
+    def __init__(self, wsgi_app, trace_path, flush_interval=1.0):
+        self.wsgi_app = wsgi_app
+        self.trace_file = open(trace_path, 'a', encoding='utf-8', buffering=1024 * 1024)
+        self.flush_interval = flush_interval
+        self.lock = threading.Lock()
+        self.start_flusher()
+        atexit.register(self.close)
+
+    def start_flusher(self):
+        """Volcar a disco periódicamente para no perder la traza si el proceso cae.
+
+        Los hilos no sobreviven a un fork: con gunicorn y preload_app cada worker lo relanza.
+        """
+        threading.Thread(target=self.flush_loop, daemon=True).start()
+
+    def __call__(self, environ, start_response):
+        arrival = time.time()
+        path = environ.get('PATH_INFO', '/')
+        query = environ.get('QUERY_STRING')
+        if query:
+            path = f"{path}?{query}"
+        line = f"{arrival:.6f}\t{environ.get('REQUEST_METHOD', 'GET')}\t{path}\n"
+        
+        with self.lock:
+            # Tras close() la request se atiende igual, sin grabarla
+            if not self.trace_file.closed:
+                self.trace_file.write(line)
+        
+        return self.wsgi_app(environ, start_response)
+
+    def flush_loop(self):
+        while True:
+            time.sleep(self.flush_interval)
+            with self.lock:
+                if self.trace_file.closed:
+                    return
+                self.trace_file.flush()
+
+    def close(self):
+        with self.lock:
+            if not self.trace_file.closed:
+                self.trace_file.close()
+
+class AdmissionController:
+    """Middleware WSGI de control de admisión: rechazar rápido en vez de encolar sin límite.
+
+    Va delante de Flask para que rechazar cueste mucho menos que atender: la respuesta 503/429
+    está precalculada y no pasa por el enrutado ni por jsonify. Las requests en proceso tienen
+    un tope (`max_in_flight`) del que /api/spin y las demás escrituras solo pueden ocupar
+    `1 - reserve`, así que las lecturas baratas siguen entrando con el servidor saturado; /health
+    y /metrics no se limitan nunca. Con `max_queue_ms`, una request que ya esperó más que eso
+    según ``X-Request-Start`` (proxy o cliente) se descarta: atenderla tarde es trabajo perdido.
+    Opcionalmente cada cliente (cabecera X-Client-Id o IP) tiene un token bucket de
+    `client_rate` requests/s; al superarlo recibe 429.
+    """
+
+    EXEMPT_PATHS = ('/health', '/metrics', '/debug/memory')
+    CHEAP_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+    def __init__(self, wsgi_app, max_in_flight=0, reserve=0.25, max_queue_ms=0.0, client_rate=0.0,
+                 client_burst=0.0, max_clients=10000):
+        self.wsgi_app = wsgi_app
+        self.lock = threading.Lock()
+        self.max_in_flight = max_in_flight
+        self.write_limit = max(1, int(max_in_flight * (1 - reserve))) if max_in_flight else 0
+        self.max_queue = max_queue_ms / 1000
+        self.client_rate = client_rate
+        self.client_burst = client_burst or max(1.0, client_rate)
+        self.max_clients = max_clients
+        self.buckets = OrderedDict()    # cliente -> [tokens, último instante], del menos al más reciente
+        self.in_flight = 0
+        self.rejected = {}      # (motivo, clase) -> total
+
+    def __call__(self, environ, start_response):
+        if environ.get('PATH_INFO') in self.EXEMPT_PATHS:
+            return self.wsgi_app(environ, start_response)
+
+        cheap = environ.get('REQUEST_METHOD', 'GET') in self.CHEAP_METHODS
+        rejection = self.admit(environ, cheap)
+        if rejection is not None:
+            status, retry_after, body = rejection
+            start_response(status, [('Content-Type', 'application/json'), ('Content-Length', str(len(body))),
+                                    ('Retry-After', retry_after), ('Access-Control-Allow-Origin', '*')])
+            return [body]
+
+        try:
+            iterable = self.wsgi_app(environ, start_response)
+        except BaseException:
+            self.release()
+            raise
+        # La request sigue en proceso hasta que el servidor termina de enviar la respuesta
+        return ClosingIterator(iterable, self.release)
+
+    def admit(self, environ, cheap):
+        """None si la request entra; si no, (status, Retry-After, cuerpo)"""
+        now = time.monotonic()
+        queued = self.queue_seconds(environ) if self.max_queue else None
+        with self.lock:
+            if queued is not None and queued > self.max_queue:
+                return self.reject('cola', cheap, '503 SERVICE UNAVAILABLE', 1)
+            if self.max_in_flight and self.in_flight >= (self.max_in_flight if cheap else self.write_limit):
+                return self.reject('capacidad', cheap, '503 SERVICE UNAVAILABLE', 1)
+
+            if self.client_rate > 0:
+                client = environ.get('HTTP_X_CLIENT_ID') or environ.get('REMOTE_ADDR')
+                bucket = self.buckets.get(client)
+                if bucket is None:
+                    if len(self.buckets) >= self.max_clients and not self.prune(now):
+                        # Todos los clientes conocidos están limitados: uno nuevo no estrena ráfaga
+                        return self.reject('cliente', cheap, '429 TOO MANY REQUESTS',
+                                           math.ceil(1 / self.client_rate))
+                    bucket = self.buckets[client] = [self.client_burst, now]
+                else:
+                    self.buckets.move_to_end(client)
+                tokens = min(self.client_burst, bucket[0] + (now - bucket[1]) * self.client_rate)
+                bucket[1] = now
+                if tokens < 1:
+                    bucket[0] = tokens
+                    return self.reject('cliente', cheap, '429 TOO MANY REQUESTS',
+                                       math.ceil((1 - tokens) / self.client_rate))
+                bucket[0] = tokens - 1
+
+            self.in_flight += 1
+        return None
+
+    def release(self):
+        with self.lock:
+            self.in_flight -= 1
+
+    def reject(self, reason, cheap, status, retry_after):
+        key = (reason, 'lectura' if cheap else 'escritura')
+        self.rejected[key] = self.rejected.get(key, 0) + 1
+        body = REJECTION_BODIES[reason] % retry_after
+        return status, str(retry_after), body
+
+    @staticmethod
+    def queue_seconds(environ):
+        """Espera desde ``X-Request-Start`` (``t=`` en segundos, ms o µs desde epoch), o None"""
+        header = environ.get('HTTP_X_REQUEST_START')
+        if not header:
+            return None
+        try:
+            start = float(header[2:] if header.startswith('t=') else header)
+        except ValueError:
+            return None
+        if start > 1e14:
+            start /= 1e6
+        elif start > 1e11:
+            start /= 1e3
+        return time.time() - start
+
+    def prune(self, now):
+        """Liberar sitio hasta el 90% de `max_clients`; devuelve False si no se pudo liberar nada.
+
+        Primero se olvidan los buckets ya llenos (volverían a empezar igual) y después los menos
+        recientes que tengan al menos un token. Un cliente agotado nunca se olvida: volvería con
+        la ráfaga completa.
+        """
+        low_water = int(self.max_clients * 0.9)
+        before = len(self.buckets)
+        for full_only in (True, False):
+            evictable = [client for client, (tokens, last) in self.buckets.items()
+                         if tokens + (now - last) * self.client_rate >= (self.client_burst if full_only else 1)]
+            for client in evictable[:max(0, len(self.buckets) - low_water)]:
+                del self.buckets[client]
+            if len(self.buckets) <= low_water:
+                break
+        return len(self.buckets) < before
+
+    def exposition(self):
+        with self.lock:
+            lines = [
+                '# HELP ruleta_admission_in_flight Requests admitidas en proceso (sin /health ni /metrics)',
+                '# TYPE ruleta_admission_in_flight gauge',
+                f'ruleta_admission_in_flight {self.in_flight}',
+                '# HELP ruleta_admission_rejected_total Requests rechazadas antes de llegar a Flask',
+                '# TYPE ruleta_admission_rejected_total counter'
+            ]
+            for (reason, kind), total in sorted(self.rejected.items()):
+                lines.append(f'ruleta_admission_rejected_total{{reason="{reason}",kind="{kind}"}} {total}')
+        return lines
+
+REJECTION_BODIES = {
+    'cola': b'{"success": false, "error": "Servidor saturado", "retry_after": %d}',
+    'capacidad': b'{"success": false, "error": "Servidor saturado", "retry_after": %d}',
+    'cliente': b'{"success": false, "error": "Demasiadas requests de este cliente", "retry_after": %d}'
+}
+
+# Límites superiores (segundos) de los buckets de latencia, estilo Prometheus
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+class LatencyHistogram:
+    """Histograma de buckets fijos: observar es una búsqueda binaria y un incremento"""
+
+    def __init__(self):
+        self.counts = [0] * (len(LATENCY_BUCKETS) + 1)
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, seconds):
+        self.counts[bisect_left(LATENCY_BUCKETS, seconds)] += 1
+        self.total += seconds
+        self.count += 1
+
+    def exposition(self, name, labels):
+        lines = []
+        cumulative = 0
+        for bound, count in zip(LATENCY_BUCKETS + (float('inf'),), self.counts):
+            cumulative += count
+            le = '+Inf' if bound == float('inf') else repr(bound)
+            lines.append(f'{name}_bucket{{{labels},le="{le}"}} {cumulative}')
+        lines.append(f'{name}_sum{{{labels}}} {self.total}')
+        lines.append(f'{name}_count{{{labels}}} {self.count}')
+        return lines
+
+class RequestMetrics:
+    """Métricas de las requests atendidas, expuestas en /metrics (formato Prometheus)"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.requests = {}      # (método, ruta, status) -> total
+        self.latency = {}       # ruta -> LatencyHistogram
+        self.spin_phases = {}   # fase del giro -> LatencyHistogram
+        self.in_flight = 0
+
+    def request_started(self):
+        with self.lock:
+            self.in_flight += 1
+
+    def request_finished(self, method, route, status, seconds):
+        with self.lock:
+            self.in_flight -= 1
+            key = (method, route, status)
+            self.requests[key] = self.requests.get(key, 0) + 1
+            histogram = self.latency.get(route)
+            if histogram is None:
+                histogram = self.latency[route] = LatencyHistogram()
+            histogram.observe(seconds)
+
+    def observe_spin_phase(self, phase, seconds):
+        with self.lock:
+            histogram = self.spin_phases.get(phase)
+            if histogram is None:
+                histogram = self.spin_phases[phase] = LatencyHistogram()
+            histogram.observe(seconds)
+
+    def render(self, extra_gauges=None):
+        with self.lock:
+            lines = [
+                '# HELP ruleta_http_requests_total Requests HTTP atendidas por ruta y status',
+                '# TYPE ruleta_http_requests_total counter'
+            ]
+            for (method, route, status), total in sorted(self.requests.items()):
+                lines.append(f'ruleta_http_requests_total{{method="{method}",route="{route}",status="{status}"}} {total}')
+
+            lines += [
+                '# HELP ruleta_http_requests_in_flight Requests en proceso',
+                '# TYPE ruleta_http_requests_in_flight gauge',
+                f'ruleta_http_requests_in_flight {self.in_flight}',
+                '# HELP ruleta_http_request_duration_seconds Latencia de las requests por ruta',
+                '# TYPE ruleta_http_request_duration_seconds histogram'
+            ]
+            for route, histogram in sorted(self.latency.items()):
+                lines += histogram.exposition('ruleta_http_request_duration_seconds', f'route="{route}"')
+
+            lines += [
+                '# HELP ruleta_spin_phase_duration_seconds Tiempo de cada fase de /api/spin',
+                '# TYPE ruleta_spin_phase_duration_seconds histogram'
+            ]
+            for phase, histogram in sorted(self.spin_phases.items()):
+                lines += histogram.exposition('ruleta_spin_phase_duration_seconds', f'phase="{phase}"')
+
+        for name, (help_text, value) in (extra_gauges or {}).items():
+            lines += [f'# HELP {name} {help_text}', f'# TYPE {name} gauge', f'{name} {value}']
+        return '\n'.join(lines) + '\n'
+
+metrics = RequestMetrics()
+
+class RequestProfiler:
+    """Profiler de las requests seleccionadas, con salida en stacks colapsados (flamegraph).
+
+    En una request seleccionada se instala `sys.setprofile` solo en el hilo que la atiende: cada
+    llamada y retorno (incluidas las funciones en C, como el encoder de JSON) reparte el tiempo
+    propio entre los stacks, con la raíz ``MÉTODO ruta``. Apagado, el coste por request es
+    comprobar `enabled`.
+    """
+
+    def __init__(self, rate=0.0):
+        self.rate = rate
+        self.lock = threading.Lock()
+        self.stacks = {}        # stack colapsado -> microsegundos de tiempo propio
+        self.local = threading.local()
+        self.window_until = 0.0
+        self.enabled = rate > 0
+
+    def request_started(self, label):
+        """Decidir si se perfila la request actual; True si quedó instalado el profiler"""
+        if time.monotonic() >= self.window_until:
+            if self.rate == 0:
+                self.enabled = False  # Terminó la ventana: los hooks vuelven a no hacer nada
+                return False
+            if random.random() >= self.rate:
+                return False
+
+        # La pila actual (hooks de Flask incluidos) se apila primero para que los retornos cuadren
+        names = []
+        frame = sys._getframe()
+        while frame is not None:
+            names.append(self.frame_name(frame.f_code))
+            frame = frame.f_back
+        keys = [label]
+        for name in reversed(names):
+            keys.append(f"{keys[-1]};{name}")
+        self.local.keys = keys
+        self.local.times = {}
+        self.local.last = time.perf_counter()
+        sys.setprofile(self.trace)
+        return True
+
+    def request_finished(self):
+        times = getattr(self.local, 'times', None)
+        if times is None:
+            return
+        sys.setprofile(None)
+        self.local.times = self.local.keys = None
+        with self.lock:
+            for stack, seconds in times.items():
+                self.stacks[stack] = self.stacks.get(stack, 0) + seconds
+
+    @staticmethod
+    def frame_name(code):
+        return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+    def trace(self, frame, event, arg):
+        now = time.perf_counter()
+        local = self.local
+        keys = local.keys
+        if keys is None:
+            return
+        # Tiempo desde el evento anterior: tiempo propio del stack que estaba en la cima
+        top = keys[-1]
+        local.times[top] = local.times.get(top, 0.0) + (now - local.last)
+        if event == 'call':
+            keys.append(f"{top};{self.frame_name(frame.f_code)}")
+        elif event == 'c_call':
+            keys.append(f"{top};{getattr(arg, '__qualname__', getattr(arg, '__name__', 'c'))} (C)")
+        elif len(keys) > 1:
+            keys.pop()  # return, c_return, c_exception
+        local.last = time.perf_counter()
+
+    def start_window(self, seconds):
+        """Perfilar todas las requests durante `seconds` segundos"""
+        self.window_until = time.monotonic() + seconds
+        self.enabled = True
+
+    def collapsed(self, route=None, reset=False):
+        """Stacks en formato colapsado (``raíz;marco;marco muestras``) para flamegraph.pl o speedscope"""
+        with self.lock:
+            stacks = self.stacks
+            if reset:
+                self.stacks = {}
+        # Pesos en microsegundos enteros: el formato colapsado espera cuentas
+        lines = [f"{stack} {round(seconds * 1e6)}" for stack, seconds in sorted(stacks.items(), key=lambda item: -item[1])
+                 if round(seconds * 1e6) > 0 and (route is None or stack.split(';', 1)[0].split(' ', 1)[-1] == route)]
+        return '\n'.join(lines) + '\n' if lines else ''
+
+    def route_totals(self):
+        """Milisegundos perfilados por ruta (la raíz de cada stack)"""
+        totals = {}
+        with self.lock:
+            for stack, seconds in self.stacks.items():
+                label = stack.split(';', 1)[0]
+                totals[label] = totals.get(label, 0) + seconds * 1000
+        return totals
+
+    def dump(self, directory='.'):
+        path = os.path.join(directory, f"profile_{datetime.now().strftime('%Y%m%d_%H%M%S')}.collapsed")
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(self.collapsed(reset=True))
+        print(f"Perfil guardado en {path}")
+        return path
+
+# Profiling opcional: RULETA_PROFILE_RATE=0.01 perfila el 1% de las requests;
+# RULETA_PROFILING=1 habilita /debug/profile y la señal SIGUSR2 (perfil de N segundos)
+PROFILING_ENABLED = os.environ.get('RULETA_PROFILING') == '1'
+PROFILE_SECONDS = float(os.environ.get('RULETA_PROFILE_SECONDS', 10))
+profiler = RequestProfiler(float(os.environ.get('RULETA_PROFILE_RATE', 0)))
+
+def profile_on_signal(signum, frame):
+    """SIGUSR2: perfilar PROFILE_SECONDS segundos y guardar el resultado en profile_<fecha>.collapsed"""
+    profiler.start_window(PROFILE_SECONDS)
+    threading.Timer(PROFILE_SECONDS + 1, profiler.dump).start()
+
+if PROFILING_ENABLED and hasattr(signal, 'SIGUSR2') and threading.current_thread() is threading.main_thread():
+    signal.signal(signal.SIGUSR2, profile_on_signal)
+
+class MemoryInspector:
+    """Foto de la memoria del proceso para pruebas de resistencia: RSS, objetos del GC y tracemalloc"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.previous = None    # snapshot de tracemalloc de la llamada anterior (para diff)
+
+    @staticmethod
+    def rss_bytes():
+        """RSS actual desde /proc (Linux); None si no está disponible"""
+        try:
+            with open('/proc/self/statm', 'r') as f:
+                return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+        except (OSError, ValueError, AttributeError):
+            return None
+
+    def report(self, top=10, diff=False):
+        """Los `top` sitios que más memoria retienen, o los que más crecieron desde la llamada anterior"""
+        report = {
+            "pid": os.getpid(),
+            "rss_bytes": self.rss_bytes(),
+            "gc_objects": len(gc.get_objects()),
+            "gc_counts": list(gc.get_count())
+        }
+        if not tracemalloc.is_tracing():
+            return report
+
+        current, peak = tracemalloc.get_traced_memory()
+        report["tracemalloc"] = {"current_bytes": current, "peak_bytes": peak}
+        if top <= 0:
+            return report
+
+        snapshot = tracemalloc.take_snapshot().filter_traces((tracemalloc.Filter(False, tracemalloc.__file__),))
+        with self.lock:
+            previous, self.previous = self.previous, snapshot
+        if diff and previous is not None:
+            report["top_growth"] = [
+                {"location": str(stat.traceback), "size_bytes": stat.size, "size_diff_bytes": stat.size_diff,
+                 "count_diff": stat.count_diff}
+                for stat in snapshot.compare_to(previous, 'lineno')[:top]
+            ]
+        else:
+            report["top_allocations"] = [
+                {"location": str(stat.traceback), "size_bytes": stat.size, "count": stat.count}
+                for stat in snapshot.statistics('lineno')[:top]
+            ]
+        return report
+
+# Inspección de memoria opcional: RULETA_MEMORY_DEBUG=1 arranca tracemalloc (RULETA_TRACEMALLOC_FRAMES
+# marcos por asignación, 1 por defecto) y habilita GET /debug/memory para soak_test.py
+MEMORY_DEBUG_ENABLED = os.environ.get('RULETA_MEMORY_DEBUG') == '1'
+memory_inspector = MemoryInspector()
+if MEMORY_DEBUG_ENABLED and not tracemalloc.is_tracing():
+    tracemalloc.start(int(os.environ.get('RULETA_TRACEMALLOC_FRAMES', 1)))
+
+@bp.before_app_request
+def start_request_metrics():
+    g.metrics_start = time.perf_counter()
+    metrics.request_started()
+    if profiler.enabled:
+        rule = request.url_rule.rule if request.url_rule else '<sin_ruta>'
+        g.profiled = profiler.request_started(f"{request.method} {rule}")
+
+@bp.teardown_app_request
+def finish_request_metrics(exc):
+    if g.pop('profiled', False):
+        profiler.request_finished()
+    start = g.pop('metrics_start', None)
+    if start is None:
+        return
+    route = request.url_rule.rule if request.url_rule else '<sin_ruta>'
+    status = 500 if exc is not None else g.pop('metrics_status', 500)
+    metrics.request_finished(request.method, route, status, time.perf_counter() - start)
+
+@bp.after_app_request
+def capture_response_status(response):
+    g.metrics_status = response.status_code
+    return response
+
+# Formatos de las respuestas de la API, negociados con Accept / Accept-Encoding
+JSON_TYPE = 'application/json'
+MSGPACK_TYPE = 'application/msgpack'
+COLUMNAR_JSON_TYPE = 'application/vnd.ruleta.columnar+json'
+COLUMNAR_MSGPACK_TYPE = 'application/vnd.ruleta.columnar+msgpack'
+GZIP_MIN_BYTES = int(os.environ.get('RULETA_GZIP_MIN_BYTES', 1024))
+GZIP_LEVEL = int(os.environ.get('RULETA_GZIP_LEVEL', 6))
+
+class EncodedResponseCache:
+    """Cuerpos ya codificados por recurso, válidos mientras no cambie la versión del estado.
+
+    Cada recurso guarda solo su última versión: al primer acceso con una versión nueva se
+    descartan todos sus formatos anteriores.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.entries = {}       # recurso -> (versión, {(tipo, gzip): (cuerpo, comprimido)})
+
+    def get(self, resource, version, key):
+        with self.lock:
+            entry = self.entries.get(resource)
+            if entry is not None and entry[0] == version:
+                return entry[1].get(key)
+        return None
+
+    def put(self, resource, version, key, value):
+        with self.lock:
+            entry = self.entries.get(resource)
+            if entry is None or entry[0] != version:
+                entry = self.entries[resource] = (version, {})
+            entry[1][key] = value
+
+response_cache = EncodedResponseCache()
+
+def plain_json_requested():
+    """Sin gzip ni MessagePack aceptados la negociación no cambia nada: basta con jsonify"""
+    if request.accept_encodings['gzip'] > 0:
+        return False
+    return msgpack is None or request.accept_mimetypes.best_match((JSON_TYPE, MSGPACK_TYPE), default=JSON_TYPE) == JSON_TYPE
+
+def negotiated_response(build, build_columnar=None, resource=None, version=None):
+    """Responder en el formato que pida el cliente.
+
+    `build` (y `build_columnar`, si el recurso tiene disposición columnar) construyen el payload
+    solo si hace falta: con `resource` y `version` el cuerpo codificado se reutiliza mientras el
+    estado no cambie. Sin Accept, o con */*, la respuesta es JSON como siempre; gzip solo se
+    aplica si el cliente lo acepta y el cuerpo supera GZIP_MIN_BYTES.
+    """
+    offered = [JSON_TYPE]
+    if build_columnar is not None:
+        offered.append(COLUMNAR_JSON_TYPE)
+    if msgpack is not None:
+        offered.append(MSGPACK_TYPE)
+        if build_columnar is not None:
+            offered.append(COLUMNAR_MSGPACK_TYPE)
+    mimetype = request.accept_mimetypes.best_match(offered, default=JSON_TYPE)
+    use_gzip = request.accept_encodings['gzip'] > 0
+    key = (mimetype, use_gzip)
+
+    cached = response_cache.get(resource, version, key) if resource is not None else None
+    if cached is None:
+        payload = build_columnar() if mimetype in (COLUMNAR_JSON_TYPE, COLUMNAR_MSGPACK_TYPE) else build()
+        if mimetype in (MSGPACK_TYPE, COLUMNAR_MSGPACK_TYPE):
+            body = msgpack.packb(payload)
+        else:
+            # Separadores compactos, como jsonify fuera de debug
+            body = current_app.json.dumps(payload, separators=(',', ':')).encode('utf-8') + b'\n'
+        compressed = use_gzip and len(body) >= GZIP_MIN_BYTES
+        if compressed:
+            body = gzip.compress(body, compresslevel=GZIP_LEVEL, mtime=0)
+        cached = (body, compressed)
+        if resource is not None:
+            response_cache.put(resource, version, key, cached)
+
+    body, compressed = cached
+    response = Response(body, mimetype=mimetype)
+    if compressed:
+        response.headers['Content-Encoding'] = 'gzip'
+    response.vary.update(('Accept', 'Accept-Encoding'))
+    return response
 
 # Servir archivos estáticos con headers apropiados
-@app.route('/static/<path:filename>')
+@bp.route('/static/<path:filename>')
 def serve_static(filename):
     try:
         return send_from_directory('static', filename, 
@@ -18,7 +599,19 @@ def serve_static(filename):
         print(f"Error sirviendo {filename}: {e}")
         return jsonify({"error": str(e)}), 404
 
+def expected_intervals(probability, pity):
+    """Distribución teórica de giros hasta un color: geométrica truncada por la garantía.
+
+    P(k) = (1-p)^(k-1)·p para k < pity y P(pity) = (1-p)^(pity-1); media (1-(1-p)^pity)/p.
+    """
+    p = probability / 100
+    pmf = [(1 - p) ** (k - 1) * p for k in range(1, pity)] + [(1 - p) ** (pity - 1)]
+    return pmf, (1 - (1 - p) ** pity) / p
+
 class RuletaGame:
+    PURPLE_PITY = 10
+    YELLOW_PITY = 90
+    
     def __init__(self):
         self.results_history = []
         self.spin_count = 0
@@ -29,6 +622,12 @@ class RuletaGame:
             2: {"name": "morado", "probability": 13.0}, 
             3: {"name": "amarillo", "probability": 1.6}
         }
+        # Conteos por color del historial visible, actualizados en cada giro
+        self.window_counts = {"azul": 0, "morado": 0, "amarillo": 0}
+        self.evicted_color = None
+        # Giros entre morados y entre amarillos desde el reinicio (índice = giros - 1)
+        self.intervals = {"morado": [0] * self.PURPLE_PITY, "amarillo": [0] * self.YELLOW_PITY}
+        self.forced = {"morado": 0, "amarillo": 0}
     
     def spin(self):
         self.spin_count += 1
@@ -37,15 +636,17 @@ class RuletaGame:
         spins_since_purple = self.spin_count - self.last_purple_spin
         spins_since_yellow = self.spin_count - self.last_yellow_spin
         
+        forced = True
         # Garantía: morado cada 10 tiros
-        if spins_since_purple >= 10:
+        if spins_since_purple >= self.PURPLE_PITY:
             result = 2  # morado
             self.last_purple_spin = self.spin_count
         # Garantía: amarillo cada 90 tiros
-        elif spins_since_yellow >= 90:
+        elif spins_since_yellow >= self.YELLOW_PITY:
             result = 3  # amarillo
             self.last_yellow_spin = self.spin_count
         else:
+            forced = False
             # Probabilidades normales
             rand = random.uniform(0, 100)
             if rand <= 1.6:
@@ -66,20 +667,34 @@ class RuletaGame:
         }
         
         self.results_history.append(spin_result)
+        self.window_counts[spin_result["color"]] += 1
+        if result == 2:
+            self.record_interval("morado", spins_since_purple, forced)
+        elif result == 3:
+            self.record_interval("amarillo", spins_since_yellow, forced)
         
         # Mantener solo los últimos 100 resultados
+        self.evicted_color = None
         if len(self.results_history) > 100:
-            self.results_history.pop(0)
+            self.evicted_color = self.results_history.pop(0)["color"]
+            self.window_counts[self.evicted_color] -= 1
             
         return spin_result
     
+    def record_interval(self, color, spins, forced):
+        histogram = self.intervals[color]
+        if spins > len(histogram):
+            # El amarillo puede pasar de 90 si coincide con la garantía del morado, que va primero
+            histogram.extend([0] * (spins - len(histogram)))
+        histogram[spins - 1] += 1
+        if forced:
+            self.forced[color] += 1
+    
     def get_statistics(self):
         if not self.results_history:
             return {"total_spins": 0, "color_counts": {}}
         
-        color_counts = {"azul": 0, "morado": 0, "amarillo": 0}
-        for result in self.results_history:
-            color_counts[result["color"]] += 1
+        color_counts = dict(self.window_counts)
         
         total = len(self.results_history)
         percentages = {
@@ -95,38 +710,127 @@ class RuletaGame:
             "spins_since_last_purple": self.spin_count - self.last_purple_spin,
             "spins_since_last_yellow": self.spin_count - self.last_yellow_spin
         }
+    
+    def statistics_delta(self, spin_result):
+        """Cambio que produjo el último giro: el cliente suma `color_counts` a los conteos que ya tiene"""
+        counts = {spin_result["color"]: 1}
+        if self.evicted_color is not None:
+            counts[self.evicted_color] = counts.get(self.evicted_color, 0) - 1
+        return {
+            "total_spins": self.spin_count,
+            "results_shown": len(self.results_history),
+            "color_counts": {color: change for color, change in counts.items() if change},
+            "spins_since_last_purple": self.spin_count - self.last_purple_spin,
+            "spins_since_last_yellow": self.spin_count - self.last_yellow_spin
+        }
+    
+    def interval_statistics(self, bucket=None):
+        """Histogramas de giros entre morados y entre amarillos con la distribución esperada"""
+        pities = {"morado": self.PURPLE_PITY, "amarillo": self.YELLOW_PITY}
+        probabilities = {info["name"]: info["probability"] for info in self.colors.values()}
+        # Fracción de giros forzados por cada garantía, P(pity) / media: en ellos no se tiran los
+        # dados, así que la probabilidad efectiva del otro color baja en esa proporción
+        forced_share = {}
+        for color, pity in pities.items():
+            pmf, mean = expected_intervals(probabilities[color], pity)
+            forced_share[color] = pmf[-1] / mean
+        report = {}
+        for color, other, default_width in (("morado", "amarillo", 1), ("amarillo", "morado", 10)):
+            histogram = self.intervals[color]
+            pity = pities[color]
+            width = bucket or default_width
+            count = sum(histogram)
+            pmf, expected_mean = expected_intervals(probabilities[color] * (1 - forced_share[other]), pity)
+            buckets = []
+            for start in range(1, len(histogram) + 1, width):
+                end = min(start + width - 1, len(histogram))
+                observed = sum(histogram[start - 1:end])
+                buckets.append({
+                    "from": start,
+                    "to": end,
+                    "count": observed,
+                    "percent": round(observed / count * 100, 2) if count else 0,
+                    "expected_percent": round(sum(pmf[start - 1:min(end, pity)]) * 100, 2)
+                })
+            report[color] = {
+                "pity": pity,
+                "count": count,
+                "forced": self.forced[color],
+                "mean": round(sum(spins * n for spins, n in enumerate(histogram, 1)) / count, 2) if count else None,
+                "expected_mean": round(expected_mean, 2),
+                "buckets": buckets
+            }
+        return report
 
 # Instancia global del juego
 game = RuletaGame()
 
-@app.route('/')
+@bp.route('/')
 def serve_frontend():
     """Servir el frontend"""
     return send_file('static/index.html')
 
-@app.route('/api/spin', methods=['POST'])
+SPIN_SHAPES = ('full', 'delta', 'result')
+
+@bp.route('/api/spin', methods=['POST'])
 def spin_roulette():
-    """Realizar un giro de la ruleta"""
+    """Realizar un giro de la ruleta.
+
+    `?shape=full` (por defecto) incluye las estadísticas completas, `delta` solo lo que cambió
+    con este giro y `result` únicamente el resultado.
+    """
+    shape = request.args.get('shape', 'full')
+    if shape not in SPIN_SHAPES:
+        return jsonify({"success": False, "error": f"shape debe ser uno de: {', '.join(SPIN_SHAPES)}"}), 400
     try:
+        phase_start = time.perf_counter()
         result = game.spin()
-        return jsonify({
-            "success": True,
-            "result": result,
-            "statistics": game.get_statistics()
-        })
+        statistics_start = time.perf_counter()
+        payload = {"success": True, "result": result}
+        if shape == 'full':
+            payload["statistics"] = game.get_statistics()
+        elif shape == 'delta':
+            payload["statistics_delta"] = game.statistics_delta(result)
+        serialize_start = time.perf_counter()
+        # La forma por defecto responde como siempre; las reducidas admiten MessagePack y gzip
+        if shape == 'full' or plain_json_requested():
+            response = jsonify(payload)
+        else:
+            response = negotiated_response(lambda: payload)
+        serialize_end = time.perf_counter()
+        
+        metrics.observe_spin_phase("spin", statistics_start - phase_start)
+        metrics.observe_spin_phase("statistics", serialize_start - statistics_start)
+        metrics.observe_spin_phase("serialize", serialize_end - serialize_start)
+        return response
     except Exception as e:
         return jsonify({"success": False, "error": str(e)}), 500
 
-@app.route('/api/history', methods=['GET'])
+@bp.route('/api/history', methods=['GET'])
 def get_history():
-    """Obtener historial de resultados"""
-    return jsonify({
+    """Obtener historial de resultados (columnar con Accept: application/vnd.ruleta.columnar+json)"""
+    current = game
+    return negotiated_response(lambda: {
         "success": True,
-        "history": game.results_history,
-        "statistics": game.get_statistics()
-    })
+        "history": current.results_history,
+        "statistics": current.get_statistics()
+    }, lambda: history_columnar(current), 'history', (current, current.spin_count))
+
+def history_columnar(current):
+    """Historial como una lista por campo; el color se deduce de `result` con `colors`"""
+    history = current.results_history
+    return {
+        "success": True,
+        "colors": {str(key): color["name"] for key, color in current.colors.items()},
+        "history": {
+            "spin_number": [spin["spin_number"] for spin in history],
+            "result": [spin["result"] for spin in history],
+            "timestamp": [spin["timestamp"] for spin in history]
+        },
+        "statistics": current.get_statistics()
+    }
 
-@app.route('/api/reset', methods=['POST'])
+@bp.route('/api/reset', methods=['POST'])
 def reset_game():
     """Reiniciar el juego"""
     global game
@@ -136,23 +840,40 @@ def reset_game():
         "message": "Juego reiniciado"
     })
 
-@app.route('/api/statistics', methods=['GET'])
+@bp.route('/api/statistics', methods=['GET'])
 def get_statistics():
     """Obtener estadísticas del juego"""
-    return jsonify({
+    current = game
+    return negotiated_response(lambda: {
         "success": True,
-        "statistics": game.get_statistics()
-    })
+        "statistics": current.get_statistics()
+    }, resource='statistics', version=(current, current.spin_count))
+
+@bp.route('/api/statistics/intervals', methods=['GET'])
+def get_interval_statistics():
+    """Histogramas de giros entre morados y entre amarillos (`?bucket=N` agrupa de a N giros)"""
+    bucket = request.args.get('bucket', type=int)
+    if bucket is not None and not 1 <= bucket <= RuletaGame.YELLOW_PITY:
+        return jsonify({"success": False, "error": f"bucket debe estar entre 1 y {RuletaGame.YELLOW_PITY}"}), 400
+    current = game
+    # Una entrada por ancho de bucket (a lo sumo YELLOW_PITY + 1): alternar anchos no la reconstruye
+    return negotiated_response(lambda: {
+        "success": True,
+        "total_spins": current.spin_count,
+        "intervals": current.interval_statistics(bucket)
+    }, resource=('intervals', bucket), version=(current, current.spin_count))
 
-@app.route('/api/colors', methods=['GET'])
+@bp.route('/api/colors', methods=['GET'])
 def get_colors():
     """Obtener información de colores y probabilidades"""
-    return jsonify({
+    current = game
+    # Claves como texto también en MessagePack, igual que en JSON
+    return negotiated_response(lambda: {
         "success": True,
-        "colors": game.colors
-    })
+        "colors": {str(key): color for key, color in current.colors.items()}
+    }, resource='colors', version=current)
 
-@app.route('/health', methods=['GET'])
+@bp.route('/health', methods=['GET'])
 def health_check():
     """Health check endpoint"""
     return jsonify({
@@ -162,10 +883,94 @@ def health_check():
             "POST /api/spin": "Girar la ruleta",
             "GET /api/history": "Obtener historial",
             "GET /api/statistics": "Obtener estadísticas",
+            "GET /api/statistics/intervals": "Histogramas de giros entre morados y entre amarillos",
             "POST /api/reset": "Reiniciar juego",
-            "GET /api/colors": "Obtener información de colores"
+            "GET /api/colors": "Obtener información de colores",
+            "GET /metrics": "Métricas del servidor (formato Prometheus)"
         }
     })
 
+@bp.route('/metrics', methods=['GET'])
+def get_metrics():
+    """Métricas del servidor en formato de texto Prometheus"""
+    body = metrics.render({
+        "ruleta_game_spins": ("Giros realizados desde el último reinicio", game.spin_count),
+        "ruleta_game_history_size": ("Resultados guardados en el historial", len(game.results_history))
+    })
+    admission = current_app.extensions.get('ruleta_admission')
+    if admission is not None:
+        body += '\n'.join(admission.exposition()) + '\n'
+    return Response(body, mimetype='text/plain; version=0.0.4')
+
+if PROFILING_ENABLED:
+    @bp.route('/debug/profile', methods=['POST'])
+    def start_profile():
+        """Perfilar todas las requests durante ?seconds=N segundos (máximo 300)"""
+        seconds = request.args.get('seconds', type=float) if 'seconds' in request.args else PROFILE_SECONDS
+        if seconds is None or not seconds > 0:
+            return jsonify({"success": False, "error": "seconds debe ser un número positivo"}), 400
+        seconds = min(300.0, seconds)
+        profiler.start_window(seconds)
+        return jsonify({
+            "success": True,
+            "seconds": seconds,
+            "message": f"Perfilando durante {seconds:.0f}s; resultado en GET /debug/profile"
+        })
+
+    @bp.route('/debug/profile', methods=['GET'])
+    def get_profile():
+        """Stacks colapsados (?route=/api/spin filtra una ruta, ?reset=1 vacía tras leer, ?format=json resume por ruta)"""
+        if request.args.get('format') == 'json':
+            return jsonify({"success": True, "routes_ms": profiler.route_totals()})
+        body = profiler.collapsed(request.args.get('route'), request.args.get('reset') == '1')
+        return Response(body, mimetype='text/plain')
+
+if MEMORY_DEBUG_ENABLED:
+    @bp.route('/debug/memory', methods=['GET'])
+    def get_memory():
+        """RSS, tracemalloc y tamaño de las estructuras en memoria (?top=N sitios, ?diff=1 crecimiento desde la llamada anterior)"""
+        top = request.args.get('top', type=int) if 'top' in request.args else 10
+        if top is None or top < 1:
+            return jsonify({"success": False, "error": "top debe ser un entero positivo"}), 400
+        report = memory_inspector.report(top, request.args.get('diff') == '1')
+        admission = current_app.extensions.get('ruleta_admission')
+        report["structures"] = {
+            "results_history": len(game.results_history),
+            "spin_count": game.spin_count,
+            "metrics_request_series": len(metrics.requests),
+            "metrics_latency_series": len(metrics.latency),
+            "profiler_stacks": len(profiler.stacks),
+            "response_cache_resources": len(response_cache.entries),
+            "admission_client_buckets": len(admission.buckets) if admission is not None else 0
+        }
+        return jsonify({"success": True, **report})
+
+def create_app():
+    """Construir la aplicación Flask: CORS, grabación de tráfico opcional y las rutas del blueprint"""
+    app = Flask(__name__, static_folder='static', static_url_path='')
+    CORS(app)
+    # Admisión opcional: RULETA_MAX_IN_FLIGHT=16 (RULETA_WRITE_RESERVE deja esa fracción para
+    # lecturas), RULETA_MAX_QUEUE_MS=500 y RULETA_CLIENT_RATE=20 / RULETA_CLIENT_BURST=40 por cliente
+    admission_settings = {
+        "max_in_flight": int(os.environ.get('RULETA_MAX_IN_FLIGHT', 0)),
+        "reserve": float(os.environ.get('RULETA_WRITE_RESERVE', 0.25)),
+        "max_queue_ms": float(os.environ.get('RULETA_MAX_QUEUE_MS', 0)),
+        "client_rate": float(os.environ.get('RULETA_CLIENT_RATE', 0)),
+        "client_burst": float(os.environ.get('RULETA_CLIENT_BURST', 0))
+    }
+    if admission_settings["max_in_flight"] or admission_settings["max_queue_ms"] or admission_settings["client_rate"]:
+        app.wsgi_app = AdmissionController(app.wsgi_app, **admission_settings)
+        app.extensions['ruleta_admission'] = app.wsgi_app
+    # Grabación de tráfico opcional (por fuera: también graba lo rechazado): RULETA_TRACE_FILE=/ruta/traza.tsv
+    if os.environ.get('RULETA_TRACE_FILE'):
+        app.wsgi_app = TrafficRecorder(app.wsgi_app, os.environ['RULETA_TRACE_FILE'])
+    app.register_blueprint(bp)
+    return app
+
+# Instancia para `python server.py` y para gunicorn (server:app, cargada antes del fork con preload_app)
+app = create_app()
+
 if __name__ == '__main__':
-    app.run(debug=True, host='0.0.0.0', port=5000)
+    # PORT y RULETA_DEBUG=0 permiten lanzarlo en otro puerto y sin el reloader (bench_harness.py)
+    app.run(debug=os.environ.get('RULETA_DEBUG', '1') == '1', host='0.0.0.0',
+            port=int(os.environ.get('PORT', 5000)), threaded=True)
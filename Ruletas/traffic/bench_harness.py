@@ -0,0 +1,405 @@
+"""
+Matriz de benchmarks de extremo a extremo: servidor × escenario en un solo comando
+Arranca cada servidor en un subproceso con un puerto libre, espera a que responda, ejecuta el
+escenario, mide los recursos del servidor, lo detiene y escribe un reporte consolidado
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import signal
+import socket
+import statistics
+import subprocess
+import sys
+import threading
+import time
+from datetime import datetime
+
+import requests
+
+from raw_http import RawHTTPEngine
+from simple_traffic import SimpleTrafficGenerator
+from traffic_generator import TrafficGenerator
+from resource_sampler import ProcessSampler
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+REPO_ROOT = os.path.dirname(ROOT)
+
+# Cómo arrancar cada servidor; `ready` es la ruta que indica que ya atiende requests
+SERVERS = {
+    "ruletas-dev": {
+        "description": "Ruletas/server.py con el servidor de desarrollo de Flask (debug y reloader)",
+        "command": [sys.executable, "server.py"],
+        "cwd": ROOT,
+        "env": {"RULETA_DEBUG": "1"},
+        "ready": "/health",
+        "hot_path": ("POST", "/api/spin"),
+        "game_api": True
+    },
+    "ruletas-threaded": {
+        "description": "Ruletas/server.py con el servidor de Werkzeug multihilo, sin debug",
+        "command": [sys.executable, "server.py"],
+        "cwd": ROOT,
+        "env": {"RULETA_DEBUG": "0"},
+        "ready": "/health",
+        "hot_path": ("POST", "/api/spin"),
+        "game_api": True
+    },
+    "ruletas-prod": {
+        "description": "Ruletas/server.py con gunicorn (gthread, app precargada; gunicorn.conf.py)",
+        "command": [sys.executable, "-m", "gunicorn", "-c", "gunicorn.conf.py", "server:app"],
+        "cwd": ROOT,
+        "env": {},
+        "ready": "/health",
+        "hot_path": ("POST", "/api/spin"),
+        "game_api": True
+    },
+    "ruletas-balanced": {
+        "description": "balancer.py delante de 2 réplicas con gunicorn (hashing por mesa, conexiones reutilizadas)",
+        "command": [sys.executable, "balancer.py", "--spawn", "2", "--spawn-server", "gunicorn"],
+        "cwd": ROOT,
+        "env": {},
+        "ready": "/health",
+        "hot_path": ("POST", "/api/spin"),
+        "game_api": True,
+        # Sin mesas todo el tráfico local tendría la misma clave y caería en una sola réplica
+        "tables": 16
+    },
+    "prueba2": {
+        "description": "Prueba_2/server.py (http.server, un hilo)",
+        "command": [sys.executable, "server.py"],
+        "cwd": os.path.join(REPO_ROOT, "Prueba_2"),
+        "env": {},
+        "ready": "/api/saludo",
+        "hot_path": ("GET", "/api/contador"),
+        "game_api": False
+    }
+}
+
+SCENARIOS = ["raw", "async-low", "async-medium", "async-high", "async-extreme",
+             "simple-low", "simple-medium", "simple-high", "simple-extreme"]
+
+def free_port():
+    """Puerto libre asignado por el sistema"""
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+class ServerProcess:
+    """Un servidor en su propio grupo de procesos (el reloader de Flask lanza un hijo)"""
+
+    def __init__(self, name, spec, log_path, startup_timeout=30):
+        self.name = name
+        self.spec = spec
+        self.port = free_port()
+        self.base_url = f"http://127.0.0.1:{self.port}"
+        self.log_path = log_path
+        self.startup_timeout = startup_timeout
+        self.process = None
+        self.log = None
+        self.startup_seconds = None
+
+    def start(self):
+        """Lanzar el servidor y esperar a la primera respuesta 200 de la ruta de `ready`"""
+        env = dict(os.environ, PORT=str(self.port), PYTHONUNBUFFERED="1", **self.spec["env"])
+        self.log = open(self.log_path, "w", encoding="utf-8")
+        started = time.perf_counter()
+        kwargs = {"start_new_session": True} if os.name != "nt" else {}
+        self.process = subprocess.Popen(self.spec["command"], cwd=self.spec["cwd"], env=env,
+                                        stdout=self.log, stderr=subprocess.STDOUT, **kwargs)
+
+        deadline = started + self.startup_timeout
+        while time.perf_counter() < deadline:
+            if self.process.poll() is not None:
+                raise RuntimeError(f"{self.name} terminó al arrancar (código {self.process.returncode}), "
+                                   f"ver {self.log_path}")
+            try:
+                if requests.get(f"{self.base_url}{self.spec['ready']}", timeout=1).status_code == 200:
+                    self.startup_seconds = time.perf_counter() - started
+                    return self
+            except requests.RequestException:
+                pass
+            time.sleep(0.05)
+        raise RuntimeError(f"{self.name} no respondió en {self.startup_timeout}s, ver {self.log_path}")
+
+    def stop(self):
+        if self.process is not None and self.process.poll() is None:
+            try:
+                if os.name != "nt":
+                    os.killpg(self.process.pid, signal.SIGTERM)
+                else:
+                    self.process.terminate()
+                self.process.wait(timeout=5)
+            except (ProcessLookupError, subprocess.TimeoutExpired):
+                if os.name != "nt":
+                    try:
+                        os.killpg(self.process.pid, signal.SIGKILL)
+                    except ProcessLookupError:
+                        pass
+                else:
+                    self.process.kill()
+                self.process.wait()
+        if self.log is not None:
+            self.log.close()
+
+class ResourceCollector:
+    """Muestrea CPU, RSS, hilos y descriptores del servidor (y sus hijos) mientras dura el escenario"""
+
+    def __init__(self, pid, interval=0.5):
+        self.sampler = ProcessSampler(pid)
+        self.interval = interval
+        self.samples = []
+        self.stop_event = threading.Event()
+        self.thread = threading.Thread(target=self.run, daemon=True)
+
+    def run(self):
+        self.sampler.sample()  # Referencia de los contadores de CPU
+        while not self.stop_event.wait(self.interval):
+            try:
+                self.samples.append(self.sampler.sample())
+            except Exception:
+                return  # El proceso terminó
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.stop_event.set()
+        self.thread.join()
+
+    def summary(self):
+        cpu = [s["cpu_percent"] for s in self.samples if s["cpu_percent"] is not None]
+        return {
+            "samples": len(self.samples),
+            "cpu_percent_avg": sum(cpu) / len(cpu) if cpu else None,
+            "cpu_percent_max": max(cpu) if cpu else None,
+            "rss_mb_max": max((s["rss_mb"] for s in self.samples), default=None),
+            "threads_max": max((s["threads"] for s in self.samples), default=None),
+            "open_fds_max": max((s["open_fds"] for s in self.samples), default=None),
+            "ctx_switches_voluntary": sum(s["ctx_switches_voluntary"] for s in self.samples),
+            "ctx_switches_involuntary": sum(s["ctx_switches_involuntary"] for s in self.samples)
+        }
+
+def run_scenario(scenario, server, spec, args):
+    """Ejecutar un escenario contra el servidor; devuelve stats y latencias del generador"""
+    if scenario == "raw":
+        method, path = spec["hot_path"]
+        engine = RawHTTPEngine(server.base_url, args.connections)
+        started = time.perf_counter()
+        asyncio.run(engine.run(method, path, args.duration))
+        return engine.stats, time.perf_counter() - started, engine.latency_percentiles()
+
+    engine, level = scenario.split("-", 1)
+    if engine == "async":
+        generator = TrafficGenerator(server.base_url, tables=spec.get("tables", 0))
+        asyncio.run(generator.run_traffic_test(level, args.duration))
+    else:
+        generator = SimpleTrafficGenerator(server.base_url, tables=spec.get("tables", 0))
+        generator.run_traffic_test(level, args.duration)
+    elapsed = (generator.stats["end_time"] - generator.stats["start_time"]).total_seconds()
+    return generator.stats, elapsed, generator.latency_percentiles()
+
+def run_cell(server_name, scenario, args, output_dir):
+    """Una celda de la matriz: arrancar, cargar, medir y detener"""
+    spec = SERVERS[server_name]
+    if scenario != "raw" and not spec["game_api"]:
+        return {"server": server_name, "scenario": scenario, "skipped": "el servidor no expone la API del juego"}
+
+    log_path = os.path.join(output_dir, f"server_{server_name}_{scenario}.log")
+    server = ServerProcess(server_name, spec, log_path, args.startup_timeout)
+    cell = {"server": server_name, "scenario": scenario}
+    try:
+        server.start()
+        cell["startup_seconds"] = server.startup_seconds
+        print(f"   🟢 {server_name} listo en {server.base_url} ({server.startup_seconds * 1000:.0f}ms)")
+
+        collector = ResourceCollector(server.process.pid) if psutil is not None else None
+        if collector is not None:
+            with collector:
+                stats, elapsed, percentiles = run_scenario(scenario, server, spec, args)
+            cell["resources"] = collector.summary()
+        else:
+            stats, elapsed, percentiles = run_scenario(scenario, server, spec, args)
+
+        total = stats["total_requests"]
+        cell.update({
+            "duration": elapsed,
+            "total_requests": total,
+            "successful_requests": stats["successful_requests"],
+            "failed_requests": stats["failed_requests"],
+            "requests_per_second": total / elapsed if elapsed > 0 else 0,
+            "success_rate": stats["successful_requests"] / total * 100 if total else 0,
+            "latency_percentiles_ms": percentiles
+        })
+    except Exception as e:
+        cell["error"] = str(e)
+        print(f"   ❌ {server_name} / {scenario}: {e}")
+    finally:
+        server.stop()
+    return cell
+
+def process_memory(pid):
+    """RSS y PSS (MB) del servidor y sus hijos; PSS reparte las páginas compartidas tras el fork"""
+    processes = [psutil.Process(pid)]
+    processes += processes[0].children(recursive=True)
+    rss = pss = 0
+    for process in processes:
+        try:
+            info = process.memory_full_info()
+        except (psutil.NoSuchProcess, psutil.AccessDenied):
+            continue
+        rss += info.rss
+        pss += getattr(info, "pss", info.rss)
+    return {"processes": len(processes), "rss_mb": rss / 1024 / 1024, "pss_mb": pss / 1024 / 1024}
+
+def measure_startup(server_name, boots, args, output_dir):
+    """Arrancar y detener el servidor `boots` veces: tiempo hasta el primer 200 y memoria en reposo"""
+    spec = SERVERS[server_name]
+    samples = []
+    memory = None
+    for boot in range(boots):
+        log_path = os.path.join(output_dir, f"server_{server_name}_boot{boot}.log")
+        server = ServerProcess(server_name, spec, log_path, args.startup_timeout)
+        try:
+            server.start()
+            samples.append(server.startup_seconds)
+            if psutil is not None and memory is None:
+                memory = process_memory(server.process.pid)
+        except Exception as e:
+            print(f"   ❌ {server_name}: {e}")
+            return {"server": server_name, "error": str(e)}
+        finally:
+            server.stop()
+
+    samples.sort()
+    result = {
+        "server": server_name,
+        "boots": boots,
+        "startup_ms_median": statistics.median(samples) * 1000,
+        "startup_ms_min": samples[0] * 1000,
+        "startup_ms_max": samples[-1] * 1000,
+        "memory": memory
+    }
+    print(f"   🟢 {server_name}: mediana {result['startup_ms_median']:.0f}ms "
+          f"(min {result['startup_ms_min']:.0f}, max {result['startup_ms_max']:.0f})")
+    return result
+
+def print_startup(results):
+    print("\n" + "=" * 90)
+    print("🚀 ARRANQUE EN FRÍO (lanzamiento del proceso → primer 200)")
+    print("=" * 90)
+    print(f"{'Servidor':<18} {'Arranques':>9} {'Mediana':>9} {'Mín':>8} {'Máx':>8} {'Procesos':>9} {'RSS':>9} {'PSS':>9}")
+    print("-" * 90)
+    for result in results:
+        if "error" in result:
+            print(f"{result['server']:<18} ❌ {result['error']}")
+            continue
+        memory = result["memory"]
+        memory_columns = (f"{memory['processes']:>9} {memory['rss_mb']:7.1f}MB {memory['pss_mb']:7.1f}MB"
+                          if memory else f"{'-':>9} {'-':>9} {'-':>9}")
+        print(f"{result['server']:<18} {result['boots']:>9} {result['startup_ms_median']:7.0f}ms "
+              f"{result['startup_ms_min']:6.0f}ms {result['startup_ms_max']:6.0f}ms {memory_columns}")
+    print("=" * 90)
+
+def print_matrix(cells):
+    print("\n" + "=" * 110)
+    print("📊 MATRIZ SERVIDOR × ESCENARIO")
+    print("=" * 110)
+    print(f"{'Servidor':<18} {'Escenario':<15} {'Arranque':>9} {'RPS':>9} {'Éxito':>7} {'P50':>9} {'P95':>9} "
+          f"{'P99':>9} {'CPU':>7} {'RSS':>8}")
+    print("-" * 110)
+    for cell in cells:
+        prefix = f"{cell['server']:<18} {cell['scenario']:<15}"
+        if "skipped" in cell:
+            print(f"{prefix} ⏭️  {cell['skipped']}")
+            continue
+        if "error" in cell:
+            print(f"{prefix} ❌ {cell['error']}")
+            continue
+        percentiles = cell["latency_percentiles_ms"]
+        resources = cell.get("resources") or {}
+        cpu = resources.get("cpu_percent_avg")
+        rss = resources.get("rss_mb_max")
+        print(f"{prefix} {cell['startup_seconds'] * 1000:7.0f}ms {cell['requests_per_second']:9.1f} "
+              f"{cell['success_rate']:6.1f}% {percentiles['p50']:7.2f}ms {percentiles['p95']:7.2f}ms "
+              f"{percentiles['p99']:7.2f}ms {f'{cpu:6.1f}%' if cpu is not None else '      -'} "
+              f"{f'{rss:6.1f}MB' if rss is not None else '       -'}")
+    print("=" * 110)
+
+def main():
+    parser = argparse.ArgumentParser(description='Matriz de benchmarks servidor × escenario en puertos efímeros')
+    parser.add_argument('--servers', nargs='+', choices=list(SERVERS), default=list(SERVERS),
+                       help='Servidores a probar')
+    parser.add_argument('--scenarios', nargs='+', choices=SCENARIOS, default=['raw'],
+                       help='raw: bucle cerrado sobre la ruta caliente; async-*/simple-*: niveles de los generadores')
+    parser.add_argument('--duration', type=int, default=10, help='Duración de cada escenario en segundos')
+    parser.add_argument('--connections', type=int, default=20, help='Conexiones del escenario raw')
+    parser.add_argument('--startup-timeout', type=float, default=30, help='Espera máxima al arranque del servidor')
+    parser.add_argument('--boots', type=int, default=0,
+                       help='Solo medir el arranque: lanzar cada servidor N veces (sin escenarios)')
+    parser.add_argument('--output-dir', default=None,
+                       help='Directorio del reporte y los logs de los servidores (por defecto bench_<fecha>)')
+
+    args = parser.parse_args()
+
+    output_dir = args.output_dir or f"bench_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+    os.makedirs(output_dir, exist_ok=True)
+    output_dir = os.path.abspath(output_dir)
+    if psutil is None:
+        print("⚠️  psutil no detectado - no se medirán los recursos del servidor")
+
+    if args.boots > 0:
+        print("🚀 ARRANQUE EN FRÍO - RULETA VIRTUAL")
+        print(f"🖥️  Servidores: {', '.join(args.servers)} ({args.boots} arranques cada uno)")
+        results = []
+        for server_name in args.servers:
+            print(f"\n▶️  {server_name}")
+            results.append(measure_startup(server_name, args.boots, args, output_dir))
+        print_startup(results)
+        report_path = os.path.join(output_dir, "startup_report.json")
+        with open(report_path, "w", encoding="utf-8") as f:
+            json.dump({"timestamp": datetime.now().isoformat(), "results": results}, f, indent=2, ensure_ascii=False)
+        print(f"📁 Reporte de arranque: {report_path}")
+        return
+
+    print("🧪 MATRIZ DE BENCHMARKS - RULETA VIRTUAL")
+    print(f"🖥️  Servidores: {', '.join(args.servers)}")
+    print(f"🎯 Escenarios: {', '.join(args.scenarios)} ({args.duration}s cada uno)")
+    print(f"📁 Resultados en: {output_dir}")
+
+    cells = []
+    # Los generadores escriben sus propios archivos en el directorio actual
+    previous_cwd = os.getcwd()
+    os.chdir(output_dir)
+    try:
+        for server_name in args.servers:
+            for scenario in args.scenarios:
+                print(f"\n▶️  {server_name} / {scenario}")
+                cells.append(run_cell(server_name, scenario, args, output_dir))
+    finally:
+        os.chdir(previous_cwd)
+
+    print_matrix(cells)
+
+    report = {
+        "timestamp": datetime.now().isoformat(),
+        "duration_per_scenario": args.duration,
+        "connections": args.connections,
+        "servers": {name: SERVERS[name]["description"] for name in args.servers},
+        "results": cells
+    }
+    report_path = os.path.join(output_dir, "bench_report.json")
+    with open(report_path, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+    print(f"📁 Reporte consolidado: {report_path}")
+
+if __name__ == "__main__":
+    main()
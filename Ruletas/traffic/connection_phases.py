@@ -0,0 +1,151 @@
+"""
+Desglose por fases de cada request del generador async (aiohttp request tracing)
+Espera en el pool, DNS, conexión TCP, tiempo hasta el primer byte y transferencia del cuerpo,
+más la tasa de reutilización de conexiones del TCPConnector
+"""
+
+import time
+from array import array
+
+import aiohttp
+
+PHASES = ("queue", "dns", "connect", "ttfb", "transfer")
+
+PHASE_LABELS = {
+    "queue": "Espera en el pool",
+    "dns": "DNS",
+    "connect": "Conexión TCP",
+    "ttfb": "Primer byte (TTFB)",
+    "transfer": "Transferencia"
+}
+
+class RequestPhases:
+    """Marcas de tiempo de una request (se pasa como trace_request_ctx)"""
+    __slots__ = ("start", "queued", "queue", "dns_start", "dns", "create_start",
+                 "connect", "acquired", "sent", "headers")
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.queued = self.dns_start = self.create_start = None
+        self.acquired = self.sent = self.headers = None
+        self.queue = self.dns = self.connect = 0.0
+
+class ConnectionPhaseTracer:
+    def __init__(self):
+        self.samples = {phase: array('d') for phase in PHASES}
+        self.new_connections = 0
+        self.reused_connections = 0
+
+    def new_request(self):
+        return RequestPhases()
+
+    def trace_config(self):
+        """TraceConfig de aiohttp con los callbacks de cada fase"""
+        config = aiohttp.TraceConfig()
+        config.on_connection_queued_start.append(self.on_queued_start)
+        config.on_connection_queued_end.append(self.on_queued_end)
+        config.on_dns_resolvehost_start.append(self.on_dns_start)
+        config.on_dns_resolvehost_end.append(self.on_dns_end)
+        config.on_connection_create_start.append(self.on_create_start)
+        config.on_connection_create_end.append(self.on_create_end)
+        config.on_connection_reuseconn.append(self.on_reuseconn)
+        config.on_request_headers_sent.append(self.on_headers_sent)
+        config.on_request_end.append(self.on_request_end)
+        return config
+
+    # Los callbacks reciben el RequestPhases en trace_config_ctx.trace_request_ctx;
+    # las requests lanzadas sin contexto se ignoran
+
+    async def on_queued_start(self, session, ctx, params):
+        phases = ctx.trace_request_ctx
+        if phases is not None:
+            phases.queued = time.perf_counter()
+
+    async def on_queued_end(self, session, ctx, params):
+        phases = ctx.trace_request_ctx
+        if phases is not None and phases.queued is not None:
+            phases.queue += time.perf_counter() - phases.queued
+
+    async def on_dns_start(self, session, ctx, params):
+        phases = ctx.trace_request_ctx
+        if phases is not None:
+            phases.dns_start = time.perf_counter()
+
+    async def on_dns_end(self, session, ctx, params):
+        phases = ctx.trace_request_ctx
+        if phases is not None and phases.dns_start is not None:
+            phases.dns += time.perf_counter() - phases.dns_start
+
+    async def on_create_start(self, session, ctx, params):
+        phases = ctx.trace_request_ctx
+        if phases is not None:
+            phases.create_start = time.perf_counter()
+
+    async def on_create_end(self, session, ctx, params):
+        self.new_connections += 1
+        phases = ctx.trace_request_ctx
+        if phases is not None:
+            phases.acquired = time.perf_counter()
+            if phases.create_start is not None:
+                # La creación de la conexión incluye la resolución DNS
+                phases.connect = max(0.0, phases.acquired - phases.create_start - phases.dns)
+
+    async def on_reuseconn(self, session, ctx, params):
+        self.reused_connections += 1
+        phases = ctx.trace_request_ctx
+        if phases is not None:
+            phases.acquired = time.perf_counter()
+
+    async def on_headers_sent(self, session, ctx, params):
+        phases = ctx.trace_request_ctx
+        if phases is not None:
+            phases.sent = time.perf_counter()
+
+    async def on_request_end(self, session, ctx, params):
+        phases = ctx.trace_request_ctx
+        if phases is not None:
+            phases.headers = time.perf_counter()
+
+    def finish(self, phases):
+        """Cerrar una request después de leer el cuerpo completo"""
+        if phases is None or phases.headers is None:
+            return
+        now = time.perf_counter()
+        sent = phases.sent or phases.acquired or phases.start
+        self.samples["queue"].append(phases.queue * 1000)
+        self.samples["dns"].append(phases.dns * 1000)
+        self.samples["connect"].append(phases.connect * 1000)
+        self.samples["ttfb"].append((phases.headers - sent) * 1000)
+        self.samples["transfer"].append((now - phases.headers) * 1000)
+
+    def summary(self):
+        """Media y percentiles por fase, más la reutilización de conexiones"""
+        phases = {}
+        for phase, data in self.samples.items():
+            if not data:
+                phases[phase] = {"avg": 0, "p50": 0, "p95": 0, "p99": 0}
+                continue
+            sorted_data = sorted(data)
+            n = len(sorted_data)
+            phases[phase] = {
+                "avg": sum(sorted_data) / n,
+                **{f"p{p}": sorted_data[min(n - 1, int(n * p / 100))] for p in (50, 95, 99)}
+            }
+
+        acquired = self.new_connections + self.reused_connections
+        return {
+            "phases": phases,
+            "new_connections": self.new_connections,
+            "reused_connections": self.reused_connections,
+            "reuse_rate": self.reused_connections / acquired * 100 if acquired else 0
+        }
+
+    def print_summary(self):
+        summary = self.summary()
+        print("🔬 Desglose por fase (ms):        promedio |    P50 |    P95 |    P99")
+        for phase in PHASES:
+            values = summary["phases"][phase]
+            print(f"   {PHASE_LABELS[phase]:<28} {values['avg']:8.2f} | {values['p50']:6.2f} | "
+                  f"{values['p95']:6.2f} | {values['p99']:6.2f}")
+        print(f"🔌 Conexiones nuevas: {summary['new_connections']} | Reutilizadas: {summary['reused_connections']} "
+              f"| Reutilización: {summary['reuse_rate']:.1f}%")
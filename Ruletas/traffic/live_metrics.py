@@ -0,0 +1,141 @@
+"""
+Métricas en vivo por intervalo para los generadores de tráfico
+RPS, tasa de error y percentiles de latencia por segundo, en consola y en un archivo JSONL
+"""
+
+import json
+import threading
+import time
+from datetime import datetime
+
+class WorkerBuffer:
+    """Buffer de muestras de un solo hilo escritor (sin locks en el camino caliente)"""
+    __slots__ = ("samples",)
+
+    def __init__(self):
+        self.samples = []
+
+class LiveMetrics:
+    def __init__(self, interval=1.0, jsonl_path=None, console=True):
+        self.interval = interval
+        self.jsonl_path = jsonl_path
+        self.console = console
+        self.local = threading.local()
+        self.buffers = []
+        self.register_lock = threading.Lock()
+        self.start = None
+        self.pending = {}
+        self.next_index = 0
+        self.retired = []
+        self.stop_event = threading.Event()
+        self.thread = None
+        self.output = None
+
+    def worker_buffer(self):
+        """Buffer propio del hilo actual; el registro solo ocurre la primera vez"""
+        buffer = getattr(self.local, "buffer", None)
+        if buffer is None:
+            buffer = WorkerBuffer()
+            self.local.buffer = buffer
+            with self.register_lock:
+                self.buffers.append(buffer)
+        return buffer
+
+    def record(self, latency_ms, success):
+        """Registrar una request terminada (latency_ms=None si no hubo respuesta)"""
+        self.worker_buffer().samples.append((time.monotonic(), latency_ms, success))
+
+    def begin(self):
+        """Arrancar el hilo de reporte"""
+        self.start = time.monotonic()
+        if self.jsonl_path:
+            self.output = open(self.jsonl_path, "w", encoding="utf-8")
+        self.thread = threading.Thread(target=self.report_loop, daemon=True)
+        self.thread.start()
+
+    def end(self):
+        """Detener el reporte y emitir los intervalos pendientes"""
+        self.stop_event.set()
+        if self.thread is not None:
+            self.thread.join()
+        # Los escritores ya terminaron: se puede recoger todo sin período de gracia
+        self.bin_samples(self.retired)
+        self.bin_samples(self.collect())
+        self.retired = []
+        self.emit_ready(final=True)
+        if self.output is not None:
+            self.output.close()
+            self.output = None
+
+    def collect(self):
+        """Intercambiar los buffers de cada hilo por listas nuevas"""
+        with self.register_lock:
+            buffers = list(self.buffers)
+        swapped = []
+        for buffer in buffers:
+            samples, buffer.samples = buffer.samples, []
+            swapped.append(samples)
+        return swapped
+
+    def bin_samples(self, sample_lists):
+        for samples in sample_lists:
+            for timestamp, latency_ms, success in samples:
+                # Una muestra rezagada de un intervalo ya emitido cuenta en el siguiente
+                index = max(self.next_index, int((timestamp - self.start) / self.interval))
+                bucket = self.pending.get(index)
+                if bucket is None:
+                    bucket = self.pending[index] = {"requests": 0, "errors": 0, "latencies": []}
+                bucket["requests"] += 1
+                if not success:
+                    bucket["errors"] += 1
+                if latency_ms is not None:
+                    bucket["latencies"].append(latency_ms)
+
+    def report_loop(self):
+        next_tick = self.start + self.interval
+        while not self.stop_event.wait(max(0, next_tick - time.monotonic())):
+            next_tick += self.interval
+            # Las listas retiradas en el tick anterior se procesan ahora: un escritor que
+            # tomó la referencia justo antes del intercambio ya ha terminado su append
+            self.bin_samples(self.retired)
+            self.retired = self.collect()
+            self.emit_ready()
+
+    def emit_ready(self, final=False):
+        """Emitir los intervalos cerrados (con un intervalo de margen salvo al final).
+
+        Los intervalos sin requests también se emiten: un segundo a 0 RPS es una pausa.
+        """
+        current = int((time.monotonic() - self.start) / self.interval)
+        limit = max(self.pending, default=-1) + 1 if final else current - 1
+        while self.next_index < limit:
+            bucket = self.pending.pop(self.next_index, None) or {"requests": 0, "errors": 0, "latencies": []}
+            self.emit(self.next_index, bucket)
+            self.next_index += 1
+
+    def emit(self, index, bucket):
+        latencies = sorted(bucket["latencies"])
+        n = len(latencies)
+
+        def percentile(p):
+            return round(latencies[min(n - 1, int(n * p / 100))], 3) if n else 0
+
+        point = {
+            "t": round(index * self.interval, 3),
+            "timestamp": datetime.now().isoformat(),
+            "requests": bucket["requests"],
+            "errors": bucket["errors"],
+            "rps": bucket["requests"] / self.interval,
+            "error_rate": round(bucket["errors"] / bucket["requests"] * 100, 3) if bucket["requests"] else 0,
+            "p50_ms": percentile(50),
+            "p95_ms": percentile(95),
+            "p99_ms": percentile(99),
+            "max_ms": round(latencies[-1], 3) if n else 0
+        }
+
+        if self.console:
+            print(f"📡 t={point['t']:>6.0f}s | {point['rps']:7.1f} RPS | err {point['error_rate']:5.1f}% | "
+                  f"P50 {point['p50_ms']:7.2f} | P95 {point['p95_ms']:7.2f} | P99 {point['p99_ms']:7.2f} ms")
+        if self.output is not None:
+            self.output.write(json.dumps(point) + "\n")
+            self.output.flush()
@@ -0,0 +1,338 @@
+"""
+Microbenchmarks en proceso de los caminos calientes del juego y de la API
+RuletaGame.spin, estadísticas, serialización del historial, rutas Flask por el cliente de
+pruebas (sin red) y el APIHandler de Prueba_2 sobre loopback, con línea base guardada
+"""
+
+import argparse
+import gc
+import gzip
+import http.client
+import importlib.util
+import json
+import os
+import platform
+import statistics
+import threading
+import time
+import tracemalloc
+from datetime import datetime
+from http.server import HTTPServer
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+REPO_ROOT = os.path.dirname(ROOT)
+
+def load_module(name, path):
+    """Importar un server.py por ruta (Ruletas y Prueba_2 se llaman igual)"""
+    spec = importlib.util.spec_from_file_location(name, path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+class Benchmark:
+    """Un caso: `setup()` prepara el estado y devuelve la operación a medir (sin argumentos)"""
+
+    def __init__(self, name, group, setup, teardown=None):
+        self.name = name
+        self.group = group
+        self.setup = setup
+        self.teardown = teardown
+
+def ruletas_benchmarks():
+    server = load_module("ruletas_server", os.path.join(ROOT, "server.py"))
+
+    def warm_game():
+        # Historial lleno: el estado estable del servidor tras los primeros 100 giros
+        game = server.RuletaGame()
+        for _ in range(200):
+            game.spin()
+        return game
+
+    def spin_setup():
+        return warm_game().spin
+
+    def statistics_setup():
+        return warm_game().get_statistics
+
+    def delta_setup():
+        game = warm_game()
+        result = game.spin()
+        return lambda: game.statistics_delta(result)
+
+    def history_json_setup():
+        game = warm_game()
+        dumps = server.app.json.dumps
+        return lambda: dumps({"success": True, "history": game.results_history,
+                              "statistics": game.get_statistics()})
+
+    benchmarks = [
+        Benchmark("game.spin", "juego", spin_setup),
+        Benchmark("game.get_statistics", "juego", statistics_setup),
+        Benchmark("game.statistics_delta", "juego", delta_setup),
+        Benchmark("history.serialize", "juego", history_json_setup)
+    ]
+
+    # Formatos negociados de /api/history: coste de codificar en el servidor y de parsear en el cliente
+    def encoders():
+        dumps = server.app.json.dumps
+        formats = {
+            "json": (lambda game: dumps({"success": True, "history": game.results_history,
+                                         "statistics": game.get_statistics()}, separators=(',', ':')).encode(),
+                     json.loads),
+            "json+gzip": (lambda game: gzip.compress(dumps({"success": True, "history": game.results_history,
+                                                            "statistics": game.get_statistics()},
+                                                           separators=(',', ':')).encode(), mtime=0),
+                          lambda body: json.loads(gzip.decompress(body)))
+        }
+        if server.msgpack is not None:
+            formats["msgpack"] = (lambda game: server.msgpack.packb({"success": True, "history": game.results_history,
+                                                                     "statistics": game.get_statistics()}),
+                                  server.msgpack.unpackb)
+            formats["columnar+msgpack"] = (lambda game: server.msgpack.packb(server.history_columnar(game)),
+                                           server.msgpack.unpackb)
+        return formats
+
+    def encode_setup(encode):
+        def setup():
+            game = warm_game()
+            return lambda: encode(game)
+        return setup
+
+    def parse_setup(encode, parse):
+        def setup():
+            body = encode(warm_game())
+            return lambda: parse(body)
+        return setup
+
+    for name, (encode, parse) in encoders().items():
+        benchmarks.append(Benchmark(f"history.encode.{name}", "formatos", encode_setup(encode)))
+        benchmarks.append(Benchmark(f"history.parse.{name}", "formatos", parse_setup(encode, parse)))
+
+    def route_setup(method, path, uncached=False):
+        def setup():
+            server.game = warm_game()
+            client = server.app.test_client()
+            call = client.post if method == "POST" else client.get
+            if not uncached:
+                return lambda: call(path).close()
+
+            def request():
+                # Vaciar EncodedResponseCache: cada llamada construye y codifica la respuesta,
+                # como la primera lectura tras un giro
+                server.response_cache.entries.clear()
+                call(path).close()
+            return request
+        return setup
+
+    for method, path in (("POST", "/api/spin"), ("POST", "/api/spin?shape=delta"), ("POST", "/api/spin?shape=result")):
+        benchmarks.append(Benchmark(f"{method} {path}", "flask", route_setup(method, path)))
+    # Rutas con caché por estado del juego: con el estado fijo solo se mediría la búsqueda en caché
+    cached_routes = ("/api/history", "/api/statistics", "/api/statistics/intervals", "/api/colors")
+    for path in cached_routes:
+        benchmarks.append(Benchmark(f"GET {path}", "flask", route_setup("GET", path, uncached=True)))
+    benchmarks.append(Benchmark("GET /api/history (caché)", "flask", route_setup("GET", "/api/history")))
+    for path in ("/health", "/metrics"):
+        benchmarks.append(Benchmark(f"GET {path}", "flask", route_setup("GET", path)))
+    return benchmarks
+
+def prueba2_benchmarks():
+    server_module = load_module("prueba2_server", os.path.join(REPO_ROOT, "Prueba_2", "server.py"))
+    state = {}
+
+    class QuietHandler(server_module.APIHandler):
+        def log_message(self, format, *args):
+            pass  # El log por request a stderr distorsiona la medida
+
+    def start():
+        httpd = HTTPServer(("127.0.0.1", 0), QuietHandler)
+        thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+        thread.start()
+        state["httpd"] = httpd
+        return httpd.server_address[1]
+
+    def stop():
+        httpd = state.pop("httpd", None)
+        if httpd is not None:
+            httpd.shutdown()
+            httpd.server_close()
+
+    def handler_setup(path):
+        def setup():
+            port = start()
+
+            def request():
+                # HTTP/1.0: el handler cierra la conexión tras cada respuesta
+                connection = http.client.HTTPConnection("127.0.0.1", port, timeout=5)
+                connection.request("GET", path)
+                connection.getresponse().read()
+                connection.close()
+            return request
+        return setup
+
+    return [Benchmark(f"APIHandler GET {path}", "prueba_2", handler_setup(path), stop)
+            for path in ("/api/saludo", "/api/contador")]
+
+def calibrate(operation, min_time):
+    """Iteraciones por repetición para que cada una dure al menos `min_time` (como timeit.autorange)"""
+    number = 1
+    while True:
+        start = time.perf_counter_ns()
+        for _ in range(number):
+            operation()
+        elapsed = (time.perf_counter_ns() - start) / 1e9
+        if elapsed >= min_time:
+            return number
+        number = number * 10 if elapsed < min_time / 10 else max(number + 1, int(number * min_time / elapsed * 1.1))
+
+def measure_time(operation, warmup, repeat, min_time):
+    """ns/op de cada repetición, con el GC desactivado durante la medida"""
+    deadline = time.perf_counter() + warmup
+    while time.perf_counter() < deadline:
+        operation()
+
+    number = calibrate(operation, min_time)
+    samples = []
+    gc_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        for _ in range(repeat):
+            start = time.perf_counter_ns()
+            for _ in range(number):
+                operation()
+            samples.append((time.perf_counter_ns() - start) / number)
+    finally:
+        if gc_enabled:
+            gc.enable()
+    return number, samples
+
+def measure_allocations(operation, calls=200):
+    """Memoria por operación con tracemalloc: pico transitorio y lo que queda retenido"""
+    operation()
+    tracemalloc.start()
+    try:
+        peaks = []
+        before, _ = tracemalloc.get_traced_memory()
+        for _ in range(calls):
+            current, _ = tracemalloc.get_traced_memory()
+            tracemalloc.reset_peak()
+            operation()
+            _, peak = tracemalloc.get_traced_memory()
+            peaks.append(peak - current)
+        after, _ = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {
+        "peak_bytes_per_op": statistics.median(peaks),
+        "retained_bytes_per_op": (after - before) / calls
+    }
+
+def run_benchmark(benchmark, args):
+    operation = benchmark.setup()
+    try:
+        number, samples = measure_time(operation, args.warmup, args.repeat, args.min_time)
+        result = {
+            "group": benchmark.group,
+            "iterations": number,
+            "repeat": args.repeat,
+            "ns_per_op": statistics.median(samples),
+            "min_ns_per_op": min(samples),
+            # Dispersión entre repeticiones: por debajo de esto un cambio es ruido
+            "spread_percent": (statistics.stdev(samples) / statistics.mean(samples) * 100) if len(samples) > 1 else 0
+        }
+        if not args.no_alloc:
+            result.update(measure_allocations(operation))
+        return result
+    finally:
+        if benchmark.teardown is not None:
+            benchmark.teardown()
+
+def load_baseline(path):
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)["results"]
+    except (OSError, ValueError, KeyError):
+        return None
+
+def format_ns(ns):
+    if ns >= 1e6:
+        return f"{ns / 1e6:.2f} ms"
+    if ns >= 1e3:
+        return f"{ns / 1e3:.2f} µs"
+    return f"{ns:.0f} ns"
+
+def main():
+    parser = argparse.ArgumentParser(description='Microbenchmarks del juego y de la API de la Ruleta Virtual')
+    parser.add_argument('--filter', help='Solo los benchmarks cuyo nombre contenga este texto')
+    parser.add_argument('--warmup', type=float, default=0.2, help='Segundos de calentamiento por benchmark')
+    parser.add_argument('--repeat', type=int, default=7, help='Repeticiones medidas por benchmark')
+    parser.add_argument('--min-time', type=float, default=0.1, help='Duración mínima de cada repetición')
+    parser.add_argument('--no-alloc', action='store_true', help='No medir memoria por operación (tracemalloc)')
+    parser.add_argument('--baseline', default='microbench_baseline.json', help='Archivo de la línea base')
+    parser.add_argument('--save-baseline', action='store_true', help='Guardar los resultados como línea base')
+    parser.add_argument('--threshold', type=float, default=10,
+                       help='Cambio de ns/op (%%) frente a la línea base que se marca como regresión')
+    parser.add_argument('--output', help='Guardar los resultados en un archivo JSON')
+
+    args = parser.parse_args()
+
+    benchmarks = ruletas_benchmarks() + prueba2_benchmarks()
+    if args.filter:
+        benchmarks = [b for b in benchmarks if args.filter in b.name]
+
+    baseline = None if args.save_baseline else load_baseline(args.baseline)
+
+    print("⏱️  MICROBENCHMARKS - RULETA VIRTUAL")
+    print("=" * 104)
+    print(f"{'Benchmark':<32} {'ns/op':>10} {'±%':>6} {'ops/s':>11} {'pico B/op':>10} {'retenido':>9}  {'vs base':>8}")
+    print("-" * 104)
+
+    results = {}
+    regressions = []
+    for benchmark in benchmarks:
+        result = run_benchmark(benchmark, args)
+        results[benchmark.name] = result
+
+        comparison = ""
+        if baseline and benchmark.name in baseline:
+            change = (result["ns_per_op"] - baseline[benchmark.name]["ns_per_op"]) / baseline[benchmark.name]["ns_per_op"] * 100
+            result["change_percent"] = change
+            # Un cambio dentro de la dispersión de las repeticiones no cuenta
+            noise = max(result["spread_percent"], baseline[benchmark.name].get("spread_percent", 0))
+            marker = "🔴" if change > max(args.threshold, noise) else "🟢" if change < -max(args.threshold, noise) else "⚪"
+            if marker == "🔴":
+                regressions.append(benchmark.name)
+            comparison = f"{marker}{change:+6.1f}%"
+
+        memory = ""
+        if "peak_bytes_per_op" in result:
+            memory = f"{result['peak_bytes_per_op']:>10.0f} {result['retained_bytes_per_op']:>9.1f}"
+        else:
+            memory = f"{'-':>10} {'-':>9}"
+        print(f"{benchmark.name:<32} {format_ns(result['ns_per_op']):>10} {result['spread_percent']:>5.1f}% "
+              f"{1e9 / result['ns_per_op']:>11,.0f} {memory}  {comparison:>8}")
+
+    print("=" * 104)
+
+    report = {
+        "timestamp": datetime.now().isoformat(),
+        "python": platform.python_version(),
+        "results": results
+    }
+    if args.save_baseline:
+        with open(args.baseline, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+        print(f"📁 Línea base guardada en: {args.baseline}")
+    elif baseline is None:
+        print(f"💡 Sin línea base en {args.baseline}: guárdala con --save-baseline")
+    elif regressions:
+        print(f"🔴 Más lentos que la línea base: {', '.join(regressions)}")
+    else:
+        print("✅ Sin regresiones frente a la línea base")
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+        print(f"📁 Resultados guardados en: {args.output}")
+
+if __name__ == "__main__":
+    main()
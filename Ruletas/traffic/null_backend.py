@@ -0,0 +1,153 @@
+"""
+Backend nulo para calibrar los generadores de tráfico de la Ruleta Virtual
+Responde con cuerpos pre-generados a /api/spin, /api/history, /api/statistics y /health
+sin lógica de juego, para medir el techo de throughput y el piso de latencia del cliente
+"""
+
+import asyncio
+import json
+import multiprocessing
+import socket
+import argparse
+
+CONTENT_LENGTH = b"\r\ncontent-length:"
+
+COLORS = {1: "azul", 2: "morado", 3: "amarillo"}
+
+STATISTICS = {
+    "total_spins": 100,
+    "results_shown": 100,
+    "color_counts": {"azul": 85, "morado": 13, "amarillo": 2},
+    "percentages": {"azul": 85.0, "morado": 13.0, "amarillo": 2.0},
+    "spins_since_last_purple": 3,
+    "spins_since_last_yellow": 47
+}
+
+def canned_spin(spin_number):
+    result = 3 if spin_number % 50 == 0 else 2 if spin_number % 8 == 0 else 1
+    return {
+        "spin_number": spin_number,
+        "result": result,
+        "color": COLORS[result],
+        "timestamp": "2025-08-24T10:30:00.123456"
+    }
+
+def http_response(status, reason, payload):
+    """Respuesta HTTP/1.1 completa (keep-alive) lista para enviar"""
+    body = json.dumps(payload).encode()
+    head = (
+        f"HTTP/1.1 {status} {reason}\r\n"
+        "Content-Type: application/json\r\n"
+        f"Content-Length: {len(body)}\r\n"
+        "\r\n"
+    ).encode("ascii")
+    return head + body
+
+# Mismos tamaños y formas que las respuestas reales de server.py
+RESPONSES = {
+    b"/api/spin": http_response(200, "OK", {
+        "success": True,
+        "result": canned_spin(100),
+        "statistics": STATISTICS
+    }),
+    b"/api/history": http_response(200, "OK", {
+        "success": True,
+        "history": [canned_spin(n) for n in range(1, 101)],
+        "statistics": STATISTICS
+    }),
+    b"/api/statistics": http_response(200, "OK", {
+        "success": True,
+        "statistics": STATISTICS
+    }),
+    b"/health": http_response(200, "OK", {
+        "status": "OK",
+        "message": "Backend nulo de calibración"
+    })
+}
+NOT_FOUND = http_response(404, "Not Found", {"success": False, "error": "not found"})
+
+async def handle_connection(reader, writer):
+    """Atender requests en una conexión keep-alive (admite pipelining)"""
+    try:
+        while True:
+            head = await reader.readuntil(b"\r\n\r\n")
+            request_line = head[:head.find(b"\r\n")].split(b" ")
+            path = request_line[1].split(b"?", 1)[0] if len(request_line) > 1 else b"/"
+
+            # Consumir el cuerpo de la request si lo hay
+            lower = head.lower()
+            index = lower.find(CONTENT_LENGTH)
+            if index >= 0:
+                end = lower.index(b"\r\n", index + 2)
+                length = int(head[index + len(CONTENT_LENGTH):end])
+                if length:
+                    await reader.readexactly(length)
+
+            writer.write(RESPONSES.get(path, NOT_FOUND))
+            await writer.drain()
+    except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, ConnectionError, ValueError):
+        pass
+    finally:
+        writer.close()
+
+def serve(sock):
+    """Servir en el socket dado hasta que el proceso termine"""
+    async def run():
+        server = await asyncio.start_server(handle_connection, sock=sock)
+        async with server:
+            await server.serve_forever()
+
+    try:
+        asyncio.run(run())
+    except KeyboardInterrupt:
+        pass
+
+class NullBackend:
+    """Backend nulo en un proceso aparte para no competir por CPU con el cliente"""
+
+    def __init__(self, host="127.0.0.1", port=0):
+        self.host = host
+        self.port = port
+        self.process = None
+
+    @property
+    def base_url(self):
+        return f"http://{self.host}:{self.port}"
+
+    def start(self):
+        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        sock.bind((self.host, self.port))
+        sock.listen(1024)
+        self.port = sock.getsockname()[1]
+
+        self.process = multiprocessing.Process(target=serve, args=(sock,), daemon=True)
+        self.process.start()
+        sock.close()
+        return self
+
+    def stop(self):
+        if self.process is not None:
+            self.process.terminate()
+            self.process.join(timeout=5)
+            self.process = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+def main():
+    parser = argparse.ArgumentParser(description='Backend nulo para calibrar generadores de tráfico')
+    parser.add_argument('--host', default='127.0.0.1', help='Interfaz de escucha')
+    parser.add_argument('--port', type=int, default=5001, help='Puerto de escucha')
+
+    args = parser.parse_args()
+
+    sock = socket.create_server((args.host, args.port), backlog=1024)
+    print(f"🧪 Backend nulo escuchando en http://{args.host}:{args.port}")
+    serve(sock)
+
+if __name__ == "__main__":
+    main()
@@ -10,137 +10,152 @@ import threading
 from datetime import datetime
 import argparse
 import os
+import re
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
+from quantile_sketch import DDSketch, SlidingWindowSketch
+from resource_sampler import ProcessSampler, CgroupSampler, pearson
+from timeseries_log import TimeSeriesWriter
+from slo import SLOEngine, AlertFile, AlertWebhook, load_config
+
+METRIC_LINE = re.compile(r'^([a-zA-Z_:][a-zA-Z0-9_:]*)(?:\{(.*)\})?\s+(\S+)$')
+METRIC_LABEL = re.compile(r'(\w+)="([^"]*)"')
+
+def parse_prometheus_text(text):
+    """Parsear el formato de texto Prometheus a {(nombre, etiquetas): valor}"""
+    samples = {}
+    for line in text.splitlines():
+        if not line or line.startswith('#'):
+            continue
+        match = METRIC_LINE.match(line)
+        if not match:
+            continue
+        name, labels, value = match.groups()
+        key = (name, tuple(sorted(METRIC_LABEL.findall(labels or ''))))
+        samples[key] = float(value)
+    return samples
+
+def histogram_quantile(buckets, q):
+    """Estimar un cuantil desde buckets acumulados [(límite, cuenta)] interpolando linealmente"""
+    if not buckets or buckets[-1][1] <= 0:
+        return 0
+    rank = q * buckets[-1][1]
+    previous_bound, previous_count = 0.0, 0.0
+    for bound, count in buckets:
+        if count >= rank:
+            if bound == float('inf'):
+                return previous_bound
+            if count == previous_count:
+                return bound
+            return previous_bound + (bound - previous_bound) * (rank - previous_count) / (count - previous_count)
+        previous_bound, previous_count = bound, count
+    return previous_bound
+
+def histogram_count_below(buckets, bound):
+    """Observaciones por debajo de `bound` según buckets acumulados, interpolando dentro del bucket"""
+    previous_bound, previous_count = 0.0, 0.0
+    for upper, count in buckets:
+        if upper >= bound:
+            if upper == float('inf'):
+                return previous_count
+            return previous_count + (count - previous_count) * (bound - previous_bound) / (upper - previous_bound)
+        previous_bound, previous_count = upper, count
+    return previous_count
 
 class PerformanceMonitor:
-    def __init__(self, base_url="http://localhost:5000", interval=2):
+    def __init__(self, base_url="http://localhost:5000", interval=2, source="probe", read_only=False, window=60,
+                 resource_sampler=None, log_writer=None, session=None, executor=None, system_stats=True, slo=None):
         self.base_url = base_url
         self.interval = interval
+        # "probe": mide con requests reales; "metrics": lee /metrics sin generar carga
+        self.source = source
+        # Nunca llamar a /api/spin: la latencia se mide sobre /api/statistics
+        self.read_only = read_only
+        # Pool de conexiones persistente y sondas en paralelo (compartibles entre réplicas)
+        self.session = session
+        if self.session is None:
+            self.session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=4)
+            self.session.mount("http://", adapter)
+            self.session.mount("https://", adapter)
+        self.executor = executor or ThreadPoolExecutor(max_workers=4)
+        # Con varias réplicas el host se muestrea una sola vez por tick (en FleetMonitor)
+        self.system_stats = system_stats
+        try:
+            import psutil
+            psutil.cpu_percent(interval=None)  # Primera lectura: fija la referencia de CPU
+        except ImportError:
+            pass
+        self.metrics_baseline = None
+        self.previous_metrics = None
+        # Sondas propias a /api/statistics por status: totales y las ya descontadas en la lectura anterior
+        self.own_probes = {}
+        self.own_probes_previous = {}
         self.monitoring = False
         self.stats_history = []
         self.start_time = None
         self.total_requests = 0
         self.successful_requests = 0
         self.failed_requests = 0
-        self.response_times = []
-        self.cpu_usage = []
-        self.memory_usage = []
+        # Últimas 100 muestras (deque: la expulsión es O(1))
+        self.response_times = deque(maxlen=100)
+        self.cpu_usage = deque(maxlen=100)
+        self.memory_usage = deque(maxlen=100)
+        # Percentiles de latencia: ventana deslizante y toda la sesión, en memoria constante
+        self.window = window
+        self.latency_window = SlidingWindowSketch(window)
+        self.latency_total = DDSketch()
+        # Recursos del proceso o contenedor del servidor (ProcessSampler/CgroupSampler opcional)
+        self.resource_sampler = resource_sampler
+        # Pares (latencia, CPU) y (latencia, throttling) por intervalo para correlacionarlos
+        self.cpu_latency_pairs = deque(maxlen=100)
+        self.throttle_latency_pairs = deque(maxlen=100)
+        # Log append-only con todas las muestras (TimeSeriesWriter opcional)
+        self.log_writer = log_writer
+        # Objetivos de servicio con alertas por consumo del presupuesto (SLOEngine opcional)
+        self.slo = slo
+        # Buckets acumulados de /api/spin del último intervalo (fuente metrics)
+        self.interval_spin_buckets = []
         
-    def get_server_stats(self):
-        """Obtener estadísticas del servidor"""
+    def get_system_stats(self):
+        """Métricas del sistema con psutil (vacío si no está instalado)"""
+        if not self.system_stats:
+            return {}
         try:
             import psutil
-            
-            # Métricas del sistema
-            cpu_percent = psutil.cpu_percent(interval=0.1)
-            memory = psutil.virtual_memory()
-            memory_percent = memory.percent
-            memory_used_mb = memory.used / (1024 * 1024)
-            
-            # Obtener estadísticas del juego
-            response = requests.get(f"{self.base_url}/api/statistics", timeout=5)
-            if response.status_code == 200:
-                game_stats = response.json()["statistics"]
-            else:
-                game_stats = {}
-            
-            # Obtener health check
-            health_start = time.time()
-            response = requests.get(f"{self.base_url}/health", timeout=5)
-            health_response_time = (time.time() - health_start) * 1000
-            health_ok = response.status_code == 200
-            
-            # Medir tiempo de respuesta para spin
-            spin_start = time.time()
-            response = requests.post(f"{self.base_url}/api/spin", timeout=10)
-            spin_response_time = (time.time() - spin_start) * 1000  # en ms
-            spin_success = response.status_code == 200
-            
-            # Actualizar contadores
-            self.total_requests += 1
-            if spin_success:
-                self.successful_requests += 1
-            else:
-                self.failed_requests += 1
-            
-            # Guardar métricas
-            self.response_times.append(spin_response_time)
-            self.cpu_usage.append(cpu_percent)
-            self.memory_usage.append(memory_percent)
-            
-            # Mantener solo los últimos 100 registros para cálculos
-            if len(self.response_times) > 100:
-                self.response_times.pop(0)
-                self.cpu_usage.pop(0)
-                self.memory_usage.pop(0)
-            
-            return {
-                "timestamp": datetime.now().isoformat(),
-                "health_ok": health_ok,
-                "health_response_time_ms": health_response_time,
-                "spin_response_time_ms": spin_response_time,
-                "spin_success": spin_success,
-                "game_stats": game_stats,
-                "system_stats": {
-                    "cpu_percent": cpu_percent,
-                    "memory_percent": memory_percent,
-                    "memory_used_mb": memory_used_mb
-                }
-            }
-            
         except ImportError:
-            # Si psutil no está disponible, usar versión básica
-            return self.get_basic_server_stats()
-        except Exception as e:
-            return {
-                "timestamp": datetime.now().isoformat(),
-                "health_ok": False,
-                "error": str(e),
-                "spin_response_time_ms": None,
-                "spin_success": False,
-                "game_stats": {},
-                "system_stats": {}
-            }
+            return {}
+        
+        # Sin bloquear: CPU media desde la llamada anterior
+        cpu_percent = psutil.cpu_percent(interval=None)
+        memory = psutil.virtual_memory()
+        self.cpu_usage.append(cpu_percent)
+        self.memory_usage.append(memory.percent)
+        
+        return {
+            "cpu_percent": cpu_percent,
+            "memory_percent": memory.percent,
+            "memory_used_mb": memory.used / (1024 * 1024)
+        }
     
-    def get_basic_server_stats(self):
-        """Versión básica sin psutil"""
+    def get_metrics_stats(self):
+        """Obtener estadísticas leyendo /metrics del servidor, sin requests que alteren el juego"""
         try:
-            # Obtener estadísticas del juego
-            response = requests.get(f"{self.base_url}/api/statistics", timeout=5)
-            if response.status_code == 200:
-                game_stats = response.json()["statistics"]
-            else:
-                game_stats = {}
-            
-            # Obtener health check
-            response = requests.get(f"{self.base_url}/health", timeout=5)
-            health_ok = response.status_code == 200
-            
-            # Medir tiempo de respuesta para spin
-            start_time = time.time()
-            response = requests.post(f"{self.base_url}/api/spin", timeout=10)
-            spin_response_time = (time.time() - start_time) * 1000  # en ms
-            spin_success = response.status_code == 200
-            
-            # Actualizar contadores
-            self.total_requests += 1
-            if spin_success:
-                self.successful_requests += 1
-            else:
-                self.failed_requests += 1
-            
-            self.response_times.append(spin_response_time)
-            if len(self.response_times) > 100:
-                self.response_times.pop(0)
-            
-            return {
-                "timestamp": datetime.now().isoformat(),
-                "health_ok": health_ok,
-                "spin_response_time_ms": spin_response_time,
-                "spin_success": spin_success,
-                "game_stats": game_stats,
-                "system_stats": {}
-            }
+            response, scrape_time, error = self.timed_request("GET", "/metrics")
+            if error:
+                raise RuntimeError(error)
+            response.raise_for_status()
+            current = parse_prometheus_text(response.text)
+            counted_probes = dict(self.own_probes)
             
+            # /api/statistics es de solo lectura: no cambia los contadores del juego. Va después de
+            # /metrics para que siempre la cuente la lectura siguiente y se pueda descontar
+            response, _, _ = self.timed_request("GET", "/api/statistics")
+            if response is not None:
+                status = str(response.status_code)
+                self.own_probes[status] = self.own_probes.get(status, 0) + 1
+            game_stats = response.json()["statistics"] if response is not None and response.status_code == 200 else {}
         except Exception as e:
             return {
                 "timestamp": datetime.now().isoformat(),
@@ -151,27 +166,230 @@ class PerformanceMonitor:
                 "game_stats": {},
                 "system_stats": {}
             }
-    
-    def calculate_percentiles(self, data):
-        """Calcular percentiles de una lista de datos"""
-        if not data:
-            return {"p50": 0, "p95": 0, "p99": 0}
         
-        sorted_data = sorted(data)
-        n = len(sorted_data)
+        if self.metrics_baseline is None:
+            self.metrics_baseline = current
+        previous = self.previous_metrics or current
+        self.previous_metrics = current
+        
+        def delta(name, labels, since):
+            return current.get((name, labels), 0) - since.get((name, labels), 0)
+        
+        # Requests del intervalo y desde el inicio, sin las lecturas de /metrics ni las sondas propias
+        interval_total = interval_failed = 0
+        run_total = run_failed = 0
+        for (name, labels), value in current.items():
+            if name != "ruleta_http_requests_total":
+                continue
+            label_map = dict(labels)
+            if label_map.get("route") == "/metrics":
+                continue
+            failed = int(label_map.get("status", "500")) >= 400
+            interval_count = value - previous.get((name, labels), 0)
+            run_count = value - self.metrics_baseline.get((name, labels), 0)
+            if label_map.get("route") == "/api/statistics":
+                status = label_map.get("status")
+                interval_count -= counted_probes.get(status, 0) - self.own_probes_previous.get(status, 0)
+                run_count -= counted_probes.get(status, 0)
+            interval_total += interval_count
+            run_total += run_count
+            if failed:
+                interval_failed += interval_count
+                run_failed += run_count
+        
+        self.own_probes_previous = counted_probes
+        self.total_requests = int(run_total)
+        self.failed_requests = int(run_failed)
+        self.successful_requests = self.total_requests - self.failed_requests
         
-        def percentile(p):
-            index = int(n * p / 100)
-            if index >= n:
-                index = n - 1
-            return sorted_data[index]
+        # Latencia de /api/spin en el intervalo a partir de los buckets del histograma
+        spin_labels = (("route", "/api/spin"),)
+        spin_count = delta("ruleta_http_request_duration_seconds_count", spin_labels, previous)
+        spin_sum = delta("ruleta_http_request_duration_seconds_sum", spin_labels, previous)
+        buckets = []
+        for (name, labels), value in current.items():
+            label_map = dict(labels)
+            if name == "ruleta_http_request_duration_seconds_bucket" and label_map.get("route") == "/api/spin":
+                bound = float(label_map["le"])
+                buckets.append((bound, value - previous.get((name, labels), 0)))
+        buckets.sort()
+        self.interval_spin_buckets = buckets
+        
+        spin_response_time = spin_sum / spin_count * 1000 if spin_count > 0 else None
+        if spin_response_time is not None:
+            # Los percentiles salen de los giros del histograma; la media del intervalo solo va al historial
+            self.response_times.append(spin_response_time)
+            self.record_histogram(buckets, spin_sum * 1000)
+        
+        # Tiempo medio de cada fase del giro en el intervalo
+        spin_phases = {}
+        for phase in ("spin", "statistics", "serialize"):
+            phase_labels = (("phase", phase),)
+            count = delta("ruleta_spin_phase_duration_seconds_count", phase_labels, previous)
+            total = delta("ruleta_spin_phase_duration_seconds_sum", phase_labels, previous)
+            spin_phases[phase] = total / count * 1000 if count > 0 else 0
         
         return {
-            "p50": percentile(50),
-            "p95": percentile(95),
-            "p99": percentile(99)
+            "timestamp": datetime.now().isoformat(),
+            "health_ok": True,
+            "health_response_time_ms": scrape_time,
+            "spin_response_time_ms": spin_response_time,
+            "spin_success": interval_failed == 0,
+            "game_stats": game_stats,
+            "system_stats": self.get_system_stats(),
+            "server_metrics": {
+                "interval_requests": int(interval_total),
+                "interval_failed": int(interval_failed),
+                # El gauge incluye la propia lectura de /metrics
+                "in_flight": max(0, current.get(("ruleta_http_requests_in_flight", ()), 0) - 1),
+                "spin_requests": int(spin_count),
+                "spin_p50_ms": histogram_quantile(buckets, 0.50) * 1000,
+                "spin_p95_ms": histogram_quantile(buckets, 0.95) * 1000,
+                "spin_p99_ms": histogram_quantile(buckets, 0.99) * 1000,
+                "spin_phases_ms": spin_phases
+            }
         }
     
+    def timed_request(self, method, path, timeout=5):
+        """Request por el pool persistente: devuelve (respuesta, ms, error)"""
+        start = time.perf_counter()
+        try:
+            response = self.session.request(method, f"{self.base_url}{path}", timeout=timeout)
+            return response, (time.perf_counter() - start) * 1000, None
+        except Exception as e:
+            return None, (time.perf_counter() - start) * 1000, str(e)
+    
+    def get_server_stats(self):
+        """Obtener estadísticas del servidor (y del proceso/contenedor si hay objetivo)"""
+        stats = self.get_metrics_stats() if self.source == "metrics" else self.get_probe_stats()
+        
+        if self.resource_sampler is not None:
+            try:
+                process_stats = self.resource_sampler.sample()
+            except Exception as e:
+                process_stats = {"target": self.resource_sampler.description, "error": str(e)}
+            stats["process_stats"] = process_stats
+            
+            latency = stats.get("spin_response_time_ms")
+            if latency is not None:
+                if process_stats.get("cpu_percent") is not None:
+                    self.cpu_latency_pairs.append((process_stats["cpu_percent"], latency))
+                if process_stats.get("throttled_ratio") is not None:
+                    self.throttle_latency_pairs.append((process_stats["throttled_ratio"], latency))
+        return stats
+    
+    def get_probe_stats(self):
+        """Obtener estadísticas del servidor con sondas concurrentes"""
+        # Lanzar todas las sondas a la vez: el muestreo dura lo que la más lenta
+        probes = {
+            "statistics": self.executor.submit(self.timed_request, "GET", "/api/statistics"),
+            "health": self.executor.submit(self.timed_request, "GET", "/health")
+        }
+        if not self.read_only:
+            probes["spin"] = self.executor.submit(self.timed_request, "POST", "/api/spin", 10)
+        
+        system_stats = self.get_system_stats()
+        results = {name: future.result() for name, future in probes.items()}
+        
+        stats_response, _, _ = results["statistics"]
+        game_stats = {}
+        if stats_response is not None and stats_response.status_code == 200:
+            game_stats = stats_response.json()["statistics"]
+        
+        health_response, health_response_time, health_error = results["health"]
+        health_ok = health_response is not None and health_response.status_code == 200
+        
+        # En modo solo lectura la latencia se mide sobre /api/statistics
+        latency_probe = "/api/statistics" if self.read_only else "/api/spin"
+        probe_response, probe_time, probe_error = results["statistics" if self.read_only else "spin"]
+        probe_success = probe_response is not None and probe_response.status_code == 200
+        
+        # Actualizar contadores
+        self.total_requests += 1
+        if probe_success:
+            self.successful_requests += 1
+        else:
+            self.failed_requests += 1
+        
+        if probe_response is not None:
+            self.record_latency(probe_time)
+        
+        stats = {
+            "timestamp": datetime.now().isoformat(),
+            "health_ok": health_ok,
+            "health_response_time_ms": health_response_time,
+            "latency_probe": latency_probe,
+            "spin_response_time_ms": probe_time if probe_response is not None else None,
+            "spin_success": probe_success,
+            "game_stats": game_stats,
+            "system_stats": system_stats
+        }
+        error = health_error or probe_error
+        if error:
+            stats["error"] = error
+        return stats
+    
+    def sample(self):
+        """Tomar una muestra y guardarla en el historial reciente"""
+        current_stats = self.get_server_stats()
+        self.stats_history.append(current_stats)
+        
+        # Mantener solo los últimos 100 registros
+        if len(self.stats_history) > 100:
+            self.stats_history.pop(0)
+        return current_stats
+    
+    def interval_rps(self, current_stats):
+        """RPS del intervalo: del servidor si hay /metrics, si no el ritmo de las sondas"""
+        server_metrics = current_stats.get("server_metrics")
+        if server_metrics:
+            return server_metrics["interval_requests"] / self.interval
+        return self.get_performance_metrics().get("rps", 0)
+    
+    def slo_events(self, current_stats):
+        """Eventos de la muestra para los SLO: (buenos, totales) de disponibilidad y función de latencia.
+
+        Con /metrics cuentan todas las requests del intervalo y los giros bajo el umbral según el
+        histograma del servidor; con sondas, la sonda de latencia es el único evento.
+        """
+        server_metrics = current_stats.get("server_metrics")
+        if server_metrics:
+            total = server_metrics["interval_requests"]
+            buckets = self.interval_spin_buckets
+            spins = buckets[-1][1] if buckets else 0
+            return ((total - server_metrics["interval_failed"], total),
+                    lambda threshold_ms: (histogram_count_below(buckets, threshold_ms / 1000), spins))
+        if "spin_success" not in current_stats or "spin_response_time_ms" not in current_stats:
+            return (0, 0), lambda threshold_ms: (0, 0)
+        latency = current_stats["spin_response_time_ms"]
+        # Una sonda sin respuesta también incumple el objetivo de latencia
+        return ((1 if current_stats["spin_success"] else 0, 1),
+                lambda threshold_ms: (1 if latency is not None and latency <= threshold_ms else 0, 1))
+    
+    def record_latency(self, latency_ms):
+        """Registrar una latencia en el historial reciente y en los sketches"""
+        self.response_times.append(latency_ms)
+        self.latency_window.add(latency_ms)
+        self.latency_total.add(latency_ms)
+    
+    def record_histogram(self, buckets, total_ms):
+        """Añadir a los sketches los giros de un intervalo de /metrics, bucket a bucket.
+
+        Cada bucket aporta sus observaciones en el punto medio de sus límites (el último, sin límite
+        superior, en el mayor límite finito); la suma exacta del histograma mantiene la media.
+        """
+        observations = []
+        previous_bound, previous_count = 0.0, 0.0
+        for bound, cumulative in buckets:
+            count = int(cumulative - previous_count)
+            if count > 0:
+                observations.append(((previous_bound if bound == float('inf') else (previous_bound + bound) / 2) * 1000,
+                                     count))
+            previous_bound, previous_count = bound, cumulative
+        for value_ms, count in observations:
+            self.latency_window.add(value_ms, count=count)
+        self.latency_total.add_many(observations, total_ms)
+    
     def get_performance_metrics(self):
         """Calcular métricas de rendimiento avanzadas"""
         if not self.stats_history:
@@ -186,15 +404,16 @@ class PerformanceMonitor:
         # Calcular tasa de éxito
         success_rate = (self.successful_requests / self.total_requests * 100) if self.total_requests > 0 else 0
         
-        # Percentiles de latencia
-        latency_percentiles = self.calculate_percentiles(self.response_times)
+        # Percentiles de latencia: ventana deslizante y sesión completa
+        latency_percentiles = self.latency_window.snapshot().percentiles()
+        latency_percentiles_total = self.latency_total.percentiles()
         
         # Promedios de recursos del sistema
         avg_cpu = sum(self.cpu_usage) / len(self.cpu_usage) if self.cpu_usage else 0
         avg_memory = sum(self.memory_usage) / len(self.memory_usage) if self.memory_usage else 0
         
-        # Tiempo de respuesta promedio
-        avg_response_time = sum(self.response_times) / len(self.response_times) if self.response_times else 0
+        # Tiempo de respuesta promedio de toda la sesión
+        avg_response_time = self.latency_total.average
         
         return {
             "uptime_seconds": uptime_seconds,
@@ -205,15 +424,20 @@ class PerformanceMonitor:
             "failed_requests": self.failed_requests,
             "avg_response_time_ms": avg_response_time,
             "latency_percentiles": latency_percentiles,
+            "latency_percentiles_total": latency_percentiles_total,
             "avg_cpu_percent": avg_cpu,
             "avg_memory_percent": avg_memory,
-            "min_response_time": min(self.response_times) if self.response_times else 0,
-            "max_response_time": max(self.response_times) if self.response_times else 0
+            "min_response_time": self.latency_total.min if self.latency_total.count else 0,
+            "max_response_time": self.latency_total.max if self.latency_total.count else 0
         }
     
     def clear_screen(self):
         """Limpiar pantalla"""
-        os.system('cls' if os.name == 'nt' else 'clear')
+        if os.name == 'nt':
+            os.system('cls')
+        else:
+            # Secuencia ANSI: sin lanzar un proceso en cada refresco
+            print("\033[H\033[2J", end="")
     
     def get_status_indicator(self, value, thresholds):
         """Obtener indicador de estado basado en umbrales"""
@@ -246,6 +470,8 @@ class PerformanceMonitor:
         
         print(f"🌐 URL: {self.base_url}")
         print(f"📊 Intervalo: {self.interval} segundos")
+        if self.read_only:
+            print("🔒 Modo solo lectura: no se llama a /api/spin")
         print("-" * 70)
         
         # === ESTADO DEL SERVIDOR ===
@@ -266,7 +492,8 @@ class PerformanceMonitor:
             latency_status = self.get_status_indicator(response_time, {
                 "excellent": 100, "good": 500, "acceptable": 1000
             })
-            print(f"   ⚡ Latencia actual: {response_time:.2f}ms - {latency_status}")
+            probe = current_stats.get("latency_probe", "/api/spin")
+            print(f"   ⚡ Latencia actual ({probe}): {response_time:.2f}ms - {latency_status}")
             
             if metrics.get("avg_response_time_ms"):
                 avg_time = metrics["avg_response_time_ms"]
@@ -275,7 +502,12 @@ class PerformanceMonitor:
                 # Percentiles
                 percentiles = metrics.get("latency_percentiles", {})
                 if percentiles:
-                    print(f"   📈 P50: {percentiles.get('p50', 0):.1f}ms | P95: {percentiles.get('p95', 0):.1f}ms | P99: {percentiles.get('p99', 0):.1f}ms")
+                    print(f"   📈 Últimos {self.window:.0f}s: P50: {percentiles.get('p50', 0):.1f}ms | P95: {percentiles.get('p95', 0):.1f}ms | P99: {percentiles.get('p99', 0):.1f}ms")
+                percentiles = metrics.get("latency_percentiles_total", {})
+                if percentiles:
+                    print(f"   📈 Sesión:      P50: {percentiles.get('p50', 0):.1f}ms | P95: {percentiles.get('p95', 0):.1f}ms | P99: {percentiles.get('p99', 0):.1f}ms")
+        elif "server_metrics" in current_stats:
+            print("   ⚡ Latencia: sin giros en este intervalo")
         else:
             print("   ⚡ Latencia: ERROR")
         
@@ -302,6 +534,18 @@ class PerformanceMonitor:
         print(f"   ✅ Exitosos: {metrics.get('successful_requests', 0)}")
         print(f"   ❌ Fallidos: {metrics.get('failed_requests', 0)}")
         
+        # === MÉTRICAS DEL SERVIDOR (/metrics) ===
+        server_metrics = current_stats.get("server_metrics")
+        if server_metrics:
+            print("\n📡 MÉTRICAS DEL SERVIDOR (/metrics):")
+            print(f"   📥 Requests en el intervalo: {server_metrics['interval_requests']} "
+                  f"(fallidos: {server_metrics['interval_failed']}) | En proceso: {server_metrics['in_flight']:.0f}")
+            print(f"   🎯 /api/spin: {server_metrics['spin_requests']} giros | P50: {server_metrics['spin_p50_ms']:.2f}ms | "
+                  f"P95: {server_metrics['spin_p95_ms']:.2f}ms | P99: {server_metrics['spin_p99_ms']:.2f}ms")
+            phases = server_metrics["spin_phases_ms"]
+            print(f"   🔬 Fases del giro: spin {phases['spin']:.3f}ms | estadísticas {phases['statistics']:.3f}ms | "
+                  f"serialización {phases['serialize']:.3f}ms")
+        
         # === RECURSOS DEL SISTEMA ===
         system_stats = current_stats.get("system_stats", {})
         if system_stats:
@@ -325,6 +569,11 @@ class PerformanceMonitor:
             avg_memory = metrics.get("avg_memory_percent", 0)
             print(f"   📊 Promedios: CPU {avg_cpu:.1f}% | RAM {avg_memory:.1f}%")
         
+        # === RECURSOS DEL PROCESO / CONTENEDOR ===
+        process_stats = current_stats.get("process_stats")
+        if process_stats:
+            self.display_process_stats(process_stats)
+        
         # === ESTADÍSTICAS DEL JUEGO ===
         game_stats = current_stats.get("game_stats", {})
         if game_stats:
@@ -366,30 +615,84 @@ class PerformanceMonitor:
             print(f"\n📊 RANGO DE LATENCIA:")
             print(f"   ⚡ Mínimo: {min_time:.2f}ms | Máximo: {max_time:.2f}ms")
         
+        # === OBJETIVOS DE SERVICIO ===
+        if self.slo is not None:
+            self.slo.display()
+        
         print("\n" + "-" * 70)
         print("💡 Presiona Ctrl+C para detener el monitoreo y guardar reporte")
         print("=" * 70)
     
+    def display_process_stats(self, process_stats):
+        """Mostrar recursos del proceso o cgroup objetivo junto a su correlación con la latencia"""
+        print(f"\n📦 RECURSOS DEL OBJETIVO ({process_stats['target']}):")
+        if "error" in process_stats:
+            print(f"   ❌ Error: {process_stats['error']}")
+            return
+        
+        cpu = process_stats.get("cpu_percent")
+        if cpu is not None:
+            line = f"   🖥️  CPU: {cpu:.1f}%"
+            if process_stats.get("cpu_quota_percent") is not None:
+                quota_status = self.get_status_indicator(process_stats["cpu_quota_percent"], {
+                    "excellent": 70, "good": 85, "acceptable": 95
+                })
+                line += f" ({process_stats['cpu_quota_percent']:.1f}% de la cuota de {process_stats['cpu_quota_cores']:.2f} cores) - {quota_status}"
+            print(line)
+        
+        if process_stats.get("throttled_ratio") is not None:
+            throttled = process_stats["throttled_ratio"]
+            marker = "🔴" if throttled > 0 else "🟢"
+            print(f"   {marker} Throttling: {throttled:.1f}% de los períodos ({process_stats['throttled_ms']:.0f}ms frenados)")
+        
+        memory_line = f"   💾 RSS: {process_stats['rss_mb']:.1f}MB"
+        if process_stats.get("memory_limit_mb"):
+            memory_line += f" de {process_stats['memory_limit_mb']:.0f}MB"
+        print(memory_line)
+        
+        if process_stats.get("threads") is not None:
+            print(f"   🧵 Hilos: {process_stats['threads']} | 📂 Descriptores: {process_stats['open_fds']}")
+            print(f"   🔀 Cambios de contexto: {process_stats['ctx_switches_voluntary']} voluntarios | "
+                  f"{process_stats['ctx_switches_involuntary']} involuntarios")
+        
+        cpu_correlation = pearson(self.cpu_latency_pairs)
+        throttle_correlation = pearson(self.throttle_latency_pairs)
+        if cpu_correlation is not None or throttle_correlation is not None:
+            parts = []
+            if cpu_correlation is not None:
+                parts.append(f"CPU r={cpu_correlation:+.2f}")
+            if throttle_correlation is not None:
+                parts.append(f"throttling r={throttle_correlation:+.2f}")
+            print(f"   🔗 Correlación con la latencia: {' | '.join(parts)}")
+    
     def monitor_loop(self):
         """Loop principal de monitoreo"""
         self.monitoring = True
         self.start_time = datetime.now()
+        # Programación sin deriva: cada muestra se alinea a start + k * intervalo
+        next_tick = time.monotonic()
         
         try:
             while self.monitoring:
                 # Obtener estadísticas actuales
-                current_stats = self.get_server_stats()
-                self.stats_history.append(current_stats)
-                
-                # Mantener solo los últimos 100 registros
-                if len(self.stats_history) > 100:
-                    self.stats_history.pop(0)
+                current_stats = self.sample()
+                if self.slo is not None:
+                    availability, latency_events = self.slo_events(current_stats)
+                    self.slo.observe(time.monotonic(), availability, latency_events)
+                    current_stats["slo"] = self.slo.status()
+                if self.log_writer is not None:
+                    self.log_writer.write(current_stats)
                 
                 # Mostrar en pantalla
                 self.display_stats(current_stats)
                 
-                # Esperar al siguiente intervalo
-                time.sleep(self.interval)
+                # Esperar al siguiente intervalo; si una muestra se pasó de tiempo
+                # se saltan los ticks perdidos en lugar de acumular retraso
+                next_tick += self.interval
+                now = time.monotonic()
+                if next_tick < now:
+                    next_tick += ((now - next_tick) // self.interval + 1) * self.interval
+                time.sleep(next_tick - now)
                 
         except KeyboardInterrupt:
             self.stop_monitoring()
@@ -397,9 +700,15 @@ class PerformanceMonitor:
     def stop_monitoring(self):
         """Detener monitoreo y guardar resultados"""
         self.monitoring = False
+        self.executor.shutdown(wait=False)
+        self.session.close()
         
         print("\n\n🛑 Deteniendo monitoreo...")
         
+        if self.log_writer is not None:
+            self.log_writer.close()
+            print(f"📁 Serie temporal completa en: {', '.join(self.log_writer.segments)}")
+        
         # Guardar historial en archivo
         if self.stats_history:
             filename = f"performance_log_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
@@ -412,18 +721,13 @@ class PerformanceMonitor:
                 "base_url": self.base_url,
                 "history": self.stats_history
             }
+            if self.log_writer is not None:
+                report["timeseries_log"] = self.log_writer.segments
             
-            # Calcular estadísticas finales
-            response_times = [s["spin_response_time_ms"] for s in self.stats_history if s["spin_response_time_ms"]]
-            if response_times:
-                report["summary"] = {
-                    "avg_response_time_ms": sum(response_times) / len(response_times),
-                    "min_response_time_ms": min(response_times),
-                    "max_response_time_ms": max(response_times),
-                    "successful_requests": sum(1 for s in self.stats_history if s["spin_success"]),
-                    "total_requests": len(self.stats_history),
-                    "success_rate_percent": (sum(1 for s in self.stats_history if s["spin_success"]) / len(self.stats_history)) * 100
-                }
+            # Calcular estadísticas finales de toda la sesión (no solo de las muestras guardadas)
+            summary = self.session_summary()
+            if summary:
+                report["summary"] = summary
             
             with open(filename, 'w', encoding='utf-8') as f:
                 json.dump(report, f, indent=2, ensure_ascii=False)
@@ -432,32 +736,286 @@ class PerformanceMonitor:
             
             # Mostrar resumen final
             if "summary" in report:
-                summary = report["summary"]
-                print("\n📊 RESUMEN FINAL:")
-                print(f"   ⏱️  Duración: {(datetime.now() - self.start_time).total_seconds():.0f} segundos")
-                print(f"   📊 Total requests: {summary['total_requests']}")
-                print(f"   ✅ Requests exitosos: {summary['successful_requests']}")
-                print(f"   📈 Tasa de éxito: {summary['success_rate_percent']:.1f}%")
-                print(f"   ⚡ Tiempo promedio: {summary['avg_response_time_ms']:.2f}ms")
-                print(f"   ⚡ Tiempo mínimo: {summary['min_response_time_ms']:.2f}ms")
-                print(f"   ⚡ Tiempo máximo: {summary['max_response_time_ms']:.2f}ms")
+                self.print_summary(report["summary"])
         
         print("\n✅ Monitoreo finalizado")
+    
+    def session_summary(self):
+        """Resumen de toda la sesión a partir de los contadores y del sketch (None sin latencias)"""
+        if not self.latency_total.count:
+            return None
+        return {
+            "avg_response_time_ms": self.latency_total.average,
+            "min_response_time_ms": self.latency_total.min,
+            "max_response_time_ms": self.latency_total.max,
+            "successful_requests": self.successful_requests,
+            "total_requests": self.total_requests,
+            "success_rate_percent": (self.successful_requests / self.total_requests * 100) if self.total_requests else 0,
+            "latency_percentiles_ms": self.latency_total.percentiles(),
+            **({"slo": self.slo.summary()} if self.slo is not None else {})
+        }
+    
+    def print_summary(self, summary):
+        print("\n📊 RESUMEN FINAL:")
+        print(f"   ⏱️  Duración: {(datetime.now() - self.start_time).total_seconds():.0f} segundos")
+        print(f"   📊 Total requests: {summary['total_requests']}")
+        print(f"   ✅ Requests exitosos: {summary['successful_requests']}")
+        print(f"   📈 Tasa de éxito: {summary['success_rate_percent']:.1f}%")
+        print(f"   ⚡ Tiempo promedio: {summary['avg_response_time_ms']:.2f}ms")
+        print(f"   ⚡ Tiempo mínimo: {summary['min_response_time_ms']:.2f}ms")
+        print(f"   ⚡ Tiempo máximo: {summary['max_response_time_ms']:.2f}ms")
+        percentiles = summary["latency_percentiles_ms"]
+        print(f"   📈 P50: {percentiles['p50']:.2f}ms | P95: {percentiles['p95']:.2f}ms | P99: {percentiles['p99']:.2f}ms")
+        if "slo" in summary:
+            print("\n🎯 SLO:")
+            for name, objective in summary["slo"]["objectives"].items():
+                compliance = objective["compliance_percent"]
+                compliance_text = f"{compliance:.2f}%" if compliance is not None else "sin eventos"
+                print(f"   {name} ({objective['description']}): {compliance_text} | "
+                      f"presupuesto gastado {objective['budget_consumed_percent']:.0f}%")
+            print(f"   🚨 Alertas emitidas: {summary['slo']['alerts_emitted']}"
+                  + (f" | activas al terminar: {', '.join(summary['slo']['firing_at_end'])}"
+                     if summary['slo']['firing_at_end'] else ""))
+
+class FleetMonitor(PerformanceMonitor):
+    """Varias réplicas desde un solo proceso: vista por réplica y vista agregada de la flota.
+
+    Todas las réplicas comparten la sesión HTTP y el pool de sondas, y se muestrean a la vez:
+    un tick dura lo que la réplica más lenta, no la suma de todas.
+    """
+    
+    def __init__(self, base_urls, interval=2, source="probe", read_only=False, window=60, log_writer=None,
+                 slo=None):
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=len(base_urls), pool_maxsize=4)
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        probes_per_replica = 2 if source == "metrics" or read_only else 3
+        executor = ThreadPoolExecutor(max_workers=probes_per_replica * len(base_urls))
+        super().__init__(", ".join(base_urls), interval, source, read_only, window,
+                         log_writer=log_writer, session=session, executor=executor, slo=slo)
+        self.replicas = [
+            PerformanceMonitor(url, interval, source, read_only, window,
+                               session=session, executor=executor, system_stats=False)
+            for url in base_urls
+        ]
+        self.replica_executor = ThreadPoolExecutor(max_workers=len(base_urls))
+    
+    def sample(self):
+        """Muestrear todas las réplicas en paralelo y combinar sus resultados"""
+        system_stats = self.get_system_stats()
+        for replica in self.replicas:
+            replica.start_time = replica.start_time or self.start_time
+        futures = [self.replica_executor.submit(replica.sample) for replica in self.replicas]
+        
+        replicas = {}
+        window_sketch = DDSketch()
+        total_sketch = DDSketch()
+        latencies = []
+        fleet_rps = 0
+        for replica, future in zip(self.replicas, futures):
+            stats = future.result()
+            window = replica.latency_window.snapshot()
+            # Los sketches se combinan sin perder precisión: percentiles de toda la flota
+            window_sketch.merge(window)
+            total_sketch.merge(replica.latency_total)
+            stats["rps"] = replica.interval_rps(stats)
+            stats["latency_percentiles"] = window.percentiles()
+            stats["success_rate"] = (replica.successful_requests / replica.total_requests * 100
+                                     if replica.total_requests else 0)
+            fleet_rps += stats["rps"]
+            if stats["spin_response_time_ms"] is not None:
+                latencies.append(stats["spin_response_time_ms"])
+            replicas[replica.base_url] = stats
+        
+        self.latency_total = total_sketch
+        self.total_requests = sum(replica.total_requests for replica in self.replicas)
+        self.successful_requests = sum(replica.successful_requests for replica in self.replicas)
+        self.failed_requests = sum(replica.failed_requests for replica in self.replicas)
+        if latencies:
+            self.response_times.append(sum(latencies) / len(latencies))
+        
+        current_stats = {
+            "timestamp": datetime.now().isoformat(),
+            "health_ok": all(stats["health_ok"] for stats in replicas.values()),
+            # Latencia media de las réplicas en este tick (compatible con timeseries_log)
+            "spin_response_time_ms": sum(latencies) / len(latencies) if latencies else None,
+            "spin_success": all(stats["spin_success"] for stats in replicas.values()),
+            "system_stats": system_stats,
+            "fleet": {
+                "replicas": len(replicas),
+                "healthy": sum(1 for stats in replicas.values() if stats["health_ok"]),
+                "rps": fleet_rps,
+                "success_rate": self.successful_requests / self.total_requests * 100 if self.total_requests else 0,
+                "latency_percentiles": window_sketch.percentiles(),
+                "latency_percentiles_total": total_sketch.percentiles()
+            },
+            "replicas": replicas
+        }
+        self.stats_history.append(current_stats)
+        if len(self.stats_history) > 100:
+            self.stats_history.pop(0)
+        return current_stats
+    
+    def slo_events(self, current_stats):
+        """Eventos de toda la flota: la suma de los de cada réplica"""
+        events = [replica.slo_events(current_stats["replicas"][replica.base_url]) for replica in self.replicas]
+        availability = (sum(good for (good, _), _ in events), sum(total for (_, total), _ in events))
+        
+        def latency_events(threshold_ms):
+            counts = [latency(threshold_ms) for _, latency in events]
+            return sum(good for good, _ in counts), sum(total for _, total in counts)
+        return availability, latency_events
+    
+    def display_stats(self, current_stats):
+        """Una línea por réplica y la vista agregada de la flota"""
+        self.clear_screen()
+        fleet = current_stats["fleet"]
+        
+        print("🎰 MONITOR DE RENDIMIENTO - FLOTA DE RÉPLICAS")
+        print("=" * 90)
+        print(f"🕐 Hora actual: {datetime.now().strftime('%H:%M:%S')} | 📊 Intervalo: {self.interval} segundos")
+        if self.read_only:
+            print("🔒 Modo solo lectura: no se llama a /api/spin")
+        print("-" * 90)
+        
+        print(f"🖧  RÉPLICAS ({fleet['healthy']}/{fleet['replicas']} funcionando):")
+        print(f"   {'':2} {'URL':<32} {'Actual':>9} {'P50':>8} {'P95':>8} {'P99':>8} {'RPS':>8} {'Éxito':>7}")
+        for url, stats in current_stats["replicas"].items():
+            marker = "✅" if stats["health_ok"] else "❌"
+            latency = stats["spin_response_time_ms"]
+            latency_text = f"{latency:7.1f}ms" if latency is not None else f"{'-':>9}"
+            percentiles = stats["latency_percentiles"]
+            print(f"   {marker} {url:<32} {latency_text} {percentiles['p50']:6.1f}ms {percentiles['p95']:6.1f}ms "
+                  f"{percentiles['p99']:6.1f}ms {stats['rps']:8.1f} {stats['success_rate']:6.1f}%")
+            if "error" in stats:
+                print(f"      Error: {stats['error']}")
+        
+        print("\n🌐 FLOTA:")
+        rps_status = "🔴 CRÍTICO" if fleet["rps"] == 0 else "🟢 EXCELENTE" if fleet["rps"] >= 10 else "🟡 BUENO" if fleet["rps"] >= 1 else "🟠 ACEPTABLE"
+        print(f"   🚀 Throughput total: {fleet['rps']:.2f} RPS - {rps_status}")
+        success_status = self.get_status_indicator(100 - fleet["success_rate"], {
+            "excellent": 1, "good": 5, "acceptable": 10
+        })
+        print(f"   ✅ Disponibilidad: {fleet['success_rate']:.1f}% - {success_status} "
+              f"({self.successful_requests}/{self.total_requests} requests)")
+        percentiles = fleet["latency_percentiles"]
+        print(f"   📈 Últimos {self.window:.0f}s: P50: {percentiles['p50']:.1f}ms | P95: {percentiles['p95']:.1f}ms | P99: {percentiles['p99']:.1f}ms")
+        percentiles = fleet["latency_percentiles_total"]
+        print(f"   📈 Sesión:      P50: {percentiles['p50']:.1f}ms | P95: {percentiles['p95']:.1f}ms | P99: {percentiles['p99']:.1f}ms")
+        
+        system_stats = current_stats.get("system_stats", {})
+        if system_stats:
+            print(f"\n💻 Host del monitor: CPU {system_stats['cpu_percent']:.1f}% | RAM {system_stats['memory_percent']:.1f}%")
+        
+        if self.slo is not None:
+            self.slo.display()
+        
+        print("\n" + "-" * 90)
+        print("💡 Presiona Ctrl+C para detener el monitoreo y guardar reporte")
+        print("=" * 90)
+    
+    def session_summary(self):
+        summary = super().session_summary()
+        if summary:
+            summary["replicas"] = {replica.base_url: replica.session_summary() for replica in self.replicas}
+        return summary
+    
+    def print_summary(self, summary):
+        super().print_summary(summary)
+        print("\n🖧  POR RÉPLICA:")
+        for url, replica_summary in summary["replicas"].items():
+            if replica_summary is None:
+                print(f"   ❌ {url}: sin respuestas")
+                continue
+            percentiles = replica_summary["latency_percentiles_ms"]
+            print(f"   {url}: {replica_summary['total_requests']} requests | éxito {replica_summary['success_rate_percent']:.1f}% | "
+                  f"P50 {percentiles['p50']:.2f}ms | P95 {percentiles['p95']:.2f}ms | P99 {percentiles['p99']:.2f}ms")
+    
+    def stop_monitoring(self):
+        self.replica_executor.shutdown(wait=False)
+        super().stop_monitoring()
 
 def main():
     parser = argparse.ArgumentParser(description='Monitor de rendimiento avanzado para Ruleta Virtual')
-    parser.add_argument('--url', default='http://localhost:5000', 
-                       help='URL base del servidor')
-    parser.add_argument('--interval', type=int, default=2,
-                       help='Intervalo de monitoreo en segundos')
+    parser.add_argument('--url', nargs='+', default=['http://localhost:5000'],
+                       help='URL base del servidor; con varias URLs se monitorea la flota de réplicas')
+    parser.add_argument('--interval', type=float, default=2,
+                       help='Intervalo de monitoreo en segundos (admite fracciones, p.ej. 0.5)')
+    parser.add_argument('--source', choices=['probe', 'metrics'], default='probe',
+                       help='probe: medir con requests reales (incluye POST /api/spin); '
+                            'metrics: leer /metrics del servidor sin generar carga')
+    parser.add_argument('--read-only', action='store_true',
+                       help='No llamar nunca a /api/spin (la latencia se mide sobre /api/statistics)')
+    
+    parser.add_argument('--window', type=float, default=60,
+                       help='Ventana en segundos de los percentiles deslizantes')
+    
+    parser.add_argument('--pid', type=int,
+                       help='PID del servidor: muestrear su CPU, RSS, hilos, descriptores y cambios de contexto')
+    parser.add_argument('--cgroup', metavar='RUTA',
+                       help='Ruta de un cgroup v2 (p.ej. el del contenedor) para medir CPU frente a la cuota y throttling')
+    
+    parser.add_argument('--log-dir', default='.',
+                       help='Directorio del log continuo de muestras (JSONL)')
+    parser.add_argument('--log-max-mb', type=float, default=64,
+                       help='Tamaño a partir del cual se rota el log (los segmentos cerrados se comprimen)')
+    parser.add_argument('--log-flush', type=float, default=5,
+                       help='Segundos entre volcados a disco del log')
+    parser.add_argument('--no-log', action='store_true',
+                       help='No escribir el log continuo de muestras')
+    
+    parser.add_argument('--slo', nargs='?', const='', metavar='ARCHIVO.json',
+                       help='Evaluar objetivos de servicio y alertar por consumo del presupuesto '
+                            '(sin archivo: disponibilidad 99.5%% y 99%% de giros bajo 500ms)')
+    parser.add_argument('--alert-file', default='slo_alerts.jsonl',
+                       help='Archivo JSONL donde se escriben las alertas de SLO')
+    parser.add_argument('--alert-webhook', metavar='URL',
+                       help='Enviar además cada alerta de SLO por POST JSON a esta URL')
     
     args = parser.parse_args()
     
-    monitor = PerformanceMonitor(args.url, args.interval)
+    fleet = len(args.url) > 1
+    if fleet and (args.pid or args.cgroup):
+        print("❌ --pid y --cgroup solo se pueden usar con una única URL")
+        return
+    
+    resource_sampler = None
+    try:
+        if args.cgroup:
+            resource_sampler = CgroupSampler(args.cgroup)
+        elif args.pid:
+            resource_sampler = ProcessSampler(args.pid)
+    except Exception as e:
+        print(f"❌ No se puede muestrear el objetivo: {e}")
+        return
+    
+    slo = None
+    if args.slo is not None:
+        try:
+            config = load_config(args.slo or None)
+        except (OSError, ValueError, KeyError) as e:
+            print(f"❌ Configuración de SLO inválida: {e}")
+            return
+        sinks = [AlertFile(args.alert_file)]
+        if args.alert_webhook:
+            sinks.append(AlertWebhook(args.alert_webhook))
+        slo = SLOEngine(config, sinks)
+    
+    log_writer = None
+    if not args.no_log:
+        log_writer = TimeSeriesWriter("performance_log", args.log_dir, args.log_flush,
+                                      int(args.log_max_mb * 1024 * 1024))
+    
+    if fleet:
+        monitor = FleetMonitor(args.url, args.interval, args.source, args.read_only, args.window, log_writer, slo)
+    else:
+        monitor = PerformanceMonitor(args.url[0], args.interval, args.source, args.read_only, args.window,
+                                     resource_sampler, log_writer, slo=slo)
     
     print("🎰 Monitor de Rendimiento Avanzado - Ruleta Virtual")
     print("=" * 60)
-    print(f"🎯 Monitoreando: {args.url}")
+    print(f"🎯 Monitoreando: {', '.join(args.url)}")
     print(f"⏱️  Intervalo: {args.interval} segundos")
     
     # Verificar si psutil está disponible
@@ -470,15 +1028,19 @@ def main():
     
     print("\nPresiona Ctrl+C para detener\n")
     
-    # Verificar conectividad inicial
-    try:
-        response = requests.get(f"{args.url}/health", timeout=5)
-        if response.status_code == 200:
-            print("✅ Conexión inicial exitosa")
-        else:
-            print("⚠️  Servidor responde con errores")
-    except:
-        print("❌ No se puede conectar al servidor")
+    # Verificar conectividad inicial (con varias réplicas basta con que responda una)
+    reachable = 0
+    for url in args.url:
+        try:
+            response = requests.get(f"{url}/health", timeout=5)
+            reachable += 1
+            if response.status_code == 200:
+                print(f"✅ Conexión inicial exitosa: {url}")
+            else:
+                print(f"⚠️  Servidor responde con errores: {url}")
+        except:
+            print(f"❌ No se puede conectar a {url}")
+    if not reachable:
         print("   ¿Está ejecutándose el servidor?")
         return
     
@@ -0,0 +1,137 @@
+"""
+Sketches de cuantiles en streaming (DDSketch) para el monitor de rendimiento
+Memoria constante, error relativo acotado y combinables entre sí
+"""
+
+import math
+import time
+from collections import deque
+
+class DDSketch:
+    """Cuantiles con error relativo `relative_accuracy` usando buckets logarítmicos.
+
+    Cada valor cae en el bucket ceil(log_gamma(valor)); añadir es O(1) y el número de
+    buckets depende del rango de valores, no de cuántos se observan.
+    """
+
+    MIN_VALUE = 1e-9
+
+    def __init__(self, relative_accuracy=0.01, max_buckets=2048):
+        self.relative_accuracy = relative_accuracy
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self.log_gamma = math.log(self.gamma)
+        self.max_buckets = max_buckets
+        self.bins = {}
+        self.zero_count = 0
+        self.count = 0
+        self.sum = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def add(self, value, count=1):
+        """Añadir `count` observaciones de `value` (p.ej. un bucket de un histograma del servidor)"""
+        if value <= self.MIN_VALUE:
+            self.zero_count += count
+        else:
+            key = math.ceil(math.log(value) / self.log_gamma)
+            self.bins[key] = self.bins.get(key, 0) + count
+            if len(self.bins) > self.max_buckets:
+                self.collapse_lowest()
+        self.count += count
+        self.sum += value * count
+        if value < self.min:
+            self.min = value
+        if value > self.max:
+            self.max = value
+
+    def add_many(self, observations, total=None):
+        """Añadir pares (valor, cuenta), p.ej. los buckets de un histograma en su valor representativo.
+
+        `total` es la suma exacta de esas observaciones si se conoce: la media no depende entonces
+        de los valores representativos.
+        """
+        approximate = 0.0
+        for value, count in observations:
+            self.add(value, count)
+            approximate += value * count
+        if total is not None:
+            self.sum += total - approximate
+
+    def collapse_lowest(self):
+        """Unir los buckets más bajos hasta dejar 7/8 de `max_buckets`: se pierde precisión solo en
+        la cola inferior y el orden se calcula una vez por lote, no en cada valor añadido"""
+        keys = sorted(self.bins)
+        drop = len(keys) - max(1, self.max_buckets * 7 // 8)
+        target = keys[drop]
+        for key in keys[:drop]:
+            self.bins[target] += self.bins.pop(key)
+
+    def merge(self, other):
+        if other.gamma != self.gamma:
+            raise ValueError("Solo se pueden combinar sketches con la misma precisión")
+        for key, count in other.bins.items():
+            self.bins[key] = self.bins.get(key, 0) + count
+        if len(self.bins) > self.max_buckets:
+            self.collapse_lowest()
+        self.zero_count += other.zero_count
+        self.count += other.count
+        self.sum += other.sum
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        return self
+
+    def quantile(self, q):
+        if self.count == 0:
+            return 0
+        rank = q * (self.count - 1)
+        if rank < self.zero_count:
+            return 0
+        cumulative = self.zero_count
+        for key in sorted(self.bins):
+            cumulative += self.bins[key]
+            if cumulative > rank:
+                # Punto medio del bucket: error relativo <= relative_accuracy
+                value = 2 * self.gamma ** key / (self.gamma + 1)
+                return min(max(value, self.min), self.max)
+        return self.max
+
+    def percentiles(self):
+        return {
+            "p50": self.quantile(0.50),
+            "p95": self.quantile(0.95),
+            "p99": self.quantile(0.99)
+        }
+
+    @property
+    def average(self):
+        return self.sum / self.count if self.count else 0
+
+class SlidingWindowSketch:
+    """Vista de ventana deslizante: un DDSketch por porción de tiempo, combinados al consultar"""
+
+    def __init__(self, window_seconds=60, slices=6, relative_accuracy=0.01):
+        self.window_seconds = window_seconds
+        self.slice_count = slices
+        self.slice_seconds = window_seconds / slices
+        self.relative_accuracy = relative_accuracy
+        self.slices = deque()
+
+    def expire(self, now):
+        current = int(now // self.slice_seconds)
+        while self.slices and current - self.slices[0][0] >= self.slice_count:
+            self.slices.popleft()
+        return current
+
+    def add(self, value, now=None, count=1):
+        current = self.expire(time.monotonic() if now is None else now)
+        if not self.slices or self.slices[-1][0] != current:
+            self.slices.append((current, DDSketch(self.relative_accuracy)))
+        self.slices[-1][1].add(value, count)
+
+    def snapshot(self, now=None):
+        """DDSketch con los valores de la ventana actual"""
+        self.expire(time.monotonic() if now is None else now)
+        merged = DDSketch(self.relative_accuracy)
+        for _, sketch in self.slices:
+            merged.merge(sketch)
+        return merged
@@ -0,0 +1,165 @@
+"""
+Motor de carga ligero para la Ruleta Virtual (HTTP/1.1 sobre asyncio streams)
+Pensado para pruebas de throughput máximo: requests pre-codificadas,
+pipelining opcional y parseo mínimo de respuestas (línea de estado + Content-Length)
+"""
+
+import asyncio
+import json
+import time
+from array import array
+from collections import deque
+from urllib.parse import urlsplit
+
+CONTENT_LENGTH = b"\r\ncontent-length:"
+CONNECTION_CLOSE = b"\r\nconnection: close"
+# Margen tras el deadline para recibir las respuestas en vuelo; ninguna lectura espera más allá
+DRAIN_TIMEOUT = 2.0
+
+class RawHTTPEngine:
+    def __init__(self, base_url="http://localhost:5000", connections=50, pipeline=1, validate=False, live=None):
+        parts = urlsplit(base_url)
+        self.host = parts.hostname or "localhost"
+        self.port = parts.port or 80
+        self.host_header = parts.netloc or self.host
+        self.connections = connections
+        self.pipeline = max(1, pipeline)
+        self.validate = validate
+        self.live = live
+        # Se desactiva si el servidor cierra la conexión tras cada respuesta
+        self.keep_alive_supported = True
+        self.stats = {
+            "total_requests": 0,
+            "successful_requests": 0,
+            "failed_requests": 0
+        }
+        # Latencias en ms en un array tipado: sin un objeto float por muestra
+        self.latencies = array('d')
+
+    def encode_request(self, method, path):
+        """Pre-codificar una request para reutilizar los mismos bytes en cada envío"""
+        return (
+            f"{method} {path} HTTP/1.1\r\n"
+            f"Host: {self.host_header}\r\n"
+            "Content-Length: 0\r\n"
+            "\r\n"
+        ).encode("ascii")
+
+    async def read_response(self, reader, read_deadline):
+        """Leer una respuesta parseando solo la línea de estado y Content-Length.
+
+        Cada lectura espera como mucho hasta `read_deadline`; si vence lanza asyncio.TimeoutError.
+        """
+        def remaining():
+            return max(0.0, read_deadline - time.perf_counter())
+
+        head = await asyncio.wait_for(reader.readuntil(b"\r\n\r\n"), remaining())
+        status = int(head[9:12])
+        lower = head.lower()
+        index = lower.find(CONTENT_LENGTH)
+        if index >= 0:
+            end = lower.index(b"\r\n", index + 2)
+            length = int(head[index + len(CONTENT_LENGTH):end])
+            body = await asyncio.wait_for(reader.readexactly(length), remaining()) if length else b""
+            keep_alive = CONNECTION_CLOSE not in lower
+        else:
+            # Sin Content-Length el cuerpo termina al cerrarse la conexión
+            body = await asyncio.wait_for(reader.read(), remaining())
+            keep_alive = False
+        return status, body, keep_alive
+
+    def is_success(self, status, body):
+        """Validar la respuesta; el cuerpo solo se parsea si la validación está activa"""
+        if status >= 400:
+            return False
+        if not self.validate:
+            return True
+        try:
+            return json.loads(body).get("success", True) is not False
+        except ValueError:
+            return False
+
+    def record(self, success, latency_ms=None):
+        self.stats["total_requests"] += 1
+        if success:
+            self.stats["successful_requests"] += 1
+        else:
+            self.stats["failed_requests"] += 1
+        if latency_ms is not None:
+            self.latencies.append(latency_ms)
+        if self.live is not None:
+            self.live.record(latency_ms, success)
+
+    async def connection_worker(self, request_bytes, deadline):
+        """Mantener una conexión con hasta `pipeline` requests en vuelo hasta el deadline"""
+        reader = writer = None
+        sent_at = deque()
+
+        while True:
+            now = time.perf_counter()
+            if now >= deadline and not sent_at:
+                break
+
+            if writer is None:
+                if now >= deadline:
+                    break
+                try:
+                    reader, writer = await asyncio.open_connection(self.host, self.port)
+                except OSError:
+                    self.record(False)
+                    await asyncio.sleep(0.1)
+                    continue
+
+            try:
+                # Rellenar el pipeline mientras quede tiempo
+                depth = self.pipeline if self.keep_alive_supported else 1
+                if now < deadline and len(sent_at) < depth:
+                    missing = depth - len(sent_at)
+                    writer.write(request_bytes * missing)
+                    sent_at.extend([now] * missing)
+                    await writer.drain()
+
+                status, body, keep_alive = await self.read_response(reader, deadline + DRAIN_TIMEOUT)
+            except (OSError, ValueError, asyncio.IncompleteReadError, asyncio.LimitOverrunError,
+                    asyncio.TimeoutError):
+                # Las requests sin respuesta cuentan como fallidas y se reconecta
+                for _ in sent_at:
+                    self.record(False)
+                sent_at.clear()
+                writer.close()
+                writer = None
+                continue
+
+            started = sent_at.popleft()
+            self.record(self.is_success(status, body), (time.perf_counter() - started) * 1000)
+
+            if not keep_alive:
+                # El servidor no procesó las requests encoladas detrás: se descartan
+                # sin contarlas y se dejan de encolar en conexiones nuevas
+                if sent_at:
+                    self.keep_alive_supported = False
+                sent_at.clear()
+                writer.close()
+                writer = None
+
+        if writer is not None:
+            writer.close()
+
+    async def run(self, method="POST", path="/api/spin", duration=10):
+        """Lanzar `connections` conexiones en bucle cerrado durante `duration` segundos"""
+        request_bytes = self.encode_request(method, path)
+        deadline = time.perf_counter() + duration
+        tasks = [self.connection_worker(request_bytes, deadline) for _ in range(self.connections)]
+        await asyncio.gather(*tasks)
+        return self.stats
+
+    def latency_percentiles(self):
+        """Percentiles de latencia (ms) de todas las respuestas recibidas"""
+        if not self.latencies:
+            return {"p50": 0, "p95": 0, "p99": 0}
+        sorted_data = sorted(self.latencies)
+        n = len(sorted_data)
+        return {
+            f"p{p}": sorted_data[min(n - 1, int(n * p / 100))]
+            for p in (50, 95, 99)
+        }
@@ -0,0 +1,361 @@
+"""
+Análisis de regresiones de rendimiento entre corridas
+Compara resultados de simple_traffic.py (traffic_test_*.json) y de performance_monitor.py
+(performance_log_*.json / .jsonl) agrupados por escenario, con intervalos de confianza bootstrap
+"""
+
+import argparse
+import glob
+import json
+import os
+import random
+import sys
+from datetime import datetime
+
+from timeseries_log import iter_samples
+
+LATENCY_METRICS = ("p50", "p95", "p99", "mean")
+
+def percentile(sorted_values, p):
+    n = len(sorted_values)
+    return sorted_values[min(n - 1, int(n * p / 100))] if n else 0
+
+def latency_statistics(values):
+    """P50, P95, P99 y media de una lista de latencias"""
+    sorted_values = sorted(values)
+    return {
+        "p50": percentile(sorted_values, 50),
+        "p95": percentile(sorted_values, 95),
+        "p99": percentile(sorted_values, 99),
+        "mean": sum(sorted_values) / len(sorted_values) if sorted_values else 0
+    }
+
+def monitor_scenario(samples):
+    """Escenario de un log del monitor según lo que contienen sus muestras"""
+    if any("fleet" in sample for sample in samples):
+        return "monitor:fleet"
+    if any("server_metrics" in sample for sample in samples):
+        return "monitor:metrics"
+    if any(sample.get("latency_probe") == "/api/statistics" for sample in samples):
+        return "monitor:read-only"
+    return "monitor:probe"
+
+def monitor_run(path, samples, interval=None, timestamp=None):
+    latencies = [s["spin_response_time_ms"] for s in samples if s.get("spin_response_time_ms") is not None]
+    if interval is None:
+        # Intervalo de muestreo: mediana de la separación entre marcas de tiempo
+        gaps = sorted(b["ts"] - a["ts"] for a, b in zip(samples, samples[1:]) if "ts" in a and "ts" in b)
+        interval = gaps[len(gaps) // 2] if gaps else 1
+    # Throughput real del servidor solo con --source metrics (en modo sonda es el ritmo del monitor)
+    rps_series = [s["server_metrics"]["interval_requests"] / interval for s in samples if s.get("server_metrics")]
+    return {
+        "path": path,
+        "scenario": monitor_scenario(samples),
+        "timestamp": timestamp or (samples[0].get("timestamp") if samples else None),
+        "latencies": latencies,
+        "rps_series": rps_series,
+        "requests": len(samples),
+        "failures": sum(1 for s in samples if not s.get("spin_success"))
+    }
+
+def load_run(path, consumed):
+    """Cargar un archivo de resultados como corrida: latencias, serie de RPS y errores"""
+    if '.jsonl' in os.path.basename(path):
+        samples = list(iter_samples([path]))
+        return monitor_run(path, samples)
+
+    with open(path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+
+    if "history" in data:
+        # Log del monitor: el historial guarda solo 100 muestras; la serie JSONL tiene todas
+        segments = [p for p in data.get("timeseries_log", []) if os.path.exists(p) or os.path.exists(p + '.gz')]
+        segments = [p if os.path.exists(p) else p + '.gz' for p in segments]
+        samples = list(iter_samples(segments)) if segments else data["history"]
+        consumed.update(os.path.abspath(p) for p in segments)
+        run = monitor_run(path, samples, data.get("interval_seconds"), data.get("start_time"))
+        summary = data.get("summary")
+        if summary:
+            run["requests"] = summary["total_requests"]
+            run["failures"] = summary["total_requests"] - summary["successful_requests"]
+        return run
+
+    return {
+        "path": path,
+        "scenario": f"traffic:{data.get('level') or 'desconocido'}",
+        "timestamp": data.get("timestamp"),
+        "latencies": data.get("latency_samples_ms", []),
+        "rps_series": data.get("throughput_per_second") or [data.get("requests_per_second", 0)],
+        "requests": data.get("total_requests", 0),
+        "failures": data.get("failed_requests", 0)
+    }
+
+def expand_paths(patterns):
+    paths = []
+    for pattern in patterns:
+        paths += sorted(glob.glob(pattern)) or [pattern]
+    return paths
+
+def load_runs(patterns):
+    """Cargar corridas; los segmentos JSONL ya incluidos por su log .json no se cuentan dos veces"""
+    paths = expand_paths(patterns)
+    consumed = set()
+    runs = []
+    # Primero los .json: declaran qué segmentos JSONL les pertenecen
+    for path in sorted(paths, key=lambda p: '.jsonl' in p):
+        if os.path.abspath(path) in consumed:
+            continue
+        try:
+            runs.append(load_run(path, consumed))
+        except (OSError, ValueError, KeyError) as e:
+            print(f"⚠️  Se omite {path}: {e}")
+    return runs
+
+def resample(values, rng, block=1):
+    """Remuestreo con reemplazo; con block > 1, por bloques móviles (series autocorrelacionadas)"""
+    n = len(values)
+    if block <= 1:
+        return rng.choices(values, k=n)
+    result = []
+    while len(result) < n:
+        start = rng.randrange(n - block + 1)
+        result.extend(values[start:start + block])
+    return result[:n]
+
+def resample_runs(runs, rng, blocks=False):
+    """Remuestreo jerárquico: corridas con reemplazo y luego los valores de cada una.
+
+    La corrida es la unidad: la variación entre corridas entra en el intervalo en vez de tratar
+    todos los valores como independientes. Con `blocks`, dentro de cada corrida se remuestrea por
+    bloques móviles de ~n^(1/3) valores (series autocorrelacionadas).
+    """
+    result = []
+    for values in rng.choices(runs, k=len(runs)):
+        block = max(1, round(len(values) ** (1 / 3))) if blocks else 1
+        result.extend(resample(values, rng, block))
+    return result
+
+def subsample_runs(runs, max_samples, rng):
+    """Como mucho `max_samples` valores en total, repartidos por igual entre las corridas"""
+    per_run = max(1, max_samples // len(runs))
+    return [rng.sample(values, per_run) if len(values) > per_run else values for values in runs]
+
+def relative_change(candidate, baseline):
+    return (candidate - baseline) / baseline * 100 if baseline else 0
+
+def bootstrap_changes(baseline, candidate, statistics, resamples, confidence, rng, blocks=False):
+    """Cambio relativo (%) observado e intervalo de confianza bootstrap de cada estadístico.
+
+    `baseline` y `candidate` son listas de corridas, cada una con su lista de valores.
+    """
+    observed_baseline = statistics([v for values in baseline for v in values])
+    observed_candidate = statistics([v for values in candidate for v in values])
+    draws = {name: [] for name in observed_baseline}
+    for _ in range(resamples):
+        stats_baseline = statistics(resample_runs(baseline, rng, blocks))
+        stats_candidate = statistics(resample_runs(candidate, rng, blocks))
+        for name in draws:
+            draws[name].append(relative_change(stats_candidate[name], stats_baseline[name]))
+
+    alpha = (1 - confidence) / 2
+    changes = {}
+    for name, values in draws.items():
+        values.sort()
+        changes[name] = {
+            "baseline": observed_baseline[name],
+            "candidate": observed_candidate[name],
+            "change_percent": relative_change(observed_candidate[name], observed_baseline[name]),
+            "ci_low": values[int(alpha * resamples)],
+            "ci_high": values[min(resamples - 1, int((1 - alpha) * resamples))]
+        }
+    return changes
+
+def verdict(change, threshold, higher_is_worse=True):
+    """Regresión solo si todo el intervalo de confianza supera el umbral"""
+    low, high = change["ci_low"], change["ci_high"]
+    if not higher_is_worse:
+        low, high = -high, -low
+    if low > threshold:
+        return "regression"
+    if high < -threshold:
+        return "improvement"
+    if low > 0 or high < 0:
+        return "changed"  # Cambio real pero dentro del umbral
+    return "unchanged"
+
+def error_rate_change(baseline_runs, candidate_runs, confidence):
+    """Diferencia de la tasa de error en puntos porcentuales (aproximación normal)"""
+    n1 = sum(run["requests"] for run in baseline_runs)
+    n2 = sum(run["requests"] for run in candidate_runs)
+    if not n1 or not n2:
+        return None
+    p1 = sum(run["failures"] for run in baseline_runs) / n1
+    p2 = sum(run["failures"] for run in candidate_runs) / n2
+    z = {0.90: 1.645, 0.95: 1.96, 0.99: 2.576}.get(confidence, 1.96)
+    margin = z * (p1 * (1 - p1) / n1 + p2 * (1 - p2) / n2) ** 0.5 * 100
+    difference = (p2 - p1) * 100
+    return {
+        "baseline": p1 * 100,
+        "candidate": p2 * 100,
+        "change_points": difference,
+        "ci_low": difference - margin,
+        "ci_high": difference + margin
+    }
+
+def compare(baseline_runs, candidate_runs, args, rng):
+    """Comparar latencia, throughput y errores de dos grupos de corridas del mismo escenario"""
+    result = {
+        "baseline_runs": [run["path"] for run in baseline_runs],
+        "candidate_runs": [run["path"] for run in candidate_runs],
+        "latency": None,
+        "throughput": None,
+        "error_rate": None,
+        "verdicts": {}
+    }
+
+    baseline_latencies = [run["latencies"] for run in baseline_runs if run["latencies"]]
+    candidate_latencies = [run["latencies"] for run in candidate_runs if run["latencies"]]
+    if (sum(map(len, baseline_latencies)) >= args.min_samples
+            and sum(map(len, candidate_latencies)) >= args.min_samples):
+        # Submuestra uniforme por corrida para acotar el coste del bootstrap
+        baseline_latencies = subsample_runs(baseline_latencies, args.max_samples, rng)
+        candidate_latencies = subsample_runs(candidate_latencies, args.max_samples, rng)
+        result["latency"] = bootstrap_changes(baseline_latencies, candidate_latencies, latency_statistics,
+                                              args.resamples, args.confidence, rng)
+        for name in LATENCY_METRICS:
+            result["verdicts"][f"latency_{name}"] = verdict(result["latency"][name], args.latency_threshold)
+
+    baseline_rps = [run["rps_series"] for run in baseline_runs if run["rps_series"]]
+    candidate_rps = [run["rps_series"] for run in candidate_runs if run["rps_series"]]
+    if sum(map(len, baseline_rps)) >= 3 and sum(map(len, candidate_rps)) >= 3:
+        # Bloques dentro de cada corrida: conservan la autocorrelación de la serie
+        result["throughput"] = bootstrap_changes(
+            baseline_rps, candidate_rps, lambda values: {"rps": sum(values) / len(values)},
+            args.resamples, args.confidence, rng, blocks=True)["rps"]
+        result["verdicts"]["throughput"] = verdict(result["throughput"], args.throughput_threshold,
+                                                   higher_is_worse=False)
+
+    errors = error_rate_change(baseline_runs, candidate_runs, args.confidence)
+    if errors is not None:
+        result["error_rate"] = errors
+        if errors["ci_low"] > args.error_threshold:
+            result["verdicts"]["error_rate"] = "regression"
+        elif errors["ci_high"] < -args.error_threshold:
+            result["verdicts"]["error_rate"] = "improvement"
+        else:
+            result["verdicts"]["error_rate"] = "unchanged"
+    return result
+
+def run_time(run):
+    try:
+        return datetime.fromisoformat(run["timestamp"]).timestamp()
+    except (TypeError, ValueError):
+        return os.path.getmtime(run["path"])
+
+def group_by_scenario(runs):
+    scenarios = {}
+    for run in sorted(runs, key=run_time):
+        scenarios.setdefault(run["scenario"], []).append(run)
+    return scenarios
+
+VERDICT_LABELS = {
+    "regression": "🔴 REGRESIÓN",
+    "improvement": "🟢 MEJORA",
+    "changed": "🟡 cambio dentro del umbral",
+    "unchanged": "⚪ sin cambio significativo"
+}
+
+def print_comparison(scenario, comparison, confidence):
+    print(f"\n🎯 Escenario: {scenario}")
+    print(f"   Base: {len(comparison['baseline_runs'])} corrida(s) | Candidata: {len(comparison['candidate_runs'])} corrida(s)")
+    level = f"IC {confidence * 100:.0f}%"
+
+    if comparison["latency"]:
+        print(f"   ⚡ Latencia (ms)        base | candidata |  cambio | {level}")
+        for name in LATENCY_METRICS:
+            change = comparison["latency"][name]
+            print(f"      {name.upper():<8} {change['baseline']:12.2f} | {change['candidate']:9.2f} | "
+                  f"{change['change_percent']:+6.1f}% | [{change['ci_low']:+6.1f}%, {change['ci_high']:+6.1f}%] "
+                  f"{VERDICT_LABELS[comparison['verdicts'][f'latency_{name}']]}")
+    else:
+        print("   ⚡ Latencia: muestras insuficientes")
+
+    throughput = comparison["throughput"]
+    if throughput:
+        print(f"   🚀 Throughput: {throughput['baseline']:.2f} → {throughput['candidate']:.2f} RPS "
+              f"({throughput['change_percent']:+.1f}%, {level} [{throughput['ci_low']:+.1f}%, {throughput['ci_high']:+.1f}%]) "
+              f"{VERDICT_LABELS[comparison['verdicts']['throughput']]}")
+
+    errors = comparison["error_rate"]
+    if errors:
+        print(f"   ❌ Tasa de error: {errors['baseline']:.2f}% → {errors['candidate']:.2f}% "
+              f"({errors['change_points']:+.2f} pp, {level} [{errors['ci_low']:+.2f}, {errors['ci_high']:+.2f}]) "
+              f"{VERDICT_LABELS[comparison['verdicts']['error_rate']]}")
+
+def main():
+    parser = argparse.ArgumentParser(description='Detección de regresiones de rendimiento entre corridas')
+    parser.add_argument('files', nargs='+',
+                       help='Resultados a analizar (admite comodines, p.ej. "traffic_test_*.json")')
+    parser.add_argument('--baseline', nargs='+',
+                       help='Corridas de referencia; sin esta opción se compara la última corrida de '
+                            'cada escenario con las anteriores')
+    parser.add_argument('--latency-threshold', type=float, default=10,
+                       help='Aumento de latencia (%%) a partir del cual hay regresión')
+    parser.add_argument('--throughput-threshold', type=float, default=10,
+                       help='Caída de throughput (%%) a partir de la cual hay regresión')
+    parser.add_argument('--error-threshold', type=float, default=1,
+                       help='Aumento de la tasa de error (puntos porcentuales) a partir del cual hay regresión')
+    parser.add_argument('--confidence', type=float, default=0.95, help='Nivel de confianza de los intervalos')
+    parser.add_argument('--resamples', type=int, default=1000, help='Remuestreos bootstrap')
+    parser.add_argument('--min-samples', type=int, default=30,
+                       help='Latencias mínimas por grupo para compararlas')
+    parser.add_argument('--max-samples', type=int, default=5000,
+                       help='Latencias por grupo usadas en el bootstrap (submuestra uniforme)')
+    parser.add_argument('--seed', type=int, default=0, help='Semilla del bootstrap (resultados reproducibles)')
+    parser.add_argument('--output', help='Guardar el análisis en un archivo JSON')
+
+    args = parser.parse_args()
+    rng = random.Random(args.seed)
+
+    candidates = group_by_scenario(load_runs(args.files))
+    baselines = group_by_scenario(load_runs(args.baseline)) if args.baseline else None
+
+    print("🔍 ANÁLISIS DE REGRESIONES DE RENDIMIENTO")
+    print("=" * 70)
+
+    report = {"thresholds": {"latency_percent": args.latency_threshold,
+                             "throughput_percent": args.throughput_threshold,
+                             "error_rate_points": args.error_threshold},
+              "confidence": args.confidence,
+              "scenarios": {}}
+    regressions = []
+    for scenario, runs in candidates.items():
+        if baselines is not None:
+            baseline_runs, candidate_runs = baselines.get(scenario), runs
+        else:
+            baseline_runs, candidate_runs = runs[:-1], runs[-1:]
+        if not baseline_runs:
+            print(f"\n🎯 Escenario: {scenario} - sin corridas de referencia, se omite")
+            continue
+
+        comparison = compare(baseline_runs, candidate_runs, args, rng)
+        report["scenarios"][scenario] = comparison
+        print_comparison(scenario, comparison, args.confidence)
+        regressions += [f"{scenario}/{metric}" for metric, value in comparison["verdicts"].items()
+                        if value == "regression"]
+
+    report["regressions"] = regressions
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+        print(f"\n📁 Análisis guardado en: {args.output}")
+
+    print("\n" + "=" * 70)
+    if regressions:
+        print(f"🔴 {len(regressions)} regresión(es): {', '.join(regressions)}")
+        # Código de salida distinto de cero para bloquear una release en CI
+        sys.exit(1)
+    print("✅ Sin regresiones por encima de los umbrales")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,206 @@
+"""
+Captura cruda de cada request de los generadores de tráfico
+Instante de envío, endpoint, status, latencia y bytes en arrays tipados preasignados que un hilo
+vuelca en segundo plano a un directorio columnar: un archivo binario por columna más meta.json
+"""
+
+import json
+import math
+import os
+import queue
+import sys
+import threading
+import time
+from array import array
+from datetime import datetime
+import argparse
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# Columnas y typecodes de `array` (numpy entiende los mismos códigos al cargar)
+COLUMNS = (
+    ("sent_s", "d"),       # segundos desde el inicio de la captura (perf_counter)
+    ("latency_ms", "f"),   # NaN si no hubo respuesta
+    ("status", "H"),       # 0 si no hubo respuesta
+    ("bytes", "I"),        # tamaño del cuerpo recibido
+    ("endpoint", "H"),     # índice en meta.json["endpoints"]
+)
+
+CHUNK_SIZE = 65536
+MAX_ENDPOINTS = 65535
+OTHER_ENDPOINTS = "(otros)"
+
+class CaptureChunk:
+    """Un bloque de columnas preasignadas de CHUNK_SIZE muestras"""
+    __slots__ = ("columns",)
+
+    def __init__(self):
+        self.columns = tuple(array(typecode, bytes(array(typecode).itemsize * CHUNK_SIZE))
+                             for _, typecode in COLUMNS)
+
+class RequestCapture:
+    """Registro por request sin asignaciones en el camino caliente.
+
+    `record` escribe por índice en el bloque actual; al llenarse, el bloque pasa a la cola del hilo
+    de volcado y se toma uno libre. Un solo escritor a la vez: el generador async lo llama desde
+    su bucle y el de hilos desde dentro de su lock de estadísticas.
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+        self.endpoint_codes = {}
+        self.endpoints = []
+        self.free = [CaptureChunk(), CaptureChunk()]
+        self.pending = queue.Queue()
+        self.origin = None
+        self.started_at = None
+        self.count = 0
+        self.files = []
+        self.thread = None
+        self.take_chunk()
+
+    def take_chunk(self):
+        self.chunk = self.free.pop() if self.free else CaptureChunk()
+        self.sent, self.latency, self.status, self.size, self.endpoint = self.chunk.columns
+        self.index = 0
+
+    def begin(self):
+        """Abrir los archivos de columnas y arrancar el hilo de volcado"""
+        os.makedirs(self.directory, exist_ok=True)
+        self.files = [open(os.path.join(self.directory, f"{name}.bin"), "wb") for name, _ in COLUMNS]
+        self.origin = time.perf_counter()
+        self.started_at = datetime.now()
+        self.thread = threading.Thread(target=self.flush_loop, daemon=True)
+        self.thread.start()
+
+    def record(self, sent, endpoint, status, latency_ms, size):
+        """Registrar una request; `sent` es su time.perf_counter() de envío"""
+        code = self.endpoint_codes.get(endpoint)
+        if code is None:
+            code = self.register_endpoint(endpoint)
+        i = self.index
+        self.sent[i] = sent - self.origin
+        self.latency[i] = latency_ms if latency_ms is not None else math.nan
+        self.status[i] = status
+        self.size[i] = size
+        self.endpoint[i] = code
+        self.index = i + 1
+        if self.index == CHUNK_SIZE:
+            self.pending.put((self.chunk, CHUNK_SIZE))
+            self.count += CHUNK_SIZE
+            self.take_chunk()
+
+    def register_endpoint(self, endpoint):
+        # Rutas arbitrarias (p.ej. al reproducir trazas) no pueden agotar el tipo de la columna
+        if len(self.endpoints) >= MAX_ENDPOINTS - 1:
+            endpoint = OTHER_ENDPOINTS
+            if endpoint in self.endpoint_codes:
+                return self.endpoint_codes[endpoint]
+        code = len(self.endpoints)
+        self.endpoints.append(endpoint)
+        self.endpoint_codes[endpoint] = code
+        return code
+
+    def flush_loop(self):
+        while True:
+            item = self.pending.get()
+            if item is None:
+                break
+            chunk, length = item
+            for column, output in zip(chunk.columns, self.files):
+                if length == CHUNK_SIZE:
+                    column.tofile(output)
+                else:
+                    output.write(memoryview(column)[:length])
+            if length == CHUNK_SIZE:
+                self.free.append(chunk)
+
+    def end(self):
+        """Volcar el bloque parcial, esperar al hilo y escribir meta.json"""
+        if self.thread is None:
+            return
+        if self.index:
+            self.pending.put((self.chunk, self.index))
+            self.count += self.index
+        self.pending.put(None)
+        self.thread.join()
+        self.thread = None
+        for output in self.files:
+            output.close()
+        meta = {
+            "started_at": self.started_at.isoformat(),
+            "count": self.count,
+            "columns": {name: typecode for name, typecode in COLUMNS},
+            "byteorder": sys.byteorder,
+            "endpoints": self.endpoints
+        }
+        with open(os.path.join(self.directory, "meta.json"), "w", encoding="utf-8") as f:
+            json.dump(meta, f, indent=2, ensure_ascii=False)
+        print(f"📁 Captura de {self.count} requests guardada en: {self.directory}")
+
+def load_capture(directory, mmap=False):
+    """Cargar una captura: arrays de numpy si está instalado (memmap opcional), si no `array.array`.
+
+    Devuelve (columnas, endpoints). La lectura es una sola copia por columna, sin parseo.
+    """
+    with open(os.path.join(directory, "meta.json"), "r", encoding="utf-8") as f:
+        meta = json.load(f)
+    columns = {}
+    for name, typecode in meta["columns"].items():
+        path = os.path.join(directory, f"{name}.bin")
+        if np is not None:
+            dtype = np.dtype(typecode).newbyteorder("<" if meta["byteorder"] == "little" else ">")
+            columns[name] = (np.memmap(path, dtype=dtype, mode="r", shape=(meta["count"],)) if mmap and meta["count"]
+                             else np.fromfile(path, dtype=dtype, count=meta["count"]))
+        else:
+            values = array(typecode)
+            with open(path, "rb") as f:
+                values.fromfile(f, meta["count"])
+            if meta["byteorder"] != sys.byteorder:
+                values.byteswap()
+            columns[name] = values
+    return columns, meta["endpoints"]
+
+def summarize(columns, endpoints):
+    """Requests, errores y percentiles por endpoint (sin numpy, para revisar una captura rápido)"""
+    rows = {}
+    for endpoint_code, status, latency in zip(columns["endpoint"], columns["status"], columns["latency_ms"]):
+        row = rows.setdefault(endpoint_code, {"latencies": [], "errors": 0})
+        if status == 0 or status >= 400:
+            row["errors"] += 1
+        if not math.isnan(latency):
+            row["latencies"].append(float(latency))
+    summary = {}
+    for code, row in rows.items():
+        latencies = sorted(row["latencies"])
+        n = len(latencies)
+        summary[endpoints[code]] = {
+            "errors": row["errors"],
+            "responses": n,
+            **{f"p{p}": latencies[min(n - 1, int(n * p / 100))] if n else 0.0 for p in (50, 95, 99)}
+        }
+    return summary
+
+def main():
+    parser = argparse.ArgumentParser(description='Resumen de una captura cruda de requests')
+    parser.add_argument('directory', help='Directorio escrito con --capture')
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    columns, endpoints = load_capture(args.directory)
+    elapsed_ms = (time.perf_counter() - start) * 1000
+    count = len(columns["sent_s"])
+    print(f"📦 {count} requests cargadas en {elapsed_ms:.1f}ms ({'numpy' if np is not None else 'array'})")
+    if not count:
+        return
+    # Las muestras quedan en orden de finalización, no de envío
+    print(f"⏱️  Ventana: {float(max(columns['sent_s']) - min(columns['sent_s'])):.2f} segundos de envíos")
+    for endpoint, row in summarize(columns, endpoints).items():
+        print(f"   {endpoint:<28} respuestas {row['responses']:>8} | errores {row['errors']:>6} | "
+              f"P50 {row['p50']:.2f}ms | P95 {row['p95']:.2f}ms | P99 {row['p99']:.2f}ms")
+
+if __name__ == "__main__":
+    main()
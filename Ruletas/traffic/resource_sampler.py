@@ -0,0 +1,206 @@
+"""
+Muestreo de recursos de un proceso concreto o de un cgroup v2 (contenedor Docker)
+CPU propia, throttling por cuota, RSS, descriptores abiertos, hilos y cambios de contexto
+"""
+
+import os
+import time
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+def read_key_values(path):
+    """Leer un archivo 'clave valor' de cgroup (cpu.stat, memory.stat)"""
+    values = {}
+    with open(path, 'r') as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) == 2:
+                values[parts[0]] = int(parts[1])
+    return values
+
+def read_single_value(path):
+    """Leer un valor numérico de cgroup; None si es 'max' o no existe"""
+    try:
+        with open(path, 'r') as f:
+            value = f.read().strip()
+    except OSError:
+        return None
+    return None if value == 'max' else int(value)
+
+class ProcessCounters:
+    """Suma de hilos, descriptores y cambios de contexto de un conjunto de PIDs"""
+
+    def __init__(self):
+        self.previous = {}
+
+    def sample(self, pids):
+        threads = open_fds = 0
+        voluntary = involuntary = 0
+        cpu_seconds = 0.0
+        rss = 0
+        current = {}
+
+        for pid in pids:
+            try:
+                process = psutil.Process(pid)
+                with process.oneshot():
+                    times = process.cpu_times()
+                    switches = process.num_ctx_switches()
+                    threads += process.num_threads()
+                    rss += process.memory_info().rss
+                    open_fds += process.num_fds() if hasattr(process, 'num_fds') else process.num_handles()
+            except (psutil.NoSuchProcess, psutil.AccessDenied):
+                continue
+
+            now = (times.user + times.system, switches.voluntary, switches.involuntary)
+            # Un PID nuevo empieza a contar desde su primera observación
+            before = self.previous.get(pid, now)
+            current[pid] = now
+            cpu_seconds += now[0] - before[0]
+            voluntary += now[1] - before[1]
+            involuntary += now[2] - before[2]
+
+        self.previous = current
+        return {
+            "cpu_seconds": cpu_seconds,
+            "rss_bytes": rss,
+            "threads": threads,
+            "open_fds": open_fds,
+            "ctx_switches_voluntary": voluntary,
+            "ctx_switches_involuntary": involuntary
+        }
+
+class ProcessSampler:
+    """Recursos de un PID (y sus hijos, p.ej. los workers de un servidor con pre-fork)"""
+
+    def __init__(self, pid, include_children=True):
+        if psutil is None:
+            raise RuntimeError("El muestreo por PID requiere psutil (pip install psutil)")
+        self.process = psutil.Process(pid)
+        self.include_children = include_children
+        self.counters = ProcessCounters()
+        self.last_time = None
+        self.description = f"PID {pid}"
+
+    def pids(self):
+        pids = [self.process.pid]
+        if self.include_children:
+            try:
+                pids += [child.pid for child in self.process.children(recursive=True)]
+            except psutil.NoSuchProcess:
+                pass
+        return pids
+
+    def sample(self):
+        now = time.monotonic()
+        counters = self.counters.sample(self.pids())
+        elapsed = now - self.last_time if self.last_time else None
+        self.last_time = now
+
+        return {
+            "target": self.description,
+            # La primera muestra solo fija la referencia
+            "cpu_percent": counters["cpu_seconds"] / elapsed * 100 if elapsed else None,
+            "cpu_quota_cores": None,
+            "cpu_quota_percent": None,
+            "throttled_ratio": None,
+            "throttled_ms": None,
+            "rss_mb": counters["rss_bytes"] / (1024 * 1024),
+            "memory_limit_mb": None,
+            "threads": counters["threads"],
+            "open_fds": counters["open_fds"],
+            "ctx_switches_voluntary": counters["ctx_switches_voluntary"],
+            "ctx_switches_involuntary": counters["ctx_switches_involuntary"]
+        }
+
+class CgroupSampler:
+    """Recursos de un cgroup v2: uso frente a la cuota de CPU del contenedor y throttling"""
+
+    def __init__(self, path):
+        if not os.path.exists(os.path.join(path, 'cpu.stat')):
+            raise RuntimeError(f"{path} no parece un cgroup v2 (falta cpu.stat)")
+        self.path = path
+        self.counters = ProcessCounters() if psutil is not None else None
+        self.previous = None
+        self.description = f"cgroup {path}"
+
+    def file(self, name):
+        return os.path.join(self.path, name)
+
+    def cpu_quota_cores(self):
+        """Cores permitidos según cpu.max ('cuota período'); None si no hay límite"""
+        try:
+            with open(self.file('cpu.max'), 'r') as f:
+                quota, period = f.read().split()
+        except (OSError, ValueError):
+            return None
+        return None if quota == 'max' else int(quota) / int(period)
+
+    def pids(self):
+        try:
+            with open(self.file('cgroup.procs'), 'r') as f:
+                return [int(line) for line in f if line.strip()]
+        except OSError:
+            return []
+
+    def sample(self):
+        now = time.monotonic()
+        cpu_stat = read_key_values(self.file('cpu.stat'))
+        memory_stat = read_key_values(self.file('memory.stat')) if os.path.exists(self.file('memory.stat')) else {}
+        memory_limit = read_single_value(self.file('memory.max'))
+        quota_cores = self.cpu_quota_cores()
+
+        stats = {
+            "target": self.description,
+            "cpu_percent": None,
+            "cpu_quota_cores": quota_cores,
+            "cpu_quota_percent": None,
+            "throttled_ratio": None,
+            "throttled_ms": None,
+            # RSS del contenedor: memoria anónima (sin caché de archivos)
+            "rss_mb": memory_stat.get('anon', read_single_value(self.file('memory.current')) or 0) / (1024 * 1024),
+            "memory_limit_mb": memory_limit / (1024 * 1024) if memory_limit else None,
+            "threads": None,
+            "open_fds": None,
+            "ctx_switches_voluntary": None,
+            "ctx_switches_involuntary": None
+        }
+
+        if self.previous is not None:
+            before_time, before = self.previous
+            elapsed = now - before_time
+            usage_seconds = (cpu_stat.get('usage_usec', 0) - before.get('usage_usec', 0)) / 1e6
+            periods = cpu_stat.get('nr_periods', 0) - before.get('nr_periods', 0)
+            throttled = cpu_stat.get('nr_throttled', 0) - before.get('nr_throttled', 0)
+
+            stats["cpu_percent"] = usage_seconds / elapsed * 100 if elapsed > 0 else None
+            if quota_cores and stats["cpu_percent"] is not None:
+                stats["cpu_quota_percent"] = stats["cpu_percent"] / quota_cores
+            stats["throttled_ratio"] = throttled / periods * 100 if periods > 0 else 0
+            stats["throttled_ms"] = (cpu_stat.get('throttled_usec', 0) - before.get('throttled_usec', 0)) / 1000
+        self.previous = (now, cpu_stat)
+
+        if self.counters is not None:
+            counters = self.counters.sample(self.pids())
+            stats["threads"] = counters["threads"]
+            stats["open_fds"] = counters["open_fds"]
+            stats["ctx_switches_voluntary"] = counters["ctx_switches_voluntary"]
+            stats["ctx_switches_involuntary"] = counters["ctx_switches_involuntary"]
+        return stats
+
+def pearson(pairs):
+    """Correlación de Pearson de una secuencia de pares (x, y); None si no hay variación"""
+    n = len(pairs)
+    if n < 3:
+        return None
+    mean_x = sum(x for x, _ in pairs) / n
+    mean_y = sum(y for _, y in pairs) / n
+    covariance = sum((x - mean_x) * (y - mean_y) for x, y in pairs)
+    variance_x = sum((x - mean_x) ** 2 for x, _ in pairs)
+    variance_y = sum((y - mean_y) ** 2 for _, y in pairs)
+    if variance_x == 0 or variance_y == 0:
+        return None
+    return covariance / (variance_x * variance_y) ** 0.5
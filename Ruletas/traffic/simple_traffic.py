@@ -10,10 +10,19 @@ import random
 from datetime import datetime
 import argparse
 import json
+from array import array
+from live_metrics import LiveMetrics
+from request_capture import RequestCapture
 
 class SimpleTrafficGenerator:
-    def __init__(self, base_url="http://localhost:5000"):
+    def __init__(self, base_url="http://localhost:5000", live=None, capture=None, tables=0):
         self.base_url = base_url
+        # Métricas por intervalo durante la prueba (LiveMetrics opcional)
+        self.live = live
+        # Muestra cruda de cada request en archivos columnares (RequestCapture opcional)
+        self.capture = capture
+        # Mesas entre las que se reparten las requests (X-Table-Id, para balancer.py)
+        self.tables = tables
         self.stats = {
             "total_requests": 0,
             "successful_requests": 0,
@@ -22,57 +31,85 @@ class SimpleTrafficGenerator:
             "end_time": None
         }
         self.stats_lock = threading.Lock()
+        self.level = None
+        # Latencias y requests completadas por segundo para comparar corridas (regression_analyzer.py)
+        self.latencies = array('d')
+        self.completions_per_second = {}
+        self.start_monotonic = None
     
-    def update_stats(self, success=True):
+    def update_stats(self, success=True, latency_ms=None, endpoint="", status=0, size=0, sent=0.0):
         """Actualizar estadísticas de forma thread-safe"""
+        second = int(time.monotonic() - self.start_monotonic) if self.start_monotonic is not None else 0
         with self.stats_lock:
             self.stats["total_requests"] += 1
             if success:
                 self.stats["successful_requests"] += 1
             else:
                 self.stats["failed_requests"] += 1
+            if latency_ms is not None:
+                self.latencies.append(latency_ms)
+            self.completions_per_second[second] = self.completions_per_second.get(second, 0) + 1
+            # La captura admite un solo escritor a la vez: el lock ya lo garantiza
+            if self.capture is not None:
+                self.capture.record(sent, endpoint, status, latency_ms, size)
+        # Buffer propio de cada hilo: no necesita el lock
+        if self.live is not None:
+            self.live.record(latency_ms, success)
+    
+    def table_headers(self):
+        """Cabecera de una mesa al azar; sin mesas, ninguna"""
+        return {"X-Table-Id": f"mesa-{random.randrange(self.tables)}"} if self.tables else None
     
     def single_spin(self):
         """Realizar un giro individual"""
+        start = time.perf_counter()
         try:
-            response = requests.post(f"{self.base_url}/api/spin", timeout=10)
+            response = requests.post(f"{self.base_url}/api/spin", headers=self.table_headers(), timeout=10)
+            latency_ms = (time.perf_counter() - start) * 1000
+            request_info = ("POST /api/spin", response.status_code, len(response.content), start)
             if response.status_code == 200:
-                self.update_stats(True)
+                self.update_stats(True, latency_ms, *request_info)
                 return response.json()
             else:
-                self.update_stats(False)
+                self.update_stats(False, latency_ms, *request_info)
                 return None
         except Exception as e:
-            self.update_stats(False)
+            self.update_stats(False, None, "POST /api/spin", 0, 0, start)
             print(f"Error en request: {e}")
             return None
     
     def get_history(self):
         """Obtener historial"""
+        start = time.perf_counter()
         try:
-            response = requests.get(f"{self.base_url}/api/history", timeout=10)
+            response = requests.get(f"{self.base_url}/api/history", headers=self.table_headers(), timeout=10)
+            latency_ms = (time.perf_counter() - start) * 1000
+            request_info = ("GET /api/history", response.status_code, len(response.content), start)
             if response.status_code == 200:
-                self.update_stats(True)
+                self.update_stats(True, latency_ms, *request_info)
                 return response.json()
             else:
-                self.update_stats(False)
+                self.update_stats(False, latency_ms, *request_info)
                 return None
         except Exception as e:
-            self.update_stats(False)
+            self.update_stats(False, None, "GET /api/history", 0, 0, start)
             return None
     
     def get_stats(self):
         """Obtener estadísticas"""
+        start = time.perf_counter()
         try:
-            response = requests.get(f"{self.base_url}/api/statistics", timeout=10)
+            response = requests.get(f"{self.base_url}/api/statistics", headers=self.table_headers(), timeout=10)
+            latency_ms = (time.perf_counter() - start) * 1000
+            request_info = ("GET /api/statistics", response.status_code, len(response.content), start)
             if response.status_code == 200:
-                self.update_stats(True)
+                self.update_stats(True, latency_ms, *request_info)
                 return response.json()
             else:
-                self.update_stats(False)
+                self.update_stats(False, latency_ms, *request_info)
                 return None
         except Exception as e:
-            self.update_stats(False)
+            self.update_stats(False, None, "GET /api/statistics", 0, 0, start)
             return None
     
     def user_simulation(self, user_id, actions_count, delay_range):
@@ -134,7 +171,13 @@ class SimpleTrafficGenerator:
         print(f"🎯 URL objetivo: {self.base_url}")
         print("-" * 50)
         
+        self.level = level
         self.stats["start_time"] = datetime.now()
+        self.start_monotonic = time.monotonic()
+        if self.live is not None:
+            self.live.begin()
+        if self.capture is not None:
+            self.capture.begin()
         threads = []
         
         if level == "low":
@@ -242,9 +285,25 @@ class SimpleTrafficGenerator:
         for thread in threads:
             thread.join()
         
+        if self.live is not None:
+            self.live.end()
+        if self.capture is not None:
+            self.capture.end()
         self.stats["end_time"] = datetime.now()
         self.print_results()
     
+    def latency_percentiles(self):
+        sorted_latencies = sorted(self.latencies)
+        n = len(sorted_latencies)
+        if not n:
+            return {"p50": 0, "p95": 0, "p99": 0}
+        return {f"p{p}": sorted_latencies[min(n - 1, int(n * p / 100))] for p in (50, 95, 99)}
+    
+    def latency_sample(self, limit=5000):
+        if len(self.latencies) <= limit:
+            return list(self.latencies)
+        return random.sample(list(self.latencies), limit)
+    
     def print_results(self):
         """Imprimir estadísticas del test"""
         duration = (self.stats["end_time"] - self.stats["start_time"]).total_seconds()
@@ -260,6 +319,8 @@ class SimpleTrafficGenerator:
         print(f"❌ Requests fallidos: {self.stats['failed_requests']}")
         print(f"🚀 Requests por segundo promedio: {rps:.2f}")
         print(f"📈 Tasa de éxito: {success_rate:.2f}%")
+        percentiles = self.latency_percentiles()
+        print(f"⚡ Latencia P50: {percentiles['p50']:.2f}ms | P95: {percentiles['p95']:.2f}ms | P99: {percentiles['p99']:.2f}ms")
         print("="*60)
         
         # Guardar resultados en archivo
@@ -270,7 +331,14 @@ class SimpleTrafficGenerator:
             "successful_requests": self.stats["successful_requests"],
             "failed_requests": self.stats["failed_requests"],
             "requests_per_second": rps,
-            "success_rate": success_rate
+            "success_rate": success_rate,
+            "level": self.level,
+            "base_url": self.base_url,
+            "latency_percentiles_ms": self.latency_percentiles(),
+            # Muestra uniforme acotada: suficiente para comparar distribuciones sin inflar el archivo
+            "latency_samples_ms": [round(value, 3) for value in self.latency_sample()],
+            "throughput_per_second": [self.completions_per_second.get(second, 0)
+                                      for second in range(int(duration) + 1)]
         }
         
         filename = f"traffic_test_{self.stats['start_time'].strftime('%Y%m%d_%H%M%S')}.json"
@@ -287,9 +355,25 @@ def main():
     parser.add_argument('--url', default='http://localhost:5000', 
                        help='URL base del servidor')
     
+    parser.add_argument('--live', action='store_true',
+                       help='Mostrar RPS, errores y percentiles por intervalo durante la prueba')
+    parser.add_argument('--timeseries', metavar='ARCHIVO.jsonl',
+                       help='Guardar las métricas por intervalo en un archivo JSONL')
+    parser.add_argument('--live-interval', type=float, default=1.0,
+                       help='Intervalo de las métricas en vivo en segundos')
+    
+    parser.add_argument('--tables', type=int, default=0,
+                       help='Repartir las requests entre N mesas con X-Table-Id (para probar balancer.py)')
+    parser.add_argument('--capture', metavar='DIRECTORIO',
+                       help='Guardar envío, endpoint, status, latencia y bytes de cada request (ver request_capture.py)')
+    
     args = parser.parse_args()
     
-    generator = SimpleTrafficGenerator(args.url)
+    live = None
+    if args.live or args.timeseries:
+        live = LiveMetrics(args.live_interval, args.timeseries, console=args.live)
+    capture = RequestCapture(args.capture) if args.capture else None
+    generator = SimpleTrafficGenerator(args.url, live, capture, args.tables)
     
     # Verificar que el servidor esté disponible
     try:
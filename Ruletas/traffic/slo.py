@@ -0,0 +1,253 @@
+"""
+Objetivos de nivel de servicio (SLO) con alertas por tasa de consumo del presupuesto de error
+Ventanas múltiples (p.ej. 5 minutos y 1 hora) sobre contadores en streaming; las alertas van a la
+consola del monitor, a un archivo JSONL y opcionalmente a un webhook
+"""
+
+import json
+import threading
+from collections import deque
+from datetime import datetime
+
+import requests
+
+# Objetivos y reglas por defecto; un archivo --slo puede redefinir cualquiera de las dos listas.
+# Regla multiventana: alerta si ambas ventanas consumen el presupuesto a más de `burn_rate`
+# veces el ritmo sostenible (14.4 en 1h agota el 2% de un presupuesto de 30 días; 6 en 6h, el 5%)
+# y ambas tienen datos suficientes (`min_events` y la ventana corta ya cubierta)
+DEFAULT_MIN_EVENTS = 10
+
+DEFAULT_CONFIG = {
+    "objectives": [
+        {"name": "disponibilidad", "type": "availability", "target": 99.5},
+        {"name": "latencia_spin", "type": "latency", "threshold_ms": 500, "target": 99.0}
+    ],
+    "alerts": [
+        {"severity": "crítica", "long_window": 3600, "short_window": 300, "burn_rate": 14.4},
+        {"severity": "aviso", "long_window": 21600, "short_window": 1800, "burn_rate": 6}
+    ]
+}
+
+def load_config(path=None):
+    """Configuración de un archivo JSON, completada con los valores por defecto"""
+    config = {key: [dict(item) for item in items] for key, items in DEFAULT_CONFIG.items()}
+    if path:
+        with open(path, 'r', encoding='utf-8') as f:
+            config.update(json.load(f))
+    for spec in config["objectives"]:
+        if spec.get("type") not in ("availability", "latency"):
+            raise ValueError(f"Objetivo {spec.get('name')}: type debe ser availability o latency")
+        if spec["type"] == "latency" and "threshold_ms" not in spec:
+            raise ValueError(f"Objetivo {spec['name']}: falta threshold_ms")
+        if not 0 < spec["target"] < 100:
+            raise ValueError(f"Objetivo {spec['name']}: target es un porcentaje entre 0 y 100")
+    for index, rule in enumerate(config["alerts"]):
+        label = f"Regla de alerta {rule.get('severity', index + 1)}"
+        if not isinstance(rule.get("severity"), str):
+            raise ValueError(f"{label}: falta severity")
+        for key in ("long_window", "short_window", "burn_rate"):
+            value = rule.get(key)
+            if isinstance(value, bool) or not isinstance(value, (int, float)) or value <= 0:
+                raise ValueError(f"{label}: {key} debe ser un número positivo")
+        if rule["short_window"] > rule["long_window"]:
+            raise ValueError(f"{label}: short_window no puede superar a long_window")
+        min_events = rule.setdefault("min_events", DEFAULT_MIN_EVENTS)
+        if isinstance(min_events, bool) or not isinstance(min_events, int) or min_events < 1:
+            raise ValueError(f"{label}: min_events debe ser un entero positivo")
+    return config
+
+class EventWindow:
+    """Eventos buenos y totales de los últimos `seconds` segundos, con sumas corrientes"""
+
+    def __init__(self, seconds):
+        self.seconds = seconds
+        self.events = deque()
+        self.good = 0
+        self.total = 0
+
+    def add(self, now, good, total):
+        self.events.append((now, good, total))
+        self.good += good
+        self.total += total
+        while self.events and self.events[0][0] <= now - self.seconds:
+            _, old_good, old_total = self.events.popleft()
+            self.good -= old_good
+            self.total -= old_total
+
+    def error_ratio(self):
+        return (self.total - self.good) / self.total if self.total else 0.0
+
+class Objective:
+    def __init__(self, spec, windows):
+        self.name = spec["name"]
+        self.kind = spec["type"]
+        self.target = spec["target"]
+        self.threshold_ms = spec.get("threshold_ms")
+        self.budget = 1 - self.target / 100
+        self.windows = {seconds: EventWindow(seconds) for seconds in windows}
+        self.good = 0
+        self.total = 0
+        self.first_seen = None
+
+    def add(self, now, good, total):
+        if self.first_seen is None:
+            self.first_seen = now
+        self.good += good
+        self.total += total
+        for window in self.windows.values():
+            window.add(now, good, total)
+
+    def burn_rate(self, seconds):
+        """Consumo del presupuesto en la ventana: 1 = justo al ritmo que lo agota al final del período"""
+        return self.windows[seconds].error_ratio() / self.budget
+
+    def has_data(self, now, rule):
+        """Evita alertar con una ventana a medio llenar: la primera sonda fallida sería un 100% de error"""
+        if self.first_seen is None or now - self.first_seen < rule["short_window"]:
+            return False
+        return all(self.windows[rule[key]].total >= rule["min_events"] for key in ("long_window", "short_window"))
+
+    def budget_consumed(self):
+        """Porcentaje del presupuesto de error gastado en toda la sesión"""
+        return ((self.total - self.good) / self.total / self.budget * 100) if self.total else 0.0
+
+    def describe(self):
+        if self.kind == "latency":
+            return f"{self.target}% de giros en menos de {self.threshold_ms:g}ms"
+        return f"{self.target}% de requests exitosas"
+
+class AlertFile:
+    """Destino de alertas: una línea JSON por alerta (sustituto local de un webhook)"""
+
+    def __init__(self, path):
+        self.path = path
+
+    def send(self, alert):
+        with open(self.path, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(alert, ensure_ascii=False) + "\n")
+
+class AlertWebhook:
+    """Destino de alertas: POST JSON en segundo plano para no frenar el muestreo"""
+
+    def __init__(self, url, timeout=5):
+        self.url = url
+        self.timeout = timeout
+
+    def send(self, alert):
+        threading.Thread(target=self.post, args=(alert,), daemon=True).start()
+
+    def post(self, alert):
+        try:
+            requests.post(self.url, json=alert, timeout=self.timeout)
+        except requests.RequestException as e:
+            print(f"⚠️  Webhook de alertas sin respuesta: {e}")
+
+class SLOEngine:
+    """Evalúa las reglas de consumo en cada muestra y emite una alerta al activarse o resolverse"""
+
+    def __init__(self, config, sinks=()):
+        self.rules = config["alerts"]
+        windows = sorted({rule[key] for rule in self.rules for key in ("long_window", "short_window")})
+        self.objectives = [Objective(spec, windows) for spec in config["objectives"]]
+        self.sinks = list(sinks)
+        self.firing = {}                    # (objetivo, severidad) -> alerta activa
+        self.recent = deque(maxlen=8)       # últimas alertas para la consola
+        self.alert_count = 0
+
+    def observe(self, now, availability, latency_events):
+        """Sumar los eventos de una muestra y evaluar las reglas.
+
+        `availability` es (buenos, totales) y `latency_events(umbral_ms)` devuelve (buenos, totales)
+        para los objetivos de latencia.
+        """
+        for objective in self.objectives:
+            good, total = availability if objective.kind == "availability" else latency_events(objective.threshold_ms)
+            objective.add(now, good, total)
+        self.evaluate(now)
+
+    def evaluate(self, now):
+        for objective in self.objectives:
+            for rule in self.rules:
+                long_burn = objective.burn_rate(rule["long_window"])
+                short_burn = objective.burn_rate(rule["short_window"])
+                key = (objective.name, rule["severity"])
+                # La ventana corta confirma que sigue pasando; la larga, que no es un pico aislado
+                burning = (long_burn >= rule["burn_rate"] and short_burn >= rule["burn_rate"]
+                           and objective.has_data(now, rule))
+                if burning and key not in self.firing:
+                    self.firing[key] = self.emit("activa", objective, rule, long_burn, short_burn)
+                elif not burning and key in self.firing:
+                    del self.firing[key]
+                    self.emit("resuelta", objective, rule, long_burn, short_burn)
+
+    def emit(self, state, objective, rule, long_burn, short_burn):
+        alert = {
+            "timestamp": datetime.now().isoformat(),
+            "state": state,
+            "severity": rule["severity"],
+            "objective": objective.name,
+            "description": objective.describe(),
+            "burn_rate_threshold": rule["burn_rate"],
+            "burn_rate_long": long_burn,
+            "burn_rate_short": short_burn,
+            "long_window_seconds": rule["long_window"],
+            "short_window_seconds": rule["short_window"],
+            "budget_consumed_percent": objective.budget_consumed()
+        }
+        self.recent.append(alert)
+        self.alert_count += 1
+        for sink in self.sinks:
+            try:
+                sink.send(alert)
+            except OSError as e:
+                print(f"⚠️  No se pudo enviar la alerta: {e}")
+        return alert
+
+    def status(self):
+        """Estado por objetivo para la consola y el log de muestras"""
+        windows = sorted(next(iter(self.objectives)).windows) if self.objectives else []
+        return {
+            objective.name: {
+                "compliance_percent": objective.good / objective.total * 100 if objective.total else None,
+                "budget_consumed_percent": objective.budget_consumed(),
+                "burn_rates": {str(seconds): objective.burn_rate(seconds) for seconds in windows},
+                "firing": sorted(severity for name, severity in self.firing if name == objective.name)
+            }
+            for objective in self.objectives
+        }
+
+    def summary(self):
+        return {
+            "objectives": {
+                objective.name: {
+                    "description": objective.describe(),
+                    "good_events": objective.good,
+                    "total_events": objective.total,
+                    "compliance_percent": objective.good / objective.total * 100 if objective.total else None,
+                    "budget_consumed_percent": objective.budget_consumed()
+                }
+                for objective in self.objectives
+            },
+            "alerts_emitted": self.alert_count,
+            "firing_at_end": [f"{name} ({severity})" for name, severity in self.firing]
+        }
+
+    def display(self):
+        """Sección SLO del monitor: cumplimiento, presupuesto gastado y consumo por ventana"""
+        print("\n🎯 SLO (consumo del presupuesto de error por ventana):")
+        for name, status in self.status().items():
+            compliance = status["compliance_percent"]
+            compliance_text = f"{compliance:.2f}%" if compliance is not None else "sin eventos"
+            marker = "🔴" if status["firing"] else "🟢"
+            burns = " | ".join(f"{format_window(int(seconds))} {burn:.1f}x"
+                               for seconds, burn in status["burn_rates"].items())
+            print(f"   {marker} {name}: {compliance_text} | presupuesto gastado {status['budget_consumed_percent']:.0f}% "
+                  f"| {burns}")
+        for alert in list(self.recent)[-3:]:
+            icon = "🚨" if alert["state"] == "activa" else "✅"
+            print(f"   {icon} {alert['timestamp'][11:19]} {alert['severity']} {alert['state']}: {alert['objective']} "
+                  f"({alert['burn_rate_long']:.1f}x en {format_window(alert['long_window_seconds'])}, "
+                  f"{alert['burn_rate_short']:.1f}x en {format_window(alert['short_window_seconds'])})")
+
+def format_window(seconds):
+    return f"{seconds // 3600}h" if seconds % 3600 == 0 else f"{seconds // 60}m" if seconds % 60 == 0 else f"{seconds}s"
@@ -0,0 +1,309 @@
+"""
+Prueba de resistencia (soak) para la Ruleta Virtual
+Tráfico estable durante horas; por ventana, p99 y errores del generador y memoria del servidor
+(GET /debug/memory con RULETA_MEMORY_DEBUG=1). Al final ajusta tendencias y falla si la memoria
+crece o el p99 deriva más de lo permitido
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import statistics
+import sys
+import time
+from datetime import datetime
+
+import aiohttp
+
+from traffic_generator import TrafficGenerator
+from resource_sampler import ProcessSampler
+
+# Estructuras de /debug/memory que crecen por diseño y no cuentan como fuga
+GROWING_BY_DESIGN = ("spin_count",)
+
+def theil_sen(xs, ys):
+    """Pendiente de Theil-Sen: mediana de las pendientes entre pares, robusta al diente de sierra del GC"""
+    slopes = [(ys[j] - ys[i]) / (xs[j] - xs[i])
+              for i in range(len(xs)) for j in range(i + 1, len(xs)) if xs[j] != xs[i]]
+    return statistics.median(slopes) if slopes else 0.0
+
+class SoakTest:
+    def __init__(self, base_url, rate, users, window, pid=None, output=None):
+        self.base_url = base_url
+        self.rate = rate
+        self.users = users
+        self.window = window
+        self.sampler = ProcessSampler(pid) if pid else None
+        self.output = output
+        self.generator = TrafficGenerator(base_url)
+        self.windows = []
+        self.memory_endpoint = True
+        self.baseline_report = None
+        self.final_report = None
+
+    async def user_loop(self, session, stop):
+        """Un usuario con ritmo fijo: la mezcla de acciones de --level medium, sin fin de sesión"""
+        interval = self.users / self.rate
+        next_time = time.monotonic() + random.uniform(0, interval)
+        while not stop.is_set():
+            await asyncio.sleep(max(0.0, next_time - time.monotonic()))
+            next_time += interval
+            action = random.choice(['spin', 'spin', 'history', 'stats'])
+            if action == 'spin':
+                await self.generator.single_spin(session)
+            elif action == 'history':
+                await self.generator.single_request(session, 'GET', '/api/history')
+            else:
+                await self.generator.single_request(session, 'GET', '/api/statistics')
+
+    async def server_memory(self, session, top=0, diff=False):
+        """Reporte de /debug/memory, o None si el servidor no lo expone"""
+        if not self.memory_endpoint:
+            return None
+        try:
+            async with session.get(f"{self.base_url}/debug/memory",
+                                   params={"top": str(top), "diff": "1" if diff else "0"}) as response:
+                if response.status == 404:
+                    self.memory_endpoint = False
+                    print("⚠️  El servidor no expone /debug/memory (arráncalo con RULETA_MEMORY_DEBUG=1)")
+                    return None
+                return await response.json()
+        except (aiohttp.ClientError, asyncio.TimeoutError, ValueError) as e:
+            print(f"⚠️  No se pudo leer /debug/memory: {e}")
+            return None
+
+    def window_record(self, index, elapsed, mark, counts, memory):
+        latencies = sorted(self.generator.latencies[mark:])
+        total = self.generator.stats["total_requests"] - counts[0]
+        failed = self.generator.stats["failed_requests"] - counts[1]
+        record = {
+            "window": index,
+            "timestamp": datetime.now().isoformat(),
+            "elapsed_seconds": elapsed,
+            "requests": total,
+            "failed": failed,
+            "p50_ms": latencies[len(latencies) // 2] if latencies else None,
+            "p99_ms": latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))] if latencies else None
+        }
+        if memory is not None:
+            record["rss_mb"] = memory["rss_bytes"] / 1024 / 1024 if memory.get("rss_bytes") else None
+            record["gc_objects"] = memory.get("gc_objects")
+            if "tracemalloc" in memory:
+                record["heap_mb"] = memory["tracemalloc"]["current_bytes"] / 1024 / 1024
+            record["structures"] = memory.get("structures", {})
+        elif self.sampler is not None:
+            try:
+                record["rss_mb"] = self.sampler.sample()["rss_mb"]
+            except Exception:
+                pass
+        return record
+
+    def print_window(self, record):
+        p99 = f"{record['p99_ms']:8.2f}ms" if record["p99_ms"] is not None else f"{'-':>10}"
+        rss = f"{record['rss_mb']:8.1f}MB" if record.get("rss_mb") is not None else f"{'-':>10}"
+        heap = f"{record['heap_mb']:8.2f}MB" if record.get("heap_mb") is not None else f"{'-':>10}"
+        objects = f"{record['gc_objects']:>10,}" if record.get("gc_objects") is not None else f"{'-':>10}"
+        print(f"{record['window']:>6} {record['elapsed_seconds'] / 60:8.1f}m {record['requests']:>8} "
+              f"{record['failed']:>7} {p99} {rss} {heap} {objects}")
+
+    async def run(self, duration):
+        print(f"🕰️  Soak: {self.rate:.1f} req/s con {self.users} usuarios durante {duration / 3600:.2f}h "
+              f"(ventanas de {self.window:.0f}s)")
+        print(f"🎯 URL objetivo: {self.base_url}")
+        print(f"{'Ventana':>6} {'Tiempo':>9} {'Requests':>8} {'Fallos':>7} {'P99':>10} {'RSS':>10} "
+              f"{'Heap':>10} {'Objetos':>10}")
+        print("-" * 80)
+
+        output = open(self.output, "w", encoding="utf-8") if self.output else None
+        connector = aiohttp.TCPConnector(limit=100, limit_per_host=50)
+        timeout = aiohttp.ClientTimeout(total=30)
+        stop = asyncio.Event()
+        try:
+            async with aiohttp.ClientSession(connector=connector, timeout=timeout) as session:
+                # Snapshot de referencia del servidor: al final se pide el crecimiento por sitio
+                self.baseline_report = await self.server_memory(session, top=10)
+                self.generator.begin_run()
+                users = [asyncio.create_task(self.user_loop(session, stop)) for _ in range(self.users)]
+
+                started = time.monotonic()
+                index = 0
+                while time.monotonic() - started < duration:
+                    mark = len(self.generator.latencies)
+                    counts = (self.generator.stats["total_requests"], self.generator.stats["failed_requests"])
+                    window_end = min(started + duration, started + (index + 1) * self.window)
+                    await asyncio.sleep(max(0.0, window_end - time.monotonic()))
+                    memory = await self.server_memory(session)
+                    record = self.window_record(index, time.monotonic() - started, mark, counts, memory)
+                    self.windows.append(record)
+                    self.print_window(record)
+                    if output is not None:
+                        output.write(json.dumps(record, ensure_ascii=False) + "\n")
+                        output.flush()
+                    index += 1
+
+                stop.set()
+                await asyncio.gather(*users, return_exceptions=True)
+                self.generator.end_run()
+                self.final_report = await self.server_memory(session, top=10, diff=True)
+        finally:
+            if output is not None:
+                output.close()
+
+def analyze(windows, warmup, limits, min_span):
+    """Tendencias por hora tras el calentamiento y límites superados.
+
+    Con menos de `min_span` segundos estables las pendientes de memoria y latencia se informan pero
+    no hacen fallar: extrapolar a una hora unos minutos de arranque (arenas, pilas de hilos) da falsas
+    fugas. La tasa de error no es una extrapolación y siempre se aplica.
+    """
+    steady = [w for w in windows if w["elapsed_seconds"] > warmup]
+    result = {"windows": len(steady), "trends": {}, "violations": []}
+    if len(steady) < 3:
+        result["insufficient"] = True
+        return result
+    result["span_seconds"] = steady[-1]["elapsed_seconds"] - steady[0]["elapsed_seconds"]
+
+    requests = sum(w["requests"] for w in steady)
+    failed = sum(w["failed"] for w in steady)
+    result["error_rate_percent"] = failed / requests * 100 if requests else 100.0
+    if result["error_rate_percent"] > limits["error_rate"]:
+        result["violations"].append(f"{result['error_rate_percent']:.2f}% de requests fallidas "
+                                    f"(límite {limits['error_rate']}%)")
+
+    drift = []
+
+    def trend(key, getter=None):
+        points = [(w["elapsed_seconds"] / 3600, (getter or (lambda w: w.get(key)))(w)) for w in steady]
+        points = [(x, y) for x, y in points if y is not None]
+        if len(points) < 3:
+            return None
+        return theil_sen([x for x, _ in points], [y for _, y in points])
+
+    checks = [
+        ("rss_mb", "MB/h", limits["rss"]),
+        ("heap_mb", "MB/h", limits["heap"]),
+        ("gc_objects", "objetos/h", limits["objects"])
+    ]
+    for key, unit, limit in checks:
+        slope = trend(key)
+        if slope is None:
+            continue
+        result["trends"][key] = {"per_hour": slope, "unit": unit, "limit": limit}
+        if slope > limit:
+            drift.append(f"{key} crece {slope:.2f} {unit} (límite {limit})")
+
+    p99_slope = trend("p99_ms")
+    if p99_slope is not None:
+        # Deriva relativa al p99 de las primeras ventanas estables que lo tienen (trend exige al menos 3)
+        reference = statistics.median([w["p99_ms"] for w in steady if w.get("p99_ms") is not None][:5])
+        p99_drift = p99_slope / reference * 100 if reference > 0 else 0.0
+        result["trends"]["p99_ms"] = {"per_hour": p99_slope, "unit": "ms/h", "reference_ms": reference,
+                                      "drift_percent_per_hour": p99_drift, "limit": limits["p99_drift"]}
+        if p99_drift > limits["p99_drift"]:
+            drift.append(f"p99 deriva {p99_drift:+.1f}%/h ({p99_slope:+.2f} ms/h sobre {reference:.2f}ms; "
+                         f"límite {limits['p99_drift']}%/h)")
+
+    names = sorted({name for w in steady for name in w.get("structures", {})} - set(GROWING_BY_DESIGN))
+    for name in names:
+        slope = trend(name, lambda w, name=name: w.get("structures", {}).get(name))
+        if slope is None:
+            continue
+        result["trends"][f"structures.{name}"] = {"per_hour": slope, "unit": "elementos/h",
+                                                  "limit": limits["structures"]}
+        if slope > limits["structures"]:
+            drift.append(f"{name} crece {slope:.0f} elementos/h (límite {limits['structures']})")
+
+    if not result["trends"]:
+        result["insufficient"] = True
+    if result["span_seconds"] < min_span:
+        if drift:
+            result["informational"] = drift
+    else:
+        result["violations"] += drift
+    return result
+
+def print_analysis(analysis, final_report):
+    print("\n" + "=" * 80)
+    print("📈 TENDENCIAS (pendiente de Theil-Sen tras el calentamiento)")
+    print("=" * 80)
+    if analysis.get("insufficient"):
+        print("⚠️  Sin tendencias: menos de 3 ventanas tras el calentamiento o sin datos del servidor")
+    for key, trend in analysis["trends"].items():
+        extra = f" ({trend['drift_percent_per_hour']:+.1f}%/h)" if "drift_percent_per_hour" in trend else ""
+        print(f"   {key:<40} {trend['per_hour']:>+12.3f} {trend['unit']}{extra}")
+
+    growth = (final_report or {}).get("top_growth")
+    if growth:
+        print("\n🔍 Sitios de asignación que más crecieron en el servidor:")
+        for stat in growth[:5]:
+            print(f"   {stat['size_diff_bytes'] / 1024:+10.1f} KB {stat['count_diff']:+8} objs  {stat['location']}")
+
+    print("=" * 80)
+    for violation in analysis["violations"]:
+        print(f"🔴 {violation}")
+    if "informational" in analysis:
+        print(f"⚠️  Solo {analysis['span_seconds'] / 60:.1f} min estables (< --min-span): los límites de deriva no se aplican")
+        for violation in analysis["informational"]:
+            print(f"   ⚪ {violation}")
+    elif not analysis["violations"] and not analysis.get("insufficient"):
+        print("✅ Memoria y latencia estables dentro de los límites")
+
+def main():
+    parser = argparse.ArgumentParser(description='Prueba de resistencia (soak) con detección de fugas y deriva')
+    parser.add_argument('--url', default='http://localhost:5000', help='URL base del servidor')
+    length = parser.add_mutually_exclusive_group()
+    length.add_argument('--hours', type=float, default=1.0, help='Duración de la prueba en horas')
+    length.add_argument('--duration', type=int, help='Duración en segundos (para validar el montaje)')
+    parser.add_argument('--rate', type=float, default=20, help='Requests por segundo en total (estable)')
+    parser.add_argument('--users', type=int, default=10, help='Usuarios concurrentes que reparten el ritmo')
+    parser.add_argument('--window', type=float, default=60, help='Segundos por ventana de medida')
+    parser.add_argument('--warmup', type=float, default=300, help='Segundos iniciales excluidos de las tendencias')
+    parser.add_argument('--min-span', type=float, default=600,
+                       help='Segundos estables mínimos para que los límites hagan fallar la prueba')
+    parser.add_argument('--pid', type=int, help='PID del servidor para leer su RSS si no expone /debug/memory')
+    parser.add_argument('--max-rss-growth', type=float, default=10, help='Crecimiento máximo del RSS (MB/h)')
+    parser.add_argument('--max-heap-growth', type=float, default=5,
+                       help='Crecimiento máximo de la memoria de Python según tracemalloc (MB/h)')
+    parser.add_argument('--max-objects-growth', type=float, default=20000,
+                       help='Crecimiento máximo de objetos vivos del GC (objetos/h)')
+    parser.add_argument('--max-structure-growth', type=float, default=1000,
+                       help='Crecimiento máximo de cada estructura del servidor (elementos/h)')
+    parser.add_argument('--max-p99-drift', type=float, default=25,
+                       help='Deriva máxima del p99 (%% por hora sobre el p99 inicial)')
+    parser.add_argument('--max-error-rate', type=float, default=1.0,
+                       help='Porcentaje máximo de requests fallidas tras el calentamiento')
+    parser.add_argument('--output', help='Archivo JSONL por ventana (por defecto soak_<fecha>.jsonl)')
+
+    args = parser.parse_args()
+    duration = args.duration if args.duration is not None else args.hours * 3600
+    output = args.output or f"soak_{datetime.now().strftime('%Y%m%d_%H%M%S')}.jsonl"
+
+    soak = SoakTest(args.url, args.rate, args.users, args.window, args.pid, output)
+    try:
+        asyncio.run(soak.run(duration))
+    except KeyboardInterrupt:
+        print("\n⏹️  Prueba interrumpida: analizando las ventanas completas")
+
+    limits = {
+        "rss": args.max_rss_growth,
+        "heap": args.max_heap_growth,
+        "objects": args.max_objects_growth,
+        "structures": args.max_structure_growth,
+        "p99_drift": args.max_p99_drift,
+        "error_rate": args.max_error_rate
+    }
+    analysis = analyze(soak.windows, args.warmup, limits, args.min_span)
+    print_analysis(analysis, soak.final_report)
+
+    summary_path = output.rsplit(".", 1)[0] + "_summary.json"
+    with open(summary_path, "w", encoding="utf-8") as f:
+        json.dump({"timestamp": datetime.now().isoformat(), "url": args.url, "rate": args.rate,
+                   "users": args.users, "duration_seconds": duration, "window_seconds": args.window,
+                   "warmup_seconds": args.warmup, "analysis": analysis,
+                   "server_growth": (soak.final_report or {}).get("top_growth")}, f, indent=2, ensure_ascii=False)
+    print(f"📁 Ventanas en {output}, resumen en {summary_path}")
+    sys.exit(1 if analysis["violations"] else 0)
+
+if __name__ == "__main__":
+    main()
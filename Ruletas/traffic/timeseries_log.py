@@ -0,0 +1,224 @@
+"""
+Log de series temporales append-only para sesiones largas de monitoreo
+Escritura continua en JSONL compacto con volcado periódico y rotación por tamaño,
+y lectura en streaming de logs de varios días con submuestreo para vistas generales
+"""
+
+import argparse
+import glob
+import gzip
+import json
+import os
+import shutil
+import sys
+import threading
+import time
+from datetime import datetime
+
+SEGMENT_TIME_FORMAT = '%Y%m%d_%H%M%S'
+
+class TimeSeriesWriter:
+    """Escribe una muestra por línea; rota a un segmento nuevo al superar `max_bytes`"""
+
+    def __init__(self, prefix="performance_log", directory=".", flush_interval=5.0,
+                 max_bytes=64 * 1024 * 1024, compress_rotated=True):
+        self.prefix = prefix
+        self.directory = directory
+        self.flush_interval = flush_interval
+        self.max_bytes = max_bytes
+        self.compress_rotated = compress_rotated
+        self.file = None
+        self.path = None
+        self.bytes_written = 0
+        self.last_flush = time.monotonic()
+        self.segments = []
+        self.compressions = []
+        os.makedirs(directory, exist_ok=True)
+
+    def open_segment(self):
+        """Abrir un segmento nuevo (el primero se abre con la primera muestra)"""
+        name = f"{self.prefix}_{datetime.now().strftime(SEGMENT_TIME_FORMAT)}"
+        path = os.path.join(self.directory, f"{name}.jsonl")
+        suffix = 1
+        while os.path.exists(path) or os.path.exists(path + '.gz'):
+            path = os.path.join(self.directory, f"{name}_{suffix}.jsonl")
+            suffix += 1
+        self.file = open(path, 'a', encoding='utf-8')
+        self.path = path
+        self.bytes_written = 0
+        self.segments.append(path)
+
+    def write(self, sample):
+        """Añadir una muestra; se le agrega `ts` (epoch) para poder filtrar sin parsear fechas"""
+        if self.file is None:
+            self.open_segment()
+        record = dict(sample)
+        record.setdefault("ts", time.time())
+        line = json.dumps(record, separators=(',', ':'), ensure_ascii=False) + '\n'
+        self.file.write(line)
+        self.bytes_written += len(line)
+
+        now = time.monotonic()
+        if now - self.last_flush >= self.flush_interval:
+            self.file.flush()
+            self.last_flush = now
+
+        if self.bytes_written >= self.max_bytes:
+            self.rotate()
+
+    def rotate(self):
+        closed = self.path
+        self.file.close()
+        self.open_segment()
+        if self.compress_rotated:
+            # Comprimir el segmento cerrado sin frenar el muestreo; la lista apunta ya al .gz final
+            self.segments[self.segments.index(closed)] = closed + '.gz'
+            self.compressions = [thread for thread in self.compressions if thread.is_alive()]
+            thread = threading.Thread(target=compress_segment, args=(closed,), daemon=True)
+            thread.start()
+            self.compressions.append(thread)
+
+    def close(self):
+        """Cerrar el segmento actual y esperar las compresiones pendientes"""
+        if self.file is not None and not self.file.closed:
+            self.file.close()
+        for thread in self.compressions:
+            thread.join()
+        self.compressions = []
+
+def compress_segment(path):
+    with open(path, 'rb') as source, gzip.open(path + '.gz', 'wb') as target:
+        shutil.copyfileobj(source, target)
+    os.remove(path)
+
+def segment_start(path):
+    """Inicio de un segmento a partir de su nombre (prefijo_AAAAMMDD_HHMMSS[_n].jsonl[.gz])"""
+    name = os.path.basename(path).split('.jsonl')[0]
+    parts = name.split('_')
+    for i in range(len(parts) - 1):
+        try:
+            return datetime.strptime(f"{parts[i]}_{parts[i + 1]}", SEGMENT_TIME_FORMAT).timestamp()
+        except ValueError:
+            continue
+    return None
+
+def open_segment_file(path):
+    if path.endswith('.gz'):
+        return gzip.open(path, 'rt', encoding='utf-8')
+    return open(path, 'r', encoding='utf-8')
+
+def iter_samples(paths, start=None, end=None):
+    """Recorrer muestras en orden, saltando segmentos enteros fuera de [start, end]"""
+    ordered = sorted(paths, key=lambda p: (segment_start(p) or 0, p))
+    for index, path in enumerate(ordered):
+        if end is not None and (segment_start(path) or 0) > end:
+            break
+        # Si el siguiente segmento empieza antes de `start`, este no aporta nada
+        if start is not None and index + 1 < len(ordered):
+            next_start = segment_start(ordered[index + 1])
+            if next_start is not None and next_start <= start:
+                continue
+        try:
+            with open_segment_file(path) as f:
+                for line in f:
+                    try:
+                        sample = json.loads(line)
+                    except ValueError:
+                        continue  # Última línea truncada por una caída
+                    ts = sample.get("ts")
+                    if ts is None:
+                        continue
+                    if start is not None and ts < start:
+                        continue
+                    if end is not None and ts > end:
+                        break
+                    yield sample
+        except (EOFError, OSError) as e:
+            # Un .gz cortado (caída durante la rotación) no impide leer el resto del log
+            print(f"⚠️  Segmento ilegible o truncado, se continúa con el siguiente: {path} ({e})", file=sys.stderr)
+
+def downsample(samples, resolution):
+    """Agrupar muestras en ventanas de `resolution` segundos (media y máximo de latencia, etc.)"""
+    bucket_start = None
+    bucket = None
+
+    def summarize(start, data):
+        latencies = data["latencies"]
+        return {
+            "ts": start,
+            "timestamp": datetime.fromtimestamp(start).isoformat(),
+            "samples": data["samples"],
+            "success_rate": data["successes"] / data["samples"] * 100 if data["samples"] else 0,
+            "avg_latency_ms": sum(latencies) / len(latencies) if latencies else None,
+            "max_latency_ms": max(latencies) if latencies else None,
+            "avg_cpu_percent": sum(data["cpu"]) / len(data["cpu"]) if data["cpu"] else None
+        }
+
+    for sample in samples:
+        start = sample["ts"] - sample["ts"] % resolution
+        if start != bucket_start:
+            if bucket is not None:
+                yield summarize(bucket_start, bucket)
+            bucket_start = start
+            bucket = {"samples": 0, "successes": 0, "latencies": [], "cpu": []}
+        bucket["samples"] += 1
+        if sample.get("spin_success"):
+            bucket["successes"] += 1
+        if sample.get("spin_response_time_ms") is not None:
+            bucket["latencies"].append(sample["spin_response_time_ms"])
+        cpu = (sample.get("system_stats") or {}).get("cpu_percent")
+        if cpu is not None:
+            bucket["cpu"].append(cpu)
+
+    if bucket is not None:
+        yield summarize(bucket_start, bucket)
+
+def load_timeseries(paths, start=None, end=None, resolution=None):
+    """Cargar un log (lista de segmentos) completo o submuestreado a `resolution` segundos"""
+    samples = iter_samples(paths, start, end)
+    if resolution:
+        return list(downsample(samples, resolution))
+    return list(samples)
+
+def parse_time(value):
+    return datetime.fromisoformat(value).timestamp() if value else None
+
+def main():
+    parser = argparse.ArgumentParser(description='Lector de logs de series temporales del monitor')
+    parser.add_argument('paths', nargs='+', help='Segmentos del log (admite comodines, p.ej. "performance_log_*.jsonl*")')
+    parser.add_argument('--resolution', type=float, default=300,
+                       help='Resolución en segundos de la vista general (0 = sin submuestrear)')
+    parser.add_argument('--since', help='Inicio en formato ISO (p.ej. 2025-08-24T10:00)')
+    parser.add_argument('--until', help='Fin en formato ISO')
+    parser.add_argument('--output', help='Guardar el resultado en un archivo JSON')
+
+    args = parser.parse_args()
+
+    paths = []
+    for pattern in args.paths:
+        paths += glob.glob(pattern) or [pattern]
+
+    points = load_timeseries(paths, parse_time(args.since), parse_time(args.until), args.resolution or None)
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(points, f, indent=2, ensure_ascii=False)
+        print(f"📁 {len(points)} puntos guardados en: {args.output}")
+        return
+
+    if not args.resolution:
+        for point in points:
+            print(json.dumps(point, ensure_ascii=False))
+        return
+
+    print(f"{'Inicio':<20} {'Muestras':>8} {'Éxito %':>8} {'Lat. media':>11} {'Lat. máx':>10} {'CPU %':>7}")
+    def fmt(value, width, decimals):
+        return f"{value:>{width}.{decimals}f}" if value is not None else f"{'-':>{width}}"
+
+    for point in points:
+        print(f"{point['timestamp'][:19]:<20} {point['samples']:>8} {point['success_rate']:>8.1f} "
+              f"{fmt(point['avg_latency_ms'], 11, 2)} {fmt(point['max_latency_ms'], 10, 2)} "
+              f"{fmt(point['avg_cpu_percent'], 7, 1)}")
+
+if __name__ == "__main__":
+    main()
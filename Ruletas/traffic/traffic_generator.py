@@ -1,6 +1,7 @@
 """
 Generador de tráfico para la aplicación de Ruleta Virtual
 Simula diferentes niveles de carga: bajo, medio y alto
+También puede reproducir trazas grabadas por el servidor (RULETA_TRACE_FILE)
 """
 
 import asyncio
@@ -10,10 +11,29 @@ import random
 from datetime import datetime
 import argparse
 import json
+from array import array
+from raw_http import RawHTTPEngine
+from null_backend import NullBackend
+from live_metrics import LiveMetrics
+from connection_phases import ConnectionPhaseTracer
+from request_capture import RequestCapture
+
+# Usuarios simultáneos de cada nivel: la calibración los usa en bucle cerrado, sin pausas
+LEVEL_CONCURRENCY = {"low": 3, "medium": 8, "high": 25, "extreme": 50}
+# Duración máxima de la pasada secuencial que mide el piso de latencia
+CALIBRATION_FLOOR_SECONDS = 5
 
 class TrafficGenerator:
-    def __init__(self, base_url="http://localhost:5000"):
+    def __init__(self, base_url="http://localhost:5000", live=None, phases=None, capture=None, tables=0):
         self.base_url = base_url
+        # Métricas por intervalo durante la prueba (LiveMetrics opcional)
+        self.live = live
+        # Desglose DNS/conexión/TTFB/transferencia (ConnectionPhaseTracer opcional)
+        self.phases = phases
+        # Muestra cruda de cada request en archivos columnares (RequestCapture opcional)
+        self.capture = capture
+        # Mesas entre las que se reparten las requests (X-Table-Id, para balancer.py)
+        self.tables = tables
         self.stats = {
             "total_requests": 0,
             "successful_requests": 0,
@@ -21,27 +41,91 @@ class TrafficGenerator:
             "start_time": None,
             "end_time": None
         }
+        # Latencias en ms de las requests completadas
+        self.latencies = array('d')
+        # Resultado de la calibración contra el backend nulo (si se ejecutó)
+        self.calibration = None
+    
+    def record_request(self, success, latency_ms=None, endpoint="", status=0, size=0, sent=0.0):
+        """Registrar el resultado de una request (`sent` es su perf_counter de envío)"""
+        self.stats["total_requests"] += 1
+        if success:
+            self.stats["successful_requests"] += 1
+        else:
+            self.stats["failed_requests"] += 1
+        if latency_ms is not None:
+            self.latencies.append(latency_ms)
+        if self.live is not None:
+            self.live.record(latency_ms, success)
+        if self.capture is not None:
+            self.capture.record(sent, endpoint, status, latency_ms, size)
+    
+    def table_headers(self):
+        """Cabecera de una mesa al azar; sin mesas, ninguna"""
+        return {"X-Table-Id": f"mesa-{random.randrange(self.tables)}"} if self.tables else None
+    
+    def trace_configs(self):
+        """TraceConfigs de aiohttp activos para la sesión"""
+        return [self.phases.trace_config()] if self.phases else []
+    
+    def begin_run(self):
+        """Marcar el inicio de la prueba y arrancar las métricas en vivo"""
+        self.stats["start_time"] = datetime.now()
+        if self.live is not None:
+            self.live.begin()
+        if self.capture is not None:
+            self.capture.begin()
+    
+    def end_run(self):
+        """Detener las métricas en vivo y marcar el final de la prueba"""
+        if self.live is not None:
+            self.live.end()
+        if self.capture is not None:
+            self.capture.end()
+        self.stats["end_time"] = datetime.now()
     
     async def single_spin(self, session, delay=0):
         """Realizar un giro individual"""
         if delay > 0:
             await asyncio.sleep(delay)
         
+        trace_ctx = self.phases.new_request() if self.phases else None
+        start = time.perf_counter()
         try:
-            async with session.post(f"{self.base_url}/api/spin") as response:
-                self.stats["total_requests"] += 1
+            async with session.post(f"{self.base_url}/api/spin", headers=self.table_headers(),
+                                    trace_request_ctx=trace_ctx) as response:
+                body = await response.read()
+                latency_ms = (time.perf_counter() - start) * 1000
+                if self.phases:
+                    self.phases.finish(trace_ctx)
+                request_info = ("POST /api/spin", response.status, len(body), start)
                 if response.status == 200:
-                    self.stats["successful_requests"] += 1
-                    data = await response.json()
-                    return data
+                    self.record_request(True, latency_ms, *request_info)
+                    return await response.json()
                 else:
-                    self.stats["failed_requests"] += 1
+                    self.record_request(False, latency_ms, *request_info)
                     return None
         except Exception as e:
-            self.stats["failed_requests"] += 1
+            self.record_request(False, None, "POST /api/spin", 0, 0, start)
             print(f"Error en request: {e}")
             return None
     
+    async def single_request(self, session, method, path):
+        """Realizar una request arbitraria descartando el cuerpo"""
+        trace_ctx = self.phases.new_request() if self.phases else None
+        start = time.perf_counter()
+        try:
+            async with session.request(method, f"{self.base_url}{path}", headers=self.table_headers(),
+                                       trace_request_ctx=trace_ctx) as response:
+                body = await response.read()
+                self.record_request(response.status < 400, (time.perf_counter() - start) * 1000,
+                                    f"{method} {path}", response.status, len(body), start)
+                if self.phases:
+                    self.phases.finish(trace_ctx)
+        except Exception as e:
+            self.record_request(False, None, f"{method} {path}", 0, 0, start)
+            print(f"Error en request: {e}")
+    
     async def burst_spins(self, session, count=10):
         """Realizar múltiples giros en ráfaga"""
         tasks = []
@@ -78,25 +162,9 @@ class TrafficGenerator:
                 if action == 'spin':
                     await self.single_spin(session)
                 elif action == 'history':
-                    try:
-                        async with session.get(f"{self.base_url}/api/history") as response:
-                            self.stats["total_requests"] += 1
-                            if response.status == 200:
-                                self.stats["successful_requests"] += 1
-                            else:
-                                self.stats["failed_requests"] += 1
-                    except:
-                        self.stats["failed_requests"] += 1
+                    await self.single_request(session, "GET", "/api/history")
                 elif action == 'stats':
-                    try:
-                        async with session.get(f"{self.base_url}/api/statistics") as response:
-                            self.stats["total_requests"] += 1
-                            if response.status == 200:
-                                self.stats["successful_requests"] += 1
-                            else:
-                                self.stats["failed_requests"] += 1
-                    except:
-                        self.stats["failed_requests"] += 1
+                    await self.single_request(session, "GET", "/api/statistics")
                 
                 # Delay entre acciones del usuario
                 await asyncio.sleep(random.uniform(0.5, delay_between_actions))
@@ -105,6 +173,166 @@ class TrafficGenerator:
         tasks = [user_session() for _ in range(num_users)]
         await asyncio.gather(*tasks, return_exceptions=True)
     
+    async def closed_loop(self, session, duration_seconds, concurrency):
+        """`concurrency` usuarios que encadenan requests sin pausas hasta el plazo"""
+        deadline = time.monotonic() + duration_seconds
+        
+        async def worker():
+            while time.monotonic() < deadline:
+                action = random.choice(['spin', 'history', 'stats'])
+                if action == 'spin':
+                    await self.single_spin(session)
+                elif action == 'history':
+                    await self.single_request(session, "GET", "/api/history")
+                else:
+                    await self.single_request(session, "GET", "/api/statistics")
+        
+        await asyncio.gather(*(worker() for _ in range(concurrency)), return_exceptions=True)
+    
+    async def run_closed_loop(self, duration=10, concurrency=8):
+        """Throughput máximo del cliente: bucle cerrado con la mezcla de acciones de los usuarios"""
+        print(f"🔁 Bucle cerrado: {concurrency} usuarios sin pausas durante {duration} segundos")
+        print(f"🎯 URL objetivo: {self.base_url}")
+        print("-" * 50)
+        
+        self.begin_run()
+        
+        connector = aiohttp.TCPConnector(limit=100, limit_per_host=50)
+        timeout = aiohttp.ClientTimeout(total=30)
+        
+        async with aiohttp.ClientSession(connector=connector, timeout=timeout,
+                                         trace_configs=self.trace_configs()) as session:
+            await self.closed_loop(session, duration, concurrency)
+        
+        self.end_run()
+        self.print_results()
+    
+    @staticmethod
+    def read_trace(trace_path):
+        """Leer una traza línea a línea sin cargarla completa en memoria"""
+        with open(trace_path, 'r', encoding='utf-8') as f:
+            for line in f:
+                parts = line.rstrip('\n').split('\t', 2)
+                if len(parts) != 3:
+                    continue  # Línea incompleta (p.ej. traza cortada a mitad de escritura)
+                try:
+                    timestamp = float(parts[0])
+                except ValueError:
+                    continue
+                yield timestamp, parts[1], parts[2]
+    
+    async def replay_trace(self, session, trace_path, speed=1.0, max_in_flight=100):
+        """Reproducir una traza respetando sus tiempos originales escalados por `speed`.
+        
+        Con speed=0 las requests se lanzan lo más rápido posible. `max_in_flight`
+        acota las requests pendientes para que la memoria no crezca con la traza.
+        """
+        semaphore = asyncio.Semaphore(max_in_flight)
+        pending = set()
+        first_timestamp = None
+        replay_start = time.monotonic()
+        
+        async def issue(method, path):
+            try:
+                await self.single_request(session, method, path)
+            finally:
+                semaphore.release()
+        
+        for timestamp, method, path in self.read_trace(trace_path):
+            if first_timestamp is None:
+                first_timestamp = timestamp
+            
+            if speed > 0:
+                target = replay_start + (timestamp - first_timestamp) / speed
+                wait = target - time.monotonic()
+                if wait > 0:
+                    await asyncio.sleep(wait)
+            
+            await semaphore.acquire()
+            task = asyncio.create_task(issue(method, path))
+            pending.add(task)
+            task.add_done_callback(pending.discard)
+        
+        if pending:
+            await asyncio.gather(*pending, return_exceptions=True)
+    
+    async def run_replay(self, trace_path, speed=1.0):
+        """Ejecutar la reproducción de una traza grabada"""
+        speed_label = "máxima velocidad" if speed <= 0 else f"{speed:g}x"
+        print(f"🔁 Reproduciendo traza: {trace_path} ({speed_label})")
+        print(f"🎯 URL objetivo: {self.base_url}")
+        print("-" * 50)
+        
+        self.begin_run()
+        
+        connector = aiohttp.TCPConnector(limit=100, limit_per_host=50)
+        timeout = aiohttp.ClientTimeout(total=30)
+        
+        async with aiohttp.ClientSession(connector=connector, timeout=timeout,
+                                         trace_configs=self.trace_configs()) as session:
+            await self.replay_trace(session, trace_path, speed)
+        
+        self.end_run()
+        self.print_results()
+    
+    async def run_raw_engine(self, duration=60, connections=50, pipeline=1, validate=False):
+        """Prueba de throughput máximo con el motor HTTP ligero (sin aiohttp)"""
+        print("⚡ Motor ligero: POST /api/spin en bucle cerrado")
+        print(f"⏱️  Duración: {duration} segundos")
+        print(f"🔌 Conexiones: {connections} | Pipelining: {pipeline} | Validación: {'sí' if validate else 'no'}")
+        print(f"🎯 URL objetivo: {self.base_url}")
+        print("-" * 50)
+        
+        engine = RawHTTPEngine(self.base_url, connections, pipeline, validate, self.live)
+        
+        self.begin_run()
+        await engine.run("POST", "/api/spin", duration)
+        self.end_run()
+        
+        self.stats.update(engine.stats)
+        self.latencies = engine.latencies
+        self.print_results()
+        
+        if pipeline > 1 and not engine.keep_alive_supported:
+            print("⚠️  El servidor cierra la conexión tras cada respuesta: pipelining desactivado")
+    
+    async def run_calibration(self, traffic_level="medium", duration=10, engine="aiohttp", engine_options=None):
+        """Medir el techo de throughput y el piso de latencia del propio cliente.
+        
+        Carga un backend nulo local que responde con cuerpos pre-generados, así que lo que se
+        mide es coste del generador, no del servidor. Los escenarios por nivel tienen pausas entre
+        acciones y medirían su propio ritmo, no el techo: aquí los usuarios del nivel encadenan
+        requests sin pausas durante `duration` segundos. El piso sale de una pasada aparte con un
+        solo usuario secuencial: con el bucle saturado incluiría las colas del propio cliente.
+        """
+        floor_duration = min(duration, CALIBRATION_FLOOR_SECONDS)
+        options = dict(engine_options or {})
+        with NullBackend() as backend:
+            ceiling_probe = TrafficGenerator(backend.base_url)
+            floor_probe = TrafficGenerator(backend.base_url)
+            print("🧪 CALIBRACIÓN (1/2): techo en bucle cerrado contra backend nulo local")
+            if engine == "raw":
+                await ceiling_probe.run_raw_engine(duration, **options)
+            else:
+                await ceiling_probe.run_closed_loop(duration, LEVEL_CONCURRENCY[traffic_level])
+            print("🧪 CALIBRACIÓN (2/2): piso de latencia con un usuario secuencial")
+            if engine == "raw":
+                await floor_probe.run_raw_engine(floor_duration, **dict(options, connections=1, pipeline=1))
+            else:
+                await floor_probe.run_closed_loop(floor_duration, 1)
+        
+        elapsed = (ceiling_probe.stats["end_time"] - ceiling_probe.stats["start_time"]).total_seconds()
+        self.calibration = {
+            "rps_ceiling": ceiling_probe.stats["total_requests"] / elapsed if elapsed > 0 else 0,
+            "latency_floor": floor_probe.latency_percentiles()
+        }
+        
+        floor = self.calibration["latency_floor"]
+        print(f"🧪 Techo del cliente: {self.calibration['rps_ceiling']:.2f} RPS")
+        print(f"🧪 Piso de latencia del cliente: P50 {floor['p50']:.2f}ms | P95 {floor['p95']:.2f}ms | P99 {floor['p99']:.2f}ms")
+        print()
+        return self.calibration
+    
     async def run_traffic_test(self, traffic_level="medium", duration=60):
         """Ejecutar prueba de tráfico según el nivel especificado"""
         print(f"🚀 Iniciando prueba de tráfico: {traffic_level.upper()}")
@@ -112,12 +340,13 @@ class TrafficGenerator:
         print(f"🎯 URL objetivo: {self.base_url}")
         print("-" * 50)
         
-        self.stats["start_time"] = datetime.now()
+        self.begin_run()
         
         connector = aiohttp.TCPConnector(limit=100, limit_per_host=50)
         timeout = aiohttp.ClientTimeout(total=30)
         
-        async with aiohttp.ClientSession(connector=connector, timeout=timeout) as session:
+        async with aiohttp.ClientSession(connector=connector, timeout=timeout,
+                                         trace_configs=self.trace_configs()) as session:
             if traffic_level == "low":
                 # Tráfico bajo: 1-2 requests por segundo
                 await self.continuous_traffic(session, duration, 1.5)
@@ -145,9 +374,20 @@ class TrafficGenerator:
                 ]
                 await asyncio.gather(*tasks, return_exceptions=True)
         
-        self.stats["end_time"] = datetime.now()
+        self.end_run()
         self.print_results()
     
+    def latency_percentiles(self):
+        """Percentiles de latencia (ms) de las requests completadas"""
+        if not self.latencies:
+            return {"p50": 0, "p95": 0, "p99": 0}
+        sorted_data = sorted(self.latencies)
+        n = len(sorted_data)
+        return {
+            f"p{p}": sorted_data[min(n - 1, int(n * p / 100))]
+            for p in (50, 95, 99)
+        }
+    
     def print_results(self):
         """Imprimir estadísticas del test"""
         duration = (self.stats["end_time"] - self.stats["start_time"]).total_seconds()
@@ -163,6 +403,21 @@ class TrafficGenerator:
         print(f"❌ Requests fallidos: {self.stats['failed_requests']}")
         print(f"🚀 Requests por segundo: {rps:.2f}")
         print(f"📈 Tasa de éxito: {success_rate:.2f}%")
+        
+        if self.latencies:
+            percentiles = self.latency_percentiles()
+            print(f"⚡ Latencia P50: {percentiles['p50']:.2f}ms | P95: {percentiles['p95']:.2f}ms | P99: {percentiles['p99']:.2f}ms")
+            
+            if self.calibration:
+                # Restar el piso del cliente para estimar la latencia atribuible al servidor
+                floor = self.calibration["latency_floor"]
+                net = {p: max(0.0, percentiles[p] - floor[p]) for p in percentiles}
+                print(f"🧪 Piso del cliente: P50: {floor['p50']:.2f}ms | P95: {floor['p95']:.2f}ms | P99: {floor['p99']:.2f}ms")
+                print(f"🧮 Latencia neta: P50: {net['p50']:.2f}ms | P95: {net['p95']:.2f}ms | P99: {net['p99']:.2f}ms")
+                print(f"🧪 Techo del cliente en este escenario: {self.calibration['rps_ceiling']:.2f} RPS")
+        
+        if self.phases:
+            self.phases.print_summary()
         print("="*60)
 
 async def main():
@@ -173,11 +428,65 @@ async def main():
                        help='Duración en segundos')
     parser.add_argument('--url', default='http://localhost:5000', 
                        help='URL base del servidor')
+    parser.add_argument('--replay', metavar='TRAZA',
+                       help='Reproducir una traza grabada con RULETA_TRACE_FILE')
+    parser.add_argument('--speed', type=float, default=1.0,
+                       help='Velocidad de reproducción (1 = tiempo real, 10 = 10x, 0 = lo más rápido posible)')
+    parser.add_argument('--engine', choices=['aiohttp', 'raw'], default='aiohttp',
+                       help='Motor de carga (raw = HTTP/1.1 ligero para throughput máximo, ignora --level)')
+    parser.add_argument('--connections', type=int, default=50,
+                       help='Conexiones simultáneas del motor raw')
+    parser.add_argument('--pipeline', type=int, default=1,
+                       help='Requests en vuelo por conexión del motor raw (pipelining HTTP/1.1)')
+    parser.add_argument('--validate', action='store_true',
+                       help='Parsear y validar el JSON de cada respuesta en el motor raw')
+    parser.add_argument('--calibrate', action='store_true',
+                       help='Calibrar el cliente contra un backend nulo antes de la prueba real')
+    parser.add_argument('--calibrate-only', action='store_true',
+                       help='Solo calibrar el cliente, sin ejecutar la prueba real')
+    parser.add_argument('--calibration-duration', type=int, default=10,
+                       help='Duración de la calibración en segundos')
+    
+    parser.add_argument('--live', action='store_true',
+                       help='Mostrar RPS, errores y percentiles por intervalo durante la prueba')
+    parser.add_argument('--timeseries', metavar='ARCHIVO.jsonl',
+                       help='Guardar las métricas por intervalo en un archivo JSONL')
+    parser.add_argument('--live-interval', type=float, default=1.0,
+                       help='Intervalo de las métricas en vivo en segundos')
+    
+    parser.add_argument('--phases', action='store_true',
+                       help='Desglosar cada request en espera de pool, DNS, conexión, TTFB y transferencia')
+    
+    parser.add_argument('--tables', type=int, default=0,
+                       help='Repartir las requests entre N mesas con X-Table-Id (para probar balancer.py)')
+    parser.add_argument('--capture', metavar='DIRECTORIO',
+                       help='Guardar envío, endpoint, status, latencia y bytes de cada request (ver request_capture.py)')
     
     args = parser.parse_args()
     
-    generator = TrafficGenerator(args.url)
-    await generator.run_traffic_test(args.level, args.duration)
+    live = None
+    if args.live or args.timeseries:
+        live = LiveMetrics(args.live_interval, args.timeseries, console=args.live)
+    phases = ConnectionPhaseTracer() if args.phases else None
+    capture = RequestCapture(args.capture) if args.capture else None
+    generator = TrafficGenerator(args.url, live, phases, capture, args.tables)
+    
+    if args.calibrate or args.calibrate_only:
+        engine_options = {
+            "connections": args.connections,
+            "pipeline": args.pipeline,
+            "validate": args.validate
+        }
+        await generator.run_calibration(args.level, args.calibration_duration, args.engine, engine_options)
+        if args.calibrate_only:
+            return
+    
+    if args.replay:
+        await generator.run_replay(args.replay, args.speed)
+    elif args.engine == 'raw':
+        await generator.run_raw_engine(args.duration, args.connections, args.pipeline, args.validate)
+    else:
+        await generator.run_traffic_test(args.level, args.duration)
 
 if __name__ == "__main__":
     print("🎰 Generador de Tráfico - Ruleta Virtual")